@@ -0,0 +1,37 @@
+"""add articles.simhash and articles.cluster_id for near-duplicate clustering
+
+Revision ID: 20261018_000007
+Revises: 20261018_000006
+Create Date: 2026-10-18 00:00:07
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000007"
+down_revision = "20261018_000006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = {c["name"] for c in inspector.get_columns("articles")}
+    if "simhash" not in columns:
+        op.add_column("articles", sa.Column("simhash", sa.BigInteger(), nullable=True))
+    if "cluster_id" not in columns:
+        op.add_column("articles", sa.Column("cluster_id", sa.Integer(), nullable=True))
+    existing = {ix["name"] for ix in inspect(bind).get_indexes("articles")}
+    if "ix_articles_cluster_id" not in existing:
+        op.create_index("ix_articles_cluster_id", "articles", ["cluster_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_articles_cluster_id", table_name="articles")
+    with op.batch_alter_table("articles") as batch:
+        batch.drop_column("cluster_id")
+        batch.drop_column("simhash")
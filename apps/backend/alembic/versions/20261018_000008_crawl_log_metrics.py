@@ -0,0 +1,38 @@
+"""add crawl_logs.metrics (per-phase crawl instrumentation JSON)
+
+Revision ID: 20261018_000008
+Revises: 20261018_000007
+Create Date: 2026-10-18 00:00:08
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000008"
+down_revision = "20261018_000007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    # crawl_logs is created by the crawler (create_all); new installs get the column from there
+    if not inspector.has_table("crawl_logs"):
+        return
+    columns = {c["name"] for c in inspector.get_columns("crawl_logs")}
+    if "metrics" not in columns:
+        op.add_column("crawl_logs", sa.Column("metrics", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    if not inspector.has_table("crawl_logs"):
+        return
+    if "metrics" in {c["name"] for c in inspector.get_columns("crawl_logs")}:
+        with op.batch_alter_table("crawl_logs") as batch:
+            batch.drop_column("metrics")
@@ -0,0 +1,37 @@
+"""add articles.fingerprint/revision/revised_at for crawler change detection
+
+Revision ID: 20261018_000009
+Revises: 20261018_000008
+Create Date: 2026-10-18 00:00:09
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000009"
+down_revision = "20261018_000008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = inspect(bind)
+    columns = {c["name"] for c in inspector.get_columns("articles")}
+    # fingerprints of existing rows are backfilled by the crawler's first re-check
+    if "fingerprint" not in columns:
+        op.add_column("articles", sa.Column("fingerprint", sa.BigInteger(), nullable=True))
+    if "revision" not in columns:
+        op.add_column("articles", sa.Column("revision", sa.Integer(), nullable=False, server_default="0"))
+    if "revised_at" not in columns:
+        op.add_column("articles", sa.Column("revised_at", sa.DateTime(timezone=False), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("articles") as batch:
+        batch.drop_column("revised_at")
+        batch.drop_column("revision")
+        batch.drop_column("fingerprint")
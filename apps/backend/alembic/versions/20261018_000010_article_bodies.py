@@ -0,0 +1,36 @@
+"""add article_bodies (compressed full article text)
+
+Revision ID: 20261018_000010
+Revises: 20261018_000009
+Create Date: 2026-10-18 00:00:10
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000010"
+down_revision = "20261018_000009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # the crawler may already have created it (create_all)
+    if inspect(bind).has_table("article_bodies"):
+        return
+    op.create_table(
+        "article_bodies",
+        sa.Column("article_id", sa.Integer(), sa.ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("body", sa.LargeBinary(length=2**24), nullable=False),
+        sa.Column("length", sa.Integer(), nullable=False),
+        sa.Column("digest", sa.String(length=32), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=False), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("article_bodies")
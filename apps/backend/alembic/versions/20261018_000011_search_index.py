@@ -0,0 +1,58 @@
+"""add inverted search index tables (search_terms/postings/docs/stats)
+
+Revision ID: 20261018_000011
+Revises: 20261018_000010
+Create Date: 2026-10-18 00:00:11
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000011"
+down_revision = "20261018_000010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # the crawler may already have created them (create_all); fill with `crawler.run --reindex`
+    existing = set(inspect(op.get_bind()).get_table_names())
+    if "search_terms" not in existing:
+        op.create_table(
+            "search_terms",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("term", sa.String(length=32), nullable=False, unique=True),
+            sa.Column("df", sa.Integer(), nullable=False, server_default="0"),
+        )
+    if "search_postings" not in existing:
+        op.create_table(
+            "search_postings",
+            sa.Column("term_id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("article_id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("tf", sa.Integer(), nullable=False),
+        )
+        op.create_index("ix_search_postings_article", "search_postings", ["article_id"])
+    if "search_docs" not in existing:
+        op.create_table(
+            "search_docs",
+            sa.Column("article_id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("length", sa.Integer(), nullable=False),
+        )
+    if "search_stats" not in existing:
+        op.create_table(
+            "search_stats",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=False),
+            sa.Column("docs", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("total_length", sa.BigInteger(), nullable=False, server_default="0"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("search_stats")
+    op.drop_table("search_docs")
+    op.drop_index("ix_search_postings_article", table_name="search_postings")
+    op.drop_table("search_postings")
+    op.drop_table("search_terms")
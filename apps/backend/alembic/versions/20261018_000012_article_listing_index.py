@@ -0,0 +1,30 @@
+"""add composite index for keyset pagination of the article listing
+
+Revision ID: 20261018_000012
+Revises: 20261018_000011
+Create Date: 2026-10-18 00:00:12
+"""
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000012"
+down_revision = "20261018_000011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    existing = {ix["name"] for ix in inspect(op.get_bind()).get_indexes("articles")}
+    # matches ORDER BY published_at DESC, fetched_at DESC, id DESC (and its seek predicate)
+    if "ix_articles_published_fetched_id" not in existing:
+        op.create_index("ix_articles_published_fetched_id", "articles", ["published_at", "fetched_at", "id"])
+    if "ix_articles_fetched_id" not in existing:
+        op.create_index("ix_articles_fetched_id", "articles", ["fetched_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_articles_fetched_id", table_name="articles")
+    op.drop_index("ix_articles_published_fetched_id", table_name="articles")
@@ -0,0 +1,31 @@
+"""add cache_generations (article change counter for the response cache)
+
+Revision ID: 20261018_000013
+Revises: 20261018_000012
+Create Date: 2026-10-18 00:00:13
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = "20261018_000013"
+down_revision = "20261018_000012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if not inspect(op.get_bind()).has_table("cache_generations"):
+        op.create_table(
+            "cache_generations",
+            sa.Column("name", sa.String(length=32), primary_key=True),
+            sa.Column("value", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.Column("updated_at", sa.DateTime(timezone=False), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_generations")
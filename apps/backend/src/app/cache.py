@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+from .models import CacheGeneration
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    headers: Dict[str, str]
+
+
+def make_entry(body: bytes, headers: Optional[Dict[str, str]] = None) -> CachedResponse:
+    # content hash: identical bodies keep their ETag across generations and processes
+    return CachedResponse(body, '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest(), dict(headers or {}))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    # If-None-Match uses weak comparison
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def cache_key(path: str, params: Iterable[Tuple[str, str]]) -> str:
+    """Path plus the non-empty query parameters in sorted order (`?b=1&a=2` == `?a=2&b=1&c=`)."""
+    items = sorted((k, v) for k, v in params if v != "")
+    return path + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+
+async def read_generation(db: AsyncSession, name: str = "articles") -> int:
+    value = (await db.execute(select(CacheGeneration.value).where(CacheGeneration.name == name))).scalar()
+    return value or 0
+
+
+class RedisTier:
+    """Optional shared tier (several backend processes); errors just count as misses."""
+
+    def __init__(self, url: str, ttl: float):
+        from redis import asyncio as aioredis  # optional dependency
+
+        self._client = aioredis.Redis.from_url(url, socket_timeout=0.2)
+        self._ttl = max(int(ttl), 1)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            raw = await self._client.get("resp:" + key)
+        except Exception:
+            return None
+        if not raw:
+            return None
+        head, _, body = raw.partition(b"\n")
+        meta = json.loads(head)
+        return CachedResponse(body, meta["etag"], meta["headers"])
+
+    async def put(self, key: str, entry: CachedResponse) -> None:
+        head = json.dumps({"etag": entry.etag, "headers": entry.headers}).encode("utf-8")
+        try:
+            await self._client.set("resp:" + key, head + b"\n" + entry.body, ex=self._ttl)
+        except Exception:
+            pass
+
+
+class ResponseCache:
+    """In-process LRU of serialized responses, invalidated by the crawler's generation counter.
+
+    Entries are keyed by generation + request key, so a crawler commit (which bumps
+    `cache_generations.articles`) makes every older entry unreachable; they age out of the
+    LRU or expire after `ttl`. The counter itself is read at most once per `generation_poll`
+    seconds, so a hit normally costs no database round trip at all.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        generation_poll: float = 1.0,
+        shared: Optional[RedisTier] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation_poll = generation_poll
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse]]" = OrderedDict()
+        self._generation: Tuple[float, int] = (float("-inf"), 0)
+        self._stripes = [asyncio.Lock() for _ in range(64)]
+
+    async def generation(self, db: AsyncSession) -> int:
+        read_at, value = self._generation
+        now = time.monotonic()
+        if now - read_at >= self.generation_poll:
+            value = await read_generation(db)
+            self._generation = (now, value)
+        return value
+
+    def key_lock(self, key: str) -> asyncio.Lock:
+        """Lock (one of a fixed set of stripes) so a burst of misses for a key builds it once."""
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None:
+                if hit[0] > now:
+                    self._entries.move_to_end(key)
+                    return hit[1]
+                del self._entries[key]
+        if self.shared is not None:
+            entry = await self.shared.get(key)
+            if entry is not None:
+                self._store(key, entry)
+                return entry
+        return None
+
+    async def put(self, key: str, entry: CachedResponse) -> None:
+        self._store(key, entry)
+        if self.shared is not None:
+            await self.shared.put(key, entry)
+
+    def _store(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._generation = (float("-inf"), 0)
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        shared = None
+        if settings.response_cache_redis_url:
+            try:
+                shared = RedisTier(settings.response_cache_redis_url, settings.response_cache_ttl)
+            except ImportError:
+                shared = None
+        _cache = ResponseCache(
+            settings.response_cache_entries,
+            settings.response_cache_ttl,
+            settings.response_cache_generation_poll,
+            shared,
+        )
+    return _cache
@@ -1,5 +1,9 @@
 from contextlib import contextmanager
+from typing import AsyncIterator, Optional
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 
 from .config import settings
@@ -30,3 +34,46 @@ def get_db():
     finally:
         db.close()
 
+
+# Async drivers for the blocking ones in DATABASE_URL
+_ASYNC_DRIVERS = {"mysql": "aiomysql", "mariadb": "aiomysql", "sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+
+def async_url(url: str) -> str:
+    """`url` with its async driver (mysql+pymysql -> mysql+aiomysql, sqlite -> sqlite+aiosqlite)."""
+    u = make_url(url)
+    driver = _ASYNC_DRIVERS.get(u.get_backend_name())
+    if driver is None or u.get_driver_name() == driver:
+        return url
+    return u.set(drivername=f"{u.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+_async_engine: Optional[AsyncEngine] = None
+_AsyncSessionLocal: Optional[async_sessionmaker] = None
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """Async sessions on a lazily created engine (the driver is imported on first use)."""
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        url = settings.async_database_url or async_url(settings.database_url)
+        kwargs = {}
+        if not url.startswith("sqlite"):
+            # requests beyond the pool wait on the event loop, not on a thread
+            kwargs = {"pool_size": settings.db_async_pool_size, "max_overflow": settings.db_async_max_overflow}
+        _async_engine = create_async_engine(url, pool_pre_ping=True, **kwargs)
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _AsyncSessionLocal
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _AsyncSessionLocal
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = _AsyncSessionLocal = None
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async counterpart of get_db for `async def` endpoints (no threadpool thread per request)."""
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import ipaddress
+import os
+import socket
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Widths the proxy renders; a request is rounded up to the next bucket so caches stay small
+WIDTH_BUCKETS = (160, 320, 480, 640, 960, 1280)
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+_QUALITY = {"webp": 78, "jpeg": 82}
+# Decoded-pixel ceiling: refuse decompression bombs before Pillow allocates them
+MAX_PIXELS = 40_000_000
+# Redirect hops followed (each one re-checked) when downloading a source image
+MAX_REDIRECTS = 5
+
+
+def width_bucket(width: Optional[int]) -> int:
+    if not width:
+        return WIDTH_BUCKETS[1]
+    for bucket in WIDTH_BUCKETS:
+        if width <= bucket:
+            return bucket
+    return WIDTH_BUCKETS[-1]
+
+
+def variant_key(source_url: str, width: int, fmt: str) -> str:
+    """Cache key of one rendered variant; changes when the article's image URL changes."""
+    digest = hashlib.blake2b(source_url.encode("utf-8"), digest_size=12).hexdigest()
+    return f"{digest}-{width}.{fmt}"
+
+
+def source_key(source_url: str) -> str:
+    return hashlib.blake2b(source_url.encode("utf-8"), digest_size=12).hexdigest() + ".src"
+
+
+def render(data: bytes, width: int, fmt: str) -> bytes:
+    """Downscale (never upscale) an image to `width` and encode it as WebP or JPEG."""
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    with Image.open(io.BytesIO(data)) as im:
+        im.draft("RGB", (width, width * 4))  # JPEG: decode at a reduced scale when possible
+        im = ImageOps.exif_transpose(im)
+        if im.width > width:
+            im = im.resize((width, max(1, round(im.height * width / im.width))), Image.LANCZOS)
+        if fmt == "jpeg":
+            im = im.convert("RGB")
+        elif im.mode not in ("RGB", "RGBA"):
+            # palette/greyscale: keep transparency for WebP
+            im = im.convert("RGBA" if "transparency" in im.info or "A" in im.getbands() else "RGB")
+        out = io.BytesIO()
+        if fmt == "webp":
+            im.save(out, "WEBP", quality=_QUALITY["webp"], method=4)
+        else:
+            im.save(out, "JPEG", quality=_QUALITY["jpeg"], optimize=True, progressive=True)
+        return out.getvalue()
+
+
+class DiskLRU:
+    """Byte-bounded LRU cache of files in one directory.
+
+    Recency lives in memory (rebuilt from file mtimes at startup); hits bump it, writes
+    evict least recently used files until the total fits `max_bytes`. Files are written to a
+    temp name and renamed, so readers never see partial images. Safe across threads; several
+    processes may share the directory (each evicts by its own view, which is best effort).
+    """
+
+    def __init__(self, root: str | os.PathLike, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._size = 0
+        self._stripes = [threading.Lock() for _ in range(64)]
+        self._loaded = False
+
+    def _load(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        files = []
+        for p in self.root.iterdir():
+            if p.is_file() and not p.name.startswith("."):
+                st = p.stat()
+                files.append((st.st_mtime, p.name, st.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+        self._loaded = True
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def key_lock(self, key: str) -> threading.Lock:
+        """Lock (one of a fixed set of stripes) so concurrent misses for a key fetch/render once."""
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            data = (self.root / key).read_bytes()
+        except FileNotFoundError:
+            # evicted by another process
+            with self._lock:
+                self._size -= self._entries.pop(key, 0)
+            return None
+        try:
+            os.utime(self.root / key)  # keep recency across restarts
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._load()
+        tmp = self.root / f".{key}.{os.getpid()}.{threading.get_ident()}"
+        tmp.write_bytes(data)
+        os.replace(tmp, self.root / key)
+        with self._lock:
+            self._size += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            while self._size > self.max_bytes and self._entries:
+                old, size = self._entries.popitem(last=False)
+                self._size -= size
+                try:
+                    os.remove(self.root / old)
+                except FileNotFoundError:
+                    pass
+
+
+def _resolve(host: str, port: int) -> List[str]:
+    return [info[4][0] for info in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)]
+
+
+def _public_ip(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+def is_public_url(url: str) -> bool:
+    """http(s) URL whose host resolves only to public addresses (no loopback, private,
+    link-local or metadata targets). Unresolvable hosts are not public."""
+    from urllib.parse import urlsplit
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        return False
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return False
+    try:
+        addresses = _resolve(parts.hostname, port)
+    except (OSError, UnicodeError):
+        return False
+    return bool(addresses) and all(_public_ip(a) for a in addresses)
+
+
+def fetch_source(
+    url: str,
+    *,
+    timeout: float,
+    max_bytes: int,
+    user_agent: str,
+    transport=None,
+) -> Tuple[Optional[bytes], int]:
+    """Download an upstream image (bounded size). Returns (bytes or None, HTTP status or 0).
+
+    Image URLs come from publisher feeds, so every hop (the URL and each redirect target)
+    must pass is_public_url; a blocked hop returns status 403 without being requested.
+    """
+    import httpx
+
+    try:
+        with httpx.Client(timeout=timeout, headers={"User-Agent": user_agent}, transport=transport) as client:
+            for _ in range(MAX_REDIRECTS + 1):
+                if not is_public_url(url):
+                    return None, 403
+                with client.stream("GET", url) as r:
+                    if r.is_redirect:
+                        status = r.status_code
+                        url = str(r.url.join(r.headers["location"]))
+                        continue
+                    if not r.is_success:
+                        return None, r.status_code
+                    buf = bytearray()
+                    for chunk in r.iter_bytes():
+                        buf += chunk
+                        if len(buf) > max_bytes:
+                            return None, 413
+                    return bytes(buf), r.status_code
+            return None, status  # too many redirects
+    except httpx.HTTPError:
+        return None, 0
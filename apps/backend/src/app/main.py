@@ -1,11 +1,9 @@
-from fastapi import FastAPI, Depends, Request
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
 from .config import settings
-from .db import Base, engine
-from .routers import auth, articles, profile, bookmarks, reactions, events
-from .db import get_db
+from .db import Base, dispose_async_engine, engine
+from .routers import auth, articles, profile, bookmarks, reactions, events, images, me
 
 
 def create_app() -> FastAPI:
@@ -20,6 +18,7 @@ def create_app() -> FastAPI:
         allow_credentials=settings.cors_allow_credentials,
         allow_methods=settings.cors_allowed_methods,
         allow_headers=settings.cors_allowed_headers,
+        expose_headers=["X-Next-Cursor"],
     )
 
     # Routers
@@ -29,6 +28,8 @@ def create_app() -> FastAPI:
     app.include_router(bookmarks.router)
     app.include_router(reactions.router)
     app.include_router(events.router)
+    app.include_router(images.router)
+    app.include_router(me.router)
 
     @app.get("/healthz")
     def healthz():
@@ -49,6 +50,10 @@ def create_app() -> FastAPI:
             except Exception:
                 app.state.kafka_producer = None
 
+    @app.on_event("shutdown")
+    async def _dispose_async_db():
+        await dispose_async_engine()
+
     @app.on_event("shutdown")
     async def _stop_kafka():
         producer = getattr(app.state, "kafka_producer", None)
@@ -60,8 +65,8 @@ def create_app() -> FastAPI:
 
     # Alias endpoint: `/ingest` → reuse events ingestion
     @app.post("/ingest")
-    async def ingest_alias(batch: events.EventBatchIn, request: Request, db: Session = Depends(get_db)):
-        return await events.ingest_events(batch, request, db)
+    async def ingest_alias(batch: events.EventBatchIn, request: Request):
+        return await events.ingest_events(batch, request)
 
     return app
 
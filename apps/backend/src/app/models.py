@@ -1,8 +1,13 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, Index, UniqueConstraint, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, String, DateTime, Text, Index, UniqueConstraint, ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .db import Base
+from .urls import url_hash
+
+
+def _default_url_hash(context) -> int:
+    return url_hash(context.get_current_parameters()["url"])
 
 
 class User(Base):
@@ -21,6 +26,8 @@ class Article(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     site: Mapped[str] = mapped_column(String(80), index=True)
     url: Mapped[str] = mapped_column(String(1024), unique=True, nullable=False)
+    # 64-bit digest of the normalized URL (see app.urls); filled automatically on insert
+    url_hash: Mapped[int] = mapped_column(BigInteger, nullable=False, default=_default_url_hash)
     title: Mapped[str] = mapped_column(String(512), nullable=False)
     summary: Mapped[str | None] = mapped_column(Text())
     content: Mapped[str | None] = mapped_column(Text())
@@ -29,13 +36,89 @@ class Article(Base):
     image_url: Mapped[str | None] = mapped_column(String(1024))
     published_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=False))
     fetched_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), default=datetime.utcnow, nullable=False, index=True)
+    # Near-duplicate clustering, filled by the crawler; NULL cluster_id = cluster representative
+    simhash: Mapped[int | None] = mapped_column(BigInteger)
+    cluster_id: Mapped[int | None] = mapped_column(Integer, index=True)
+    # Change detection, filled by the crawler's re-check pass (crawler.refresh)
+    fingerprint: Mapped[int | None] = mapped_column(BigInteger)
+    revision: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    revised_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=False))
 
     __table_args__ = (
         Index("ix_articles_site_fetched_bk", "site", "fetched_at"),
+        # keyset pagination of the listing (see the backend's app.pagination)
+        Index("ix_articles_published_fetched_id", "published_at", "fetched_at", "id"),
+        Index("ix_articles_fetched_id", "fetched_at", "id"),
         UniqueConstraint("url", name="uq_articles_url_bk"),
+        Index("uq_articles_url_hash", "url_hash", unique=True),
     )
 
 
+class ArticleBody(Base):
+    """Full article text written by the crawler, gzip-compressed, one row per article.
+
+    Kept out of `articles` so listing queries never read it; served by
+    GET /articles/{id}/content. `digest` (BLAKE2b of the plain text) is the strong ETag.
+    """
+
+    __tablename__ = "article_bodies"
+
+    article_id: Mapped[int] = mapped_column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    body: Mapped[bytes] = mapped_column(LargeBinary(length=2**24), nullable=False)  # gzip member
+    length: Mapped[int] = mapped_column(Integer, nullable=False)  # uncompressed UTF-8 bytes
+    digest: Mapped[str] = mapped_column(String(32), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
+
+
+class SearchTerm(Base):
+    """Search index vocabulary (written by the crawler's crawler.search); `df` = documents containing it."""
+
+    __tablename__ = "search_terms"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    term: Mapped[str] = mapped_column(String(32), nullable=False, unique=True)
+    df: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class SearchPosting(Base):
+    """Inverted index entry (term, article) -> tf, clustered by term so a posting list is one range scan."""
+
+    __tablename__ = "search_postings"
+
+    term_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    article_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    tf: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_search_postings_article", "article_id"),)
+
+
+class SearchDoc(Base):
+    __tablename__ = "search_docs"
+
+    article_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    length: Mapped[int] = mapped_column(Integer, nullable=False)  # indexed tokens (BM25 normalization)
+
+
+class SearchStats(Base):
+    """Single row (id=1): indexed document count and total token length."""
+
+    __tablename__ = "search_stats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    docs: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_length: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+
+class CacheGeneration(Base):
+    """Change counters bumped by the crawler right after each article commit (see app.cache)."""
+
+    __tablename__ = "cache_generations"
+
+    name: Mapped[str] = mapped_column(String(32), primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=False))
+
+
 class Profile(Base):
     __tablename__ = "profiles"
 
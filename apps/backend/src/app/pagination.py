@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from .models import Article
+
+
+# Listing orders that support cursors (relevance ranks are not a stable key)
+CURSOR_ORDERS = ("published_desc", "fetched_desc")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Cursor(NamedTuple):
+    """Sort key of the last article of a page: (published_at, fetched_at, id) under `order`."""
+
+    order: str
+    published_at: Optional[datetime]
+    fetched_at: datetime
+    id: int
+
+
+def encode_cursor(order: str, art) -> str:
+    """Cursor after `art` (an Article or a row with its published_at/fetched_at/id)."""
+    key = [order, art.published_at.isoformat() if art.published_at else None, art.fetched_at.isoformat(), art.id]
+    raw = json.dumps(key, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(token: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        order, published, fetched, aid = json.loads(raw)
+        if order not in CURSOR_ORDERS:
+            raise ValueError(order)
+        return Cursor(
+            order,
+            datetime.fromisoformat(published) if published else None,
+            datetime.fromisoformat(fetched),
+            int(aid),
+        )
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor(str(e)) from None
+
+
+def _before(columns: Tuple, values: Tuple):
+    """(c1, c2, ...) < (v1, v2, ...) spelled out as `c1 <= v1 AND (c1 < v1 OR (c1 = v1 AND ...))`.
+
+    MySQL/MariaDB do not turn a row-value comparison into an index range; this form gives
+    a range on the leading column and the rest is checked within it.
+    """
+    (col, *rest_cols), (value, *rest_values) = columns, values
+    if not rest_cols:
+        return col < value
+    return and_(col <= value, or_(col < value, and_(col == value, _before(tuple(rest_cols), tuple(rest_values)))))
+
+
+def keyset_page(qset: Query, order: str, cursor: Optional[Cursor], limit: int) -> Tuple[List, Optional[str]]:
+    """One page of `qset` after `cursor`, and the cursor of the next page (None on the last page).
+
+    Each page is an index range seek on (published_at, fetched_at, id) or (fetched_at, id)
+    instead of skipping `offset` rows, so it costs the same at any depth, and rows inserted
+    while a client scrolls never shift the pages it has not read yet.
+    """
+    if order == "fetched_desc":
+        page = qset
+        if cursor is not None:
+            page = page.filter(_before((Article.fetched_at, Article.id), (cursor.fetched_at, cursor.id)))
+        rows = page.order_by(Article.fetched_at.desc(), Article.id.desc()).limit(limit + 1).all()
+    else:
+        rows = []
+        if cursor is None or cursor.published_at is not None:
+            dated = qset.filter(Article.published_at.isnot(None))
+            if cursor is not None:
+                dated = dated.filter(
+                    _before(
+                        (Article.published_at, Article.fetched_at, Article.id),
+                        (cursor.published_at, cursor.fetched_at, cursor.id),
+                    )
+                )
+            rows = (
+                dated.order_by(Article.published_at.desc(), Article.fetched_at.desc(), Article.id.desc())
+                .limit(limit + 1)
+                .all()
+            )
+        if len(rows) <= limit:
+            # NULLS LAST as a second range: undated articles, newest fetched first
+            undated = qset.filter(Article.published_at.is_(None))
+            if cursor is not None and cursor.published_at is None:
+                undated = undated.filter(_before((Article.fetched_at, Article.id), (cursor.fetched_at, cursor.id)))
+            rows += undated.order_by(Article.fetched_at.desc(), Article.id.desc()).limit(limit + 1 - len(rows)).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (encode_cursor(order, rows[-1]) if more else None)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Iterable, Sequence
+
+from . import schemas
+from .models import Article
+
+try:  # optional: ~10x faster than json + Pydantic for article pages
+    import orjson
+except ImportError:  # pragma: no cover - fallback keeps the same output
+    orjson = None
+
+
+# Columns of schemas.ArticleOut, in order: listings select only these (never `content`)
+ARTICLE_FIELDS: tuple = tuple(schemas.ArticleOut.model_fields)
+ARTICLE_COLUMNS: tuple = tuple(getattr(Article, f) for f in ARTICLE_FIELDS)
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(body: bytes) -> Any:
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def article_rows_json(rows: Iterable[Sequence]) -> bytes:
+    """JSON array of ArticleOut objects from plain `ARTICLE_COLUMNS` rows (no ORM entities, no Pydantic).
+
+    Produces the same document as validating each row through schemas.ArticleOut.
+    """
+    return dumps([dict(zip(ARTICLE_FIELDS, row)) for row in rows])
+
+
+def article_row_json(row: Sequence) -> bytes:
+    return dumps(dict(zip(ARTICLE_FIELDS, row)))
@@ -1,55 +1,325 @@
 from __future__ import annotations
 
+import zlib
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, or_, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db import get_db
-from ..models import Article
-from .. import schemas
+from ..cache import CachedResponse, ResponseCache, cache_key, etag_matches, get_response_cache, make_entry
+from ..db import get_async_db
+from ..models import Article, ArticleBody
+from ..urls import url_hash
+from .. import pagination, render, schemas, search
+from ..render import ARTICLE_COLUMNS, article_row_json, article_rows_json
+from ..security import oauth2_scheme_optional, optional_user_id
+from ..states import article_states
 
 
 router = APIRouter(prefix="/articles", tags=["articles"])
 
 
-@router.get("/", response_model=List[schemas.ArticleOut])
-def list_articles(
-    db: Session = Depends(get_db),
+# Clients may store responses but must revalidate (cheap: ETag -> 304 from the cache)
+_REVALIDATE = {"Cache-Control": "no-cache"}
+
+
+async def _cached(
+    request: Request,
+    db: AsyncSession,
+    cache: ResponseCache,
+    build: Callable[[Session], Tuple[bytes, Dict[str, str]]],
+) -> Response:
+    """Serve a JSON response from the article response cache, building it on a miss."""
+    return _send(request, await _cached_entry(request, db, cache, build))
+
+
+async def _cached_entry(
+    request: Request,
+    db: AsyncSession,
+    cache: ResponseCache,
+    build: Callable[[Session], Tuple[bytes, Dict[str, str]]],
+    ignore: Tuple[str, ...] = (),
+) -> CachedResponse:
+    """Cache entry of this request, keyed by the route's declared query params (minus `ignore`).
+
+    Undeclared params (`?utm_source=...`, cache busters) never reach the key, so they
+    neither miss nor push other entries out of the LRU. `build` gets a sync Session
+    (AsyncSession.run_sync: same event loop, no thread) and runs once per key and
+    generation even under a burst of concurrent misses.
+    """
+    declared = {p.alias for p in request.scope["route"].dependant.query_params}
+    params = [(k, v) for k, v in request.query_params.multi_items() if k in declared and k not in ignore]
+    key = f"{await cache.generation(db)}:{cache_key(request.url.path, params)}"
+    entry = await cache.get(key)
+    if entry is None:
+        async with cache.key_lock(key):
+            entry = await cache.get(key)
+            if entry is None:
+                entry = make_entry(*await db.run_sync(build))
+                await cache.put(key, entry)
+    return entry
+
+
+def _send(request: Request, entry: CachedResponse, private: bool = False, vary_auth: bool = False) -> Response:
+    headers = {**entry.headers, **_REVALIDATE, "ETag": entry.etag}
+    if private or vary_auth:
+        # the body of this URL depends on who asks
+        headers["Vary"] = "Authorization"
+    if private:
+        # per-user body: shared caches must not store it
+        headers["Cache-Control"] = "private, no-cache"
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+@router.get("/", response_model=List[schemas.ArticleWithStateOut])
+async def list_articles(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    cache: ResponseCache = Depends(get_response_cache),
+    token: Optional[str] = Depends(oauth2_scheme_optional),
     q: Optional[str] = Query(None, description="검색어(제목/요약)"),
     site: Optional[str] = Query(None, description="언론사 필터(사이트명 substring)"),
     date_from: Optional[datetime] = Query(None, description="시작일(포함), ISO8601"),
     date_to: Optional[datetime] = Query(None, description="종료일(포함), ISO8601"),
     limit: int = Query(30, ge=1, le=200),
     offset: int = Query(0, ge=0),
-    order: str = Query("published_desc", description="published_desc|fetched_desc"),
+    order: Optional[str] = Query(
+        None, description="relevance|published_desc|fetched_desc (기본: 검색어가 있으면 relevance)"
+    ),
+    collapse: bool = Query(False, description="유사 기사(같은 클러스터)는 대표 기사 하나만 반환"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값(offset 대신 사용)"),
+    with_state: bool = Query(False, description="로그인한 경우 기사별 북마크/좋아요/싫어요 상태(state)를 함께 반환"),
 ):
-    qset = db.query(Article)
-    if q:
-        like = f"%{q}%"
-        qset = qset.filter(or_(Article.title.ilike(like), Article.summary.ilike(like)))
+    """Article listing. Date-ordered pages carry `X-Next-Cursor` when more rows follow;
+    passing it back as `cursor` continues after the last row (keyset seek, `offset` unused).
+    Served from the response cache until the crawler commits new articles; `with_state`
+    adds the caller's flags on top of the shared cached page."""
+
+    def build(s: Session):
+        items, headers = _query_articles(s, q, site, date_from, date_to, limit, offset, order, collapse, cursor)
+        return article_rows_json(items), headers
+
+    entry = await _cached_entry(request, db, cache, build, ignore=("with_state",))
+    if not with_state:
+        return _send(request, entry)
+    # public feed: a bad or expired token only drops the flags, it never fails the request
+    user_id = optional_user_id(token)
+    if user_id is None:
+        return _send(request, entry, vary_auth=True)
+    items = render.loads(entry.body)
+    states = await article_states(db, user_id, [item["id"] for item in items])
+    for item in items:
+        item["state"] = states[item["id"]]
+    return _send(request, make_entry(render.dumps(items), entry.headers), private=True)
+
+
+def _query_articles(db, q, site, date_from, date_to, limit, offset, order, collapse, cursor):
+    after = None
+    if cursor:
+        try:
+            after = pagination.decode_cursor(cursor)
+        except pagination.InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if order is None:
+            order = after.order
+        elif order != after.order:
+            raise HTTPException(status_code=400, detail="Cursor was issued for another order")
+
+    filters = []
+    if collapse:
+        # cluster_id is precomputed by the crawler; representatives have none
+        filters.append(Article.cluster_id.is_(None))
     if site:
-        qset = qset.filter(Article.site.ilike(f"%{site}%"))
+        filters.append(Article.site.ilike(f"%{site}%"))
     if date_from:
-        qset = qset.filter(Article.published_at >= date_from)
+        filters.append(Article.published_at >= date_from)
     if date_to:
-        qset = qset.filter(Article.published_at <= date_to)
+        filters.append(Article.published_at <= date_to)
+
+    # plain column rows: no ORM entities, and the heavy text columns are never read
+    qset = db.query(*ARTICLE_COLUMNS).filter(*filters)
+    q = q.strip() if q else None
+    if q and search.index_answers(q) and search.index_ready(db):
+        ids = search.search_ids(db, q, filters)
+        if order in (None, "relevance"):
+            if after is not None:
+                raise HTTPException(status_code=400, detail="Relevance order pages by offset only")
+            page = ids[offset : offset + limit]
+            rows = {a.id: a for a in db.query(*ARTICLE_COLUMNS).filter(Article.id.in_(page))} if page else {}
+            return [rows[i] for i in page if i in rows], {}
+        if not ids:
+            return [], {}
+        qset = qset.filter(Article.id.in_(ids))
+    elif q:
+        # index not built yet (`python -m crawler.run --reindex`), or a query it cannot
+        # answer (one Hangul character, punctuation only): substring scan
+        like = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        qset = qset.filter(or_(Article.title.ilike(like, escape="\\"), Article.summary.ilike(like, escape="\\")))
+
+    order = "fetched_desc" if order == "fetched_desc" else "published_desc"
+    if after is not None or offset == 0:
+        items, next_cursor = pagination.keyset_page(qset, order, after, limit)
+        return items, ({"X-Next-Cursor": next_cursor} if next_cursor else {})
 
     if order == "fetched_desc":
-        qset = qset.order_by(Article.fetched_at.desc())
+        qset = qset.order_by(Article.fetched_at.desc(), Article.id.desc())
     else:
-        qset = qset.order_by(Article.published_at.desc().nullslast(), Article.fetched_at.desc())
+        qset = qset.order_by(Article.published_at.desc().nullslast(), Article.fetched_at.desc(), Article.id.desc())
 
-    items = qset.offset(offset).limit(limit).all()
-    return items
+    return qset.offset(offset).limit(limit).all(), {}
 
 
-@router.get("/{article_id}", response_model=schemas.ArticleOut)
-def get_article(article_id: int, db: Session = Depends(get_db)):
-    art = db.query(Article).filter(Article.id == article_id).first()
-    if not art:
+@router.get("/lookup", response_model=schemas.ArticleOut)
+async def lookup_article(url: str = Query(..., description="기사 원문 URL"), db: AsyncSession = Depends(get_async_db)):
+    # Indexed on the fixed-width url_hash instead of the wide url column
+    row = (await db.execute(select(*ARTICLE_COLUMNS).where(Article.url_hash == url_hash(url)))).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Article not found")
-    return art
+    return Response(content=article_row_json(row), media_type="application/json")
+
+
+# Most ids one batch request may ask for
+BATCH_MAX = 200
+
+
+def _parse_ids(raw: str) -> List[int]:
+    try:
+        return [int(part) for part in raw.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+
+
+async def _article_batch(request: Request, db: AsyncSession, cache: ResponseCache, ids: List[int]) -> Response:
+    """Articles for `ids` in request order (unknown ids skipped, repeats collapsed).
+
+    Each article's JSON is looked up in the response cache under the same key
+    GET /articles/{id} uses; the misses are read with one IN query and cached.
+    """
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail="No ids given")
+    if len(ids) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX} ids per request")
+    generation = await cache.generation(db)
+    keys = {aid: f"{generation}:{cache_key(f'{router.prefix}/{aid}', ())}" for aid in ids}
+    bodies: Dict[int, bytes] = {}
+    for aid in ids:
+        entry = await cache.get(keys[aid])
+        if entry is not None:
+            bodies[aid] = entry.body
+    missing = [aid for aid in ids if aid not in bodies]
+    if missing:
+        rows = (await db.execute(select(*ARTICLE_COLUMNS).where(Article.id.in_(missing)))).all()
+        for row in rows:
+            entry = make_entry(article_row_json(row))
+            await cache.put(keys[row.id], entry)
+            bodies[row.id] = entry.body
+    # the cached bodies are JSON objects already: join them instead of re-encoding
+    return _send(request, make_entry(b"[" + b",".join(bodies[aid] for aid in ids if aid in bodies) + b"]"))
+
+
+@router.get("/batch", response_model=List[schemas.ArticleOut])
+async def get_articles_batch(
+    request: Request,
+    ids: str = Query(..., description="쉼표로 구분한 기사 id (최대 200개)"),
+    db: AsyncSession = Depends(get_async_db),
+    cache: ResponseCache = Depends(get_response_cache),
+):
+    return await _article_batch(request, db, cache, _parse_ids(ids))
+
+
+@router.post("/batch", response_model=List[schemas.ArticleOut])
+async def post_articles_batch(
+    payload: schemas.ArticleBatchIn,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    cache: ResponseCache = Depends(get_response_cache),
+):
+    """Same as GET /articles/batch, for id lists too long for a URL."""
+    return await _article_batch(request, db, cache, payload.ids)
+
+
+@router.get("/{article_id}", response_model=schemas.ArticleOut)
+async def get_article(
+    article_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    cache: ResponseCache = Depends(get_response_cache),
+):
+    def build(s: Session):
+        row = s.query(*ARTICLE_COLUMNS).filter(Article.id == article_id).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        return article_row_json(row), {}
+
+    return await _cached(request, db, cache, build)
+
+
+
+_CONTENT_TYPE = "text/plain; charset=utf-8"
+_CHUNK = 64 * 1024
+
+
+def _qvalue(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0  # malformed weight: ignore it rather than fail the request
+    return 1.0
+
+
+def _accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    # an explicit gzip entry wins over the `*` wildcard (`*;q=0, gzip` still allows gzip)
+    wildcard = None
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if coding in ("gzip", "x-gzip"):
+            return _qvalue(params) > 0
+        if coding == "*" and wildcard is None:
+            wildcard = _qvalue(params) > 0
+    return bool(wildcard)
+
+
+async def _gunzip(blob: bytes) -> AsyncIterator[bytes]:
+    # async generator: chunks are small enough to inflate on the event loop
+    d = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for i in range(0, len(blob), _CHUNK):
+        out = d.decompress(blob[i : i + _CHUNK])
+        if out:
+            yield out
+    tail = d.flush()
+    if tail:
+        yield tail
+
+
+@router.get("/{article_id}/content")
+async def get_article_content(article_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Full extracted text of an article, from the crawler's compressed side table.
 
+    Clients that accept gzip get the stored bytes as-is (`Content-Encoding: gzip`, no
+    recompression); others get it decompressed as a stream. Strong ETags differ per encoding
+    and `If-None-Match` answers 304.
+    """
+    body = await db.get(ArticleBody, article_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Content not found")
+    gzip_ok = _accepts_gzip(request.headers.get("accept-encoding"))
+    etag = f'"{body.digest}-gz"' if gzip_ok else f'"{body.digest}"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "public, max-age=300"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if gzip_ok:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=body.body, media_type=_CONTENT_TYPE, headers=headers)
+    headers["Content-Length"] = str(body.length)
+    return StreamingResponse(_gunzip(body.body), media_type=_CONTENT_TYPE, headers=headers)
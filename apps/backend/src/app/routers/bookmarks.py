@@ -1,12 +1,15 @@
 from __future__ import annotations
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db import get_db
-from ..security import get_current_user
+from ..db import get_async_db, get_db
+from ..security import get_current_user, get_current_user_async
 from ..models import Bookmark, Article, User
+from ..render import ARTICLE_COLUMNS, article_rows_json
 from .. import schemas
 
 
@@ -14,20 +17,21 @@ router = APIRouter(prefix="/bookmarks", tags=["bookmarks"])
 
 
 @router.get("/", response_model=List[schemas.ArticleOut])
-def list_bookmarks(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def list_bookmarks(current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
     # join to articles and return recent first
     q = (
-        db.query(Article)
+        select(*ARTICLE_COLUMNS)
         .join(Bookmark, Bookmark.article_id == Article.id)
-        .filter(Bookmark.user_id == current_user.id)
+        .where(Bookmark.user_id == current_user.id)
         .order_by(Bookmark.created_at.desc())
     )
-    return q.all()
+    return Response(content=article_rows_json((await db.execute(q)).all()), media_type="application/json")
 
 
 @router.get("/has/{article_id}")
-def has_bookmark(article_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    exists = db.query(Bookmark).filter(Bookmark.user_id == current_user.id, Bookmark.article_id == article_id).first() is not None
+async def has_bookmark(article_id: int, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    q = select(Bookmark.id).where(Bookmark.user_id == current_user.id, Bookmark.article_id == article_id)
+    exists = (await db.execute(q)).first() is not None
     return {"bookmarked": exists}
 
 
@@ -4,14 +4,12 @@ import json
 from datetime import datetime
 from typing import Any, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, HTTPException, Request, status
 from pydantic import BaseModel, Field
 from pydantic.config import ConfigDict
 from uuid import uuid4
-from sqlalchemy.orm import Session
 
 from ..config import settings
-from ..db import get_db
 
 
 class EventIn(BaseModel):
@@ -81,7 +79,7 @@ async def _produce(request: Request, payload: dict[str, Any]) -> bool:
 
 
 @router.post("/")
-async def ingest_events(batch: EventBatchIn, request: Request, db: Session = Depends(get_db)):
+async def ingest_events(batch: EventBatchIn, request: Request):
     if not batch.events:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="empty events")
     ua = request.headers.get("user-agent")
@@ -111,7 +109,7 @@ async def ingest_events(batch: EventBatchIn, request: Request, db: Session = Dep
 
 
 @router.post("/single")
-async def ingest_single(evt: EventIn, request: Request, db: Session = Depends(get_db)):
+async def ingest_single(evt: EventIn, request: Request):
     ua = request.headers.get("user-agent")
     data = evt.dict()
     data.setdefault("ts", datetime.utcnow())
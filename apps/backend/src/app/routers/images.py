@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse
+from sqlalchemy.orm import Session
+
+from ..cache import etag_matches
+from ..config import settings
+from ..db import get_db
+from ..images import FORMATS, DiskLRU, fetch_source, render, source_key, variant_key, width_bucket
+from ..models import Article
+
+
+router = APIRouter(prefix="/images", tags=["images"])
+
+_cache: Optional[DiskLRU] = None
+
+
+def get_image_cache() -> DiskLRU:
+    global _cache
+    if _cache is None:
+        _cache = DiskLRU(settings.image_cache_dir, settings.image_cache_max_mb * 1024 * 1024)
+    return _cache
+
+
+def _pick_format(fmt: Optional[str], accept: Optional[str]) -> str:
+    if fmt:
+        return fmt
+    return "webp" if "image/webp" in (accept or "") else "jpeg"
+
+
+def _source(cache: DiskLRU, image_url: str) -> bytes:
+    """Upstream image bytes, downloaded once per URL and kept in the cache for other widths."""
+    key = source_key(image_url)
+    data = cache.get(key)
+    if data is None:
+        with cache.key_lock(key):
+            data = cache.get(key)
+            if data is None:
+                data, status = fetch_source(
+                    image_url,
+                    timeout=settings.image_fetch_timeout,
+                    max_bytes=settings.image_max_source_mb * 1024 * 1024,
+                    user_agent=settings.image_user_agent,
+                )
+                if data is None:
+                    raise HTTPException(status_code=502, detail=f"Upstream image unavailable ({status})")
+                cache.put(key, data)
+    return data
+
+
+@router.get("/articles/{article_id}")
+def article_image(
+    article_id: int,
+    request: Request,
+    w: Optional[int] = Query(None, ge=1, le=4096, description="원하는 너비(px); 가까운 큰 버킷으로 올림"),
+    fmt: Optional[str] = Query(None, pattern="^(webp|jpeg)$", description="webp|jpeg (기본: Accept 헤더로 결정)"),
+    db: Session = Depends(get_db),
+    cache: DiskLRU = Depends(get_image_cache),
+):
+    """Article's main image resized to a width bucket, as WebP or JPEG.
+
+    The upstream image is downloaded once (cached as a source file) and each
+    (width, format) variant is rendered once; all live in the disk LRU cache. Only
+    `articles.image_url` values are fetched, and only from public http(s) hosts
+    (images.is_public_url, re-checked on every redirect).
+    """
+    image_url = db.query(Article.image_url).filter(Article.id == article_id).scalar()
+    if not image_url:
+        raise HTTPException(status_code=404, detail="Image not found")
+    width = width_bucket(w)
+    out_fmt = _pick_format(fmt, request.headers.get("accept"))
+    key = variant_key(image_url, width, out_fmt)
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": f"public, max-age={settings.image_cache_max_age}",
+    }
+    if fmt is None:
+        headers["Vary"] = "Accept"
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    data = cache.get(key)
+    if data is None:
+        source = _source(cache, image_url)
+        # locks are never nested: the source download and each render serialize separately
+        with cache.key_lock(key):
+            # another request may have rendered it while we waited
+            data = cache.get(key)
+            if data is None:
+                try:
+                    data = render(source, width, out_fmt)
+                except ImportError:
+                    # Pillow not installed: let the client load the original
+                    return RedirectResponse(image_url, status_code=307)
+                except Exception:
+                    raise HTTPException(status_code=502, detail="Upstream image could not be decoded")
+                cache.put(key, data)
+    return Response(content=data, media_type=FORMATS[out_fmt], headers=headers)
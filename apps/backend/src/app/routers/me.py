@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_async_db
+from ..models import User
+from ..security import get_current_user_async
+from ..states import article_states
+from .. import schemas
+
+
+router = APIRouter(prefix="/me", tags=["me"])
+
+# Most article ids one state request may ask for
+STATE_MAX = 200
+
+
+@router.post("/article-state", response_model=List[schemas.ArticleStateOut])
+async def get_article_state(
+    payload: schemas.ArticleStateIn,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Bookmark and reaction flags of the caller for many articles at once (request order)."""
+    ids = list(dict.fromkeys(payload.ids))
+    if len(ids) > STATE_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {STATE_MAX} ids per request")
+    states = await article_states(db, current_user.id, ids)
+    return [{"article_id": aid, **states[aid]} for aid in ids]
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ..db import get_db
-from ..security import get_current_user
+from ..db import get_async_db, get_db
+from ..security import get_current_user, get_current_user_async
 from ..models import Reaction, Article, User
 
 
@@ -20,9 +22,9 @@ def _get_reaction(db: Session, user_id: int, article_id: int) -> Reaction | None
 
 
 @router.get("/{article_id}")
-def get_reaction(article_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    rec = _get_reaction(db, current_user.id, article_id)
-    return {"reaction": (rec.kind if rec else None)}
+async def get_reaction(article_id: int, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    q = select(Reaction.kind).where(Reaction.user_id == current_user.id, Reaction.article_id == article_id)
+    return {"reaction": (await db.execute(q)).scalar()}
 
 
 def _toggle(db: Session, user_id: int, article_id: int, to_kind: str):
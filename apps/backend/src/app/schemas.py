@@ -45,6 +45,29 @@ class ArticleOut(BaseModel):
         from_attributes = True
 
 
+class ArticleBatchIn(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+
+# Per-user state of articles (POST /me/article-state, GET /articles/?with_state=true)
+class ArticleStateIn(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+
+class ArticleFlags(BaseModel):
+    bookmarked: bool = False
+    like: bool = False
+    dislike: bool = False
+
+
+class ArticleStateOut(ArticleFlags):
+    article_id: int
+
+
+class ArticleWithStateOut(ArticleOut):
+    state: ArticleFlags | None = None  # only with ?with_state=true and a bearer token
+
+
 # Profile
 class ProfileIn(BaseModel):
     age_group: str | None = None
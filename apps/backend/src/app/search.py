@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import Article, SearchDoc, SearchPosting, SearchStats, SearchTerm
+
+
+MAX_TERM = 32
+# BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+# Upper bound on documents scored per query: the newest postings of the rarest term.
+# Keeps latency flat as the corpus grows; very common queries rank within recent matches.
+MAX_CANDIDATES = 5000
+_CHUNK = 500
+
+_TOKEN_RUNS = re.compile(r"([가-힣ㄱ-ㆎ一-鿿]+)|([a-z0-9]+)")
+_HANGUL = re.compile(r"[가-힣ㄱ-ㆎ一-鿿]")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Same tokens the crawler indexes (crawler.search.tokenize): Hangul/Han bigrams, Latin/digit words."""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens: List[str] = []
+    for hangul, word in _TOKEN_RUNS.findall(text):
+        if hangul:
+            if len(hangul) == 1:
+                tokens.append(hangul)
+            else:
+                tokens.extend(hangul[i : i + 2] for i in range(len(hangul) - 1))
+        elif len(word) <= MAX_TERM:
+            tokens.append(word)
+    return tokens
+
+
+def index_answers(q: Optional[str]) -> bool:
+    """Whether the index finds every match of `q`. Not for queries without tokens
+    (punctuation only) or with a lone Hangul/Han character: documents index that only
+    as bigrams ("집" inside "집값"), so those need the substring scan."""
+    terms = tokenize(q)
+    return bool(terms) and not any(len(t) == 1 and _HANGUL.match(t) for t in terms)
+
+
+def index_ready(db: Session) -> bool:
+    stats = db.get(SearchStats, 1)
+    return bool(stats and stats.docs)
+
+
+def _idf(docs: int, df: int) -> float:
+    return math.log(1 + (docs - df + 0.5) / (df + 0.5))
+
+
+def search_ids(db: Session, q: str, filters: Sequence = ()) -> List[int]:
+    """Article ids matching every term of `q`, best BM25 score first.
+
+    The rarest term's posting list (newest first, capped at MAX_CANDIDATES, with `filters`
+    on Article applied) gives the candidates; the other terms only narrow them down by
+    primary-key lookups, so no long posting list is ever read in full.
+    """
+    terms = list(dict.fromkeys(tokenize(q)))
+    if not terms:
+        return []
+    rows = db.execute(select(SearchTerm.id, SearchTerm.df).where(SearchTerm.term.in_(terms))).all()
+    if len(rows) < len(terms):
+        return []  # some term occurs nowhere
+    rows.sort(key=lambda r: r.df)
+    first = rows[0]
+    cand = select(SearchPosting.article_id, SearchPosting.tf).where(SearchPosting.term_id == first.id)
+    if filters:
+        cand = cand.join(Article, Article.id == SearchPosting.article_id).where(*filters)
+    cand = cand.order_by(SearchPosting.article_id.desc()).limit(MAX_CANDIDATES)
+    tfs: Dict[int, Dict[int, int]] = {aid: {first.id: tf} for aid, tf in db.execute(cand)}
+    for term in rows[1:]:
+        if not tfs:
+            return []
+        ids = list(tfs)
+        found: Dict[int, int] = {}
+        for i in range(0, len(ids), _CHUNK):
+            found.update(
+                db.execute(
+                    select(SearchPosting.article_id, SearchPosting.tf).where(
+                        SearchPosting.term_id == term.id, SearchPosting.article_id.in_(ids[i : i + _CHUNK])
+                    )
+                ).all()
+            )
+        tfs = {aid: {**d, term.id: found[aid]} for aid, d in tfs.items() if aid in found}
+    if not tfs:
+        return []
+
+    ids = list(tfs)
+    lengths: Dict[int, int] = {}
+    for i in range(0, len(ids), _CHUNK):
+        lengths.update(
+            db.execute(select(SearchDoc.article_id, SearchDoc.length).where(SearchDoc.article_id.in_(ids[i : i + _CHUNK]))).all()
+        )
+    stats = db.get(SearchStats, 1)
+    docs = max(stats.docs if stats else 0, 1)
+    avgdl = (stats.total_length / docs) if stats and stats.total_length else 1.0
+    idf = {r.id: _idf(docs, r.df) for r in rows}
+
+    def score(aid: int) -> float:
+        norm = K1 * (1 - B + B * lengths.get(aid, avgdl) / avgdl)
+        return sum(idf[tid] * tf * (K1 + 1) / (tf + norm) for tid, tf in tfs[aid].items())
+
+    # ties: newer article first
+    return sorted(ids, key=lambda aid: (-score(aid), -aid))
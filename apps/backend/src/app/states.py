@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Dict, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Bookmark, Reaction
+
+
+def _empty() -> dict:
+    return {"bookmarked": False, "like": False, "dislike": False}
+
+
+async def article_states(db: AsyncSession, user_id: int, ids: Sequence[int]) -> Dict[int, dict]:
+    """`{article_id: {"bookmarked", "like", "dislike"}}` for every id, one query per table."""
+    states = {aid: _empty() for aid in ids}
+    if not states:
+        return states
+    bookmarked = select(Bookmark.article_id).where(Bookmark.user_id == user_id, Bookmark.article_id.in_(states))
+    for (aid,) in await db.execute(bookmarked):
+        states[aid]["bookmarked"] = True
+    reactions = select(Reaction.article_id, Reaction.kind).where(Reaction.user_id == user_id, Reaction.article_id.in_(states))
+    for aid, kind in await db.execute(reactions):
+        if kind in ("like", "dislike"):
+            states[aid][kind] = True
+    return states
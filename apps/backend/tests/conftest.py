@@ -2,23 +2,31 @@ import os
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import create_app
-from app.db import Base, get_db
+from app.cache import ResponseCache, get_response_cache
+from app.db import Base, async_url, get_async_db, get_db
 
 
 @pytest.fixture(scope="session")
 def test_db_url():
-    # Use in-memory SQLite for tests
-    return os.getenv("TEST_DATABASE_URL", "sqlite+pysqlite:///:memory:")
+    # SQLite by default (a fresh file per test, see `app`)
+    return os.getenv("TEST_DATABASE_URL", "sqlite+pysqlite://")
 
 
 @pytest.fixture()
-def app(test_db_url):
+def app(test_db_url, tmp_path):
     app = create_app()
 
-    engine = create_engine(test_db_url)
+    if test_db_url.startswith("sqlite"):
+        # A file, not :memory:, so the sync fixtures and the async (aiosqlite) endpoints share it
+        test_db_url = f"sqlite+pysqlite:///{tmp_path / 'test.db'}"
+        engine = create_engine(test_db_url, connect_args={"check_same_thread": False})
+    else:
+        engine = create_engine(test_db_url)
     TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
     # Create schema on the test database
@@ -32,6 +40,19 @@ def app(test_db_url):
             db.close()
 
     app.dependency_overrides[get_db] = override_get_db
+
+    # NullPool: TestClient may run each request on its own event loop
+    async_engine = create_async_engine(async_url(test_db_url), poolclass=NullPool)
+    AsyncTestingSession = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSession() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Own response cache per test database; generation re-read on every request
+    cache = ResponseCache(max_entries=256, ttl=60, generation_poll=0)
+    app.dependency_overrides[get_response_cache] = lambda: cache
     return app
 
 
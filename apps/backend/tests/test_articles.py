@@ -0,0 +1,273 @@
+from http import HTTPStatus
+
+from app.cache import get_response_cache
+from app.db import get_db
+from app.models import Article
+from app.urls import url_hash
+
+
+def _add_articles(app, *articles):
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        db.add_all(articles)
+        db.commit()
+        return [a.id for a in articles]
+    finally:
+        db.close()
+
+
+def test_url_hash_filled_on_insert(app):
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        art = Article(site="YTN", url="https://www.ytn.co.kr/_ln/0101_1", title="t")
+        db.add(art)
+        db.commit()
+        assert art.url_hash == url_hash("https://www.ytn.co.kr/_ln/0101_1")
+    finally:
+        db.close()
+
+
+def test_lookup_by_url_ignores_tracking_params(app, client):
+    _add_articles(app, Article(site="YTN", url="https://www.ytn.co.kr/_ln/0101_2", title="hello"))
+
+    r = client.get("/articles/lookup", params={"url": "https://WWW.ytn.co.kr/_ln/0101_2?utm_source=x#top"})
+    assert r.status_code == HTTPStatus.OK
+    assert r.json()["title"] == "hello"
+
+    r2 = client.get("/articles/lookup", params={"url": "https://www.ytn.co.kr/_ln/missing"})
+    assert r2.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_list_collapses_near_duplicate_clusters(app, client):
+    (first,) = _add_articles(app, Article(site="Donga Ilbo", url="https://www.donga.com/a/1", title="wire story"))
+    _add_articles(app, Article(site="Hankook Ilbo", url="https://www.hankookilbo.com/a/1", title="wire story", cluster_id=first))
+
+    r = client.get("/articles/")
+    assert r.status_code == HTTPStatus.OK
+    assert len(r.json()) == 2
+
+    r2 = client.get("/articles/", params={"collapse": "true"})
+    assert [a["id"] for a in r2.json()] == [first]
+
+
+def test_content_served_compressed_with_etag(app, client):
+    import gzip
+
+    from app.models import ArticleBody
+
+    (aid,) = _add_articles(app, Article(site="YTN", url="https://www.ytn.co.kr/_ln/0101_3", title="t"))
+    text = "본문 " * 500
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        raw = text.encode("utf-8")
+        db.add(ArticleBody(article_id=aid, body=gzip.compress(raw, mtime=0), length=len(raw), digest="d" * 32))
+        db.commit()
+    finally:
+        db.close()
+
+    r = client.get(f"/articles/{aid}/content", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == HTTPStatus.OK
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == text
+    assert int(r.headers["content-length"]) < len(text.encode("utf-8"))
+
+    r304 = client.get(f"/articles/{aid}/content", headers={"Accept-Encoding": "gzip", "If-None-Match": r.headers["etag"]})
+    assert r304.status_code == HTTPStatus.NOT_MODIFIED
+
+    plain = client.get(f"/articles/{aid}/content", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.text == text
+    assert plain.headers["etag"] != r.headers["etag"]
+
+    # explicit gzip beats a refused wildcard; a malformed weight is not a server error
+    for accept in ("*;q=0, gzip", "gzip;q=abc"):
+        r2 = client.get(f"/articles/{aid}/content", headers={"Accept-Encoding": accept})
+        assert r2.status_code == HTTPStatus.OK
+        assert r2.headers["content-encoding"] == "gzip"
+    refused = client.get(f"/articles/{aid}/content", headers={"Accept-Encoding": "gzip;q=0, *"})
+    assert "content-encoding" not in refused.headers
+
+    missing = client.get("/articles/999999/content")
+    assert missing.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_cursor_pages_are_stable_across_inserts(app, client):
+    from datetime import datetime, timedelta
+
+    base = datetime(2026, 3, 1)
+    _add_articles(
+        app,
+        *(
+            Article(site="YTN", url=f"https://www.ytn.co.kr/_ln/c{i}", title=f"t{i}", published_at=base + timedelta(hours=i))
+            for i in range(5)
+        ),
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/undated", title="undated"),
+    )
+
+    r = client.get("/articles/", params={"limit": 2})
+    assert [a["title"] for a in r.json()] == ["t4", "t3"]
+    cursor = r.headers["X-Next-Cursor"]
+
+    # a newer article arriving mid-scroll does not shift the next page
+    _add_articles(app, Article(site="YTN", url="https://www.ytn.co.kr/_ln/c9", title="t9", published_at=base + timedelta(days=1)))
+    r2 = client.get("/articles/", params={"limit": 2, "cursor": cursor})
+    assert [a["title"] for a in r2.json()] == ["t2", "t1"]
+
+    # undated articles come last, then the listing ends without a cursor
+    r3 = client.get("/articles/", params={"limit": 2, "cursor": r2.headers["X-Next-Cursor"]})
+    assert [a["title"] for a in r3.json()] == ["t0", "undated"]
+    assert "X-Next-Cursor" not in r3.headers
+
+    assert client.get("/articles/", params={"cursor": "garbage"}).status_code == HTTPStatus.BAD_REQUEST
+    assert client.get("/articles/", params={"cursor": cursor, "order": "fetched_desc"}).status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_cursor_pages_break_ties_on_the_later_key_columns(app, client):
+    from datetime import datetime
+
+    same, fetched = datetime(2026, 3, 1), datetime(2026, 3, 2)
+    _add_articles(
+        app,
+        *(
+            Article(site="YTN", url=f"https://www.ytn.co.kr/_ln/tie{i}", title=f"t{i}", published_at=same, fetched_at=fetched)
+            for i in range(3)
+        ),
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/tie-late", title="late", published_at=same, fetched_at=datetime(2026, 3, 3)),
+        *(Article(site="YTN", url=f"https://www.ytn.co.kr/_ln/u{i}", title=f"u{i}", fetched_at=fetched) for i in range(2)),
+    )
+    for order in ("published_desc", "fetched_desc"):
+        expected = [a["title"] for a in client.get("/articles/", params={"order": order}).json()]
+        seen, cursor = [], None
+        while True:
+            params = {"order": order, "limit": 1, **({"cursor": cursor} if cursor else {})}
+            r = client.get("/articles/", params=params)
+            seen += [a["title"] for a in r.json()]
+            cursor = r.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert seen == expected and len(seen) == 6
+    assert expected == ["late", "u1", "u0", "t2", "t1", "t0"]  # fetched_desc: ties fall back to id
+
+
+def test_listing_cached_until_generation_bump(app, client):
+    from app.models import CacheGeneration
+
+    _add_articles(app, Article(site="YTN", url="https://www.ytn.co.kr/_ln/g1", title="first"))
+    r = client.get("/articles/", params={"limit": 5})
+    etag = r.headers["ETag"]
+    assert [a["title"] for a in r.json()] == ["first"]
+
+    r2 = client.get("/articles/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert r2.status_code == HTTPStatus.NOT_MODIFIED
+
+    # rows committed without a generation bump are not visible yet; the crawler bumps it
+    _add_articles(app, Article(site="YTN", url="https://www.ytn.co.kr/_ln/g2", title="second"))
+    assert [a["title"] for a in client.get("/articles/", params={"limit": 5}).json()] == ["first"]
+    # unknown query params are not part of the key: no miss, no new LRU entry
+    cache = app.dependency_overrides[get_response_cache]()
+    cached = len(cache._entries)
+    busted = client.get("/articles/", params={"limit": 5, "x": "123", "utm_source": "feed"})
+    assert [a["title"] for a in busted.json()] == ["first"]
+    assert busted.headers["ETag"] == etag and len(cache._entries) == cached
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        db.add(CacheGeneration(name="articles", value=1))
+        db.commit()
+    finally:
+        db.close()
+    r3 = client.get("/articles/", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert r3.status_code == HTTPStatus.OK
+    assert len(r3.json()) == 2 and r3.headers["ETag"] != etag
+
+
+def test_listing_json_matches_article_schema(app, client):
+    from datetime import datetime
+
+    from app import schemas
+
+    art = Article(
+        site="연합뉴스",
+        url="https://www.yna.co.kr/view/1",
+        title='따옴표 "제목"',
+        summary="요약",
+        category="정치",
+        published_at=datetime(2026, 3, 1, 12, 30, 5, 123456),
+        fetched_at=datetime(2026, 3, 1, 12, 31),
+        content="본문 " * 100,
+    )
+    (aid,) = _add_articles(app, art)
+    expected = schemas.ArticleOut.model_validate(art).model_dump(mode="json")
+
+    assert client.get("/articles/").json() == [expected]
+    assert client.get(f"/articles/{aid}").json() == expected
+
+
+def test_bookmark_and_reaction_reads(app, client):
+    (aid,) = _add_articles(app, Article(site="YTN", url="https://www.ytn.co.kr/_ln/b1", title="saved"))
+    creds = {"email": "reader@example.com", "password": "supersecret"}
+    client.post("/auth/register", json=creds)
+    auth = {"Authorization": f"Bearer {client.post('/auth/login', json=creds).json()['access_token']}"}
+
+    assert client.get(f"/bookmarks/has/{aid}", headers=auth).json() == {"bookmarked": False}
+    client.post(f"/bookmarks/{aid}", headers=auth)
+    client.post(f"/reactions/like/{aid}", headers=auth)
+
+    assert client.get(f"/bookmarks/has/{aid}", headers=auth).json() == {"bookmarked": True}
+    assert [a["title"] for a in client.get("/bookmarks/", headers=auth).json()] == ["saved"]
+    assert client.get(f"/reactions/{aid}", headers=auth).json() == {"reaction": "like"}
+    assert client.get("/bookmarks/").status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_batch_returns_articles_in_request_order(app, client):
+    a, b, c = _add_articles(
+        app,
+        *(Article(site="YTN", url=f"https://www.ytn.co.kr/_ln/batch{i}", title=f"b{i}") for i in range(3)),
+    )
+    # warm one id through the single-article route; the batch reuses that cache entry
+    assert client.get(f"/articles/{b}").status_code == HTTPStatus.OK
+
+    r = client.get("/articles/batch", params={"ids": f"{c},{a},999999,{b},{c}"})
+    assert r.status_code == HTTPStatus.OK
+    assert [x["id"] for x in r.json()] == [c, a, b]
+    assert client.get("/articles/batch", params={"ids": f"{c},{a},999999,{b},{c}"}, headers={"If-None-Match": r.headers["ETag"]}).status_code == HTTPStatus.NOT_MODIFIED
+
+    r2 = client.post("/articles/batch", json={"ids": [b, a]})
+    assert [x["title"] for x in r2.json()] == ["b1", "b0"]
+
+    assert client.get("/articles/batch", params={"ids": "1,x"}).status_code == HTTPStatus.BAD_REQUEST
+    assert client.post("/articles/batch", json={"ids": list(range(1, 300))}).status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_article_state_in_bulk_and_inline(app, client):
+    a, b, c = _add_articles(
+        app,
+        *(Article(site="YTN", url=f"https://www.ytn.co.kr/_ln/st{i}", title=f"s{i}") for i in range(3)),
+    )
+    creds = {"email": "states@example.com", "password": "supersecret"}
+    client.post("/auth/register", json=creds)
+    auth = {"Authorization": f"Bearer {client.post('/auth/login', json=creds).json()['access_token']}"}
+    client.post(f"/bookmarks/{a}", headers=auth)
+    client.post(f"/reactions/like/{a}", headers=auth)
+    client.post(f"/reactions/dislike/{c}", headers=auth)
+
+    r = client.post("/me/article-state", json={"ids": [c, b, a]}, headers=auth)
+    assert r.status_code == HTTPStatus.OK
+    assert r.json() == [
+        {"article_id": c, "bookmarked": False, "like": False, "dislike": True},
+        {"article_id": b, "bookmarked": False, "like": False, "dislike": False},
+        {"article_id": a, "bookmarked": True, "like": True, "dislike": False},
+    ]
+    assert client.post("/me/article-state", json={"ids": [a]}).status_code == HTTPStatus.UNAUTHORIZED
+
+    # inline flags ride on the shared cached page; anonymous callers get the plain page
+    plain = client.get("/articles/", params={"with_state": "true"})
+    assert all("state" not in item for item in plain.json())
+    assert plain.headers["Vary"] == "Authorization"
+    # a bad or expired token never breaks the public feed
+    bad = {"Authorization": "Bearer garbage"}
+    assert client.get("/articles/", headers=bad).status_code == HTTPStatus.OK
+    r_bad = client.get("/articles/", params={"with_state": "true"}, headers=bad)
+    assert r_bad.status_code == HTTPStatus.OK and all("state" not in item for item in r_bad.json())
+    r2 = client.get("/articles/", params={"with_state": "true"}, headers=auth)
+    assert {item["id"]: item["state"]["bookmarked"] for item in r2.json()} == {a: True, b: False, c: False}
+    assert r2.headers["Cache-Control"].startswith("private")
@@ -0,0 +1,144 @@
+import io
+from http import HTTPStatus
+
+import pytest
+
+from app.db import get_db
+from app.images import DiskLRU, width_bucket
+from app.models import Article
+from app.routers import images
+
+PIL = pytest.importorskip("PIL.Image")
+
+
+def _png(width, height):
+    buf = io.BytesIO()
+    PIL.new("RGB", (width, height), (200, 30, 30)).save(buf, "PNG")
+    return buf.getvalue()
+
+
+@pytest.fixture()
+def upstream(app, tmp_path, monkeypatch):
+    calls = []
+
+    def fake_fetch(url, **kwargs):
+        calls.append(url)
+        return _png(1600, 900), 200
+
+    monkeypatch.setattr(images, "fetch_source", fake_fetch)
+    app.dependency_overrides[images.get_image_cache] = lambda: DiskLRU(tmp_path, 10 * 1024 * 1024)
+    return calls
+
+
+def _article(app, image_url):
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        art = Article(site="YTN", url=f"https://www.ytn.co.kr/_ln/{image_url or 'none'}", title="t", image_url=image_url)
+        db.add(art)
+        db.commit()
+        return art.id
+    finally:
+        db.close()
+
+
+def test_width_bucket_rounds_up_and_caps():
+    assert width_bucket(100) == 160
+    assert width_bucket(321) == 480
+    assert width_bucket(5000) == 1280
+
+
+def test_resized_variants_are_rendered_once_from_one_download(app, client, upstream):
+    aid = _article(app, "https://img.example.com/a.jpg")
+
+    r = client.get(f"/images/articles/{aid}", params={"w": 300}, headers={"Accept": "image/webp,*/*"})
+    assert r.status_code == HTTPStatus.OK
+    assert r.headers["content-type"] == "image/webp"
+    assert "max-age" in r.headers["cache-control"]
+    assert PIL.open(io.BytesIO(r.content)).size == (320, 180)
+
+    again = client.get(f"/images/articles/{aid}", params={"w": 300}, headers={"Accept": "image/webp"})
+    assert again.content == r.content
+    jpeg = client.get(f"/images/articles/{aid}", params={"w": 640, "fmt": "jpeg"})
+    assert jpeg.headers["content-type"] == "image/jpeg"
+    assert PIL.open(io.BytesIO(jpeg.content)).size == (640, 360)
+    assert upstream == ["https://img.example.com/a.jpg"]
+
+    r304 = client.get(
+        f"/images/articles/{aid}", params={"w": 300}, headers={"Accept": "image/webp", "If-None-Match": r.headers["etag"]}
+    )
+    assert r304.status_code == HTTPStatus.NOT_MODIFIED
+    # weak validators and lists match too
+    for inm in (f"W/{r.headers['etag']}", f'"other", {r.headers["etag"]}'):
+        again = client.get(f"/images/articles/{aid}", params={"w": 300}, headers={"Accept": "image/webp", "If-None-Match": inm})
+        assert again.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_missing_image_is_404(app, client, upstream):
+    aid = _article(app, None)
+    assert client.get(f"/images/articles/{aid}").status_code == HTTPStatus.NOT_FOUND
+
+
+def test_disk_lru_evicts_least_recently_used(tmp_path):
+    cache = DiskLRU(tmp_path, max_bytes=250)
+    cache.put("a", b"x" * 100)
+    cache.put("b", b"x" * 100)
+    assert cache.get("a") is not None  # a is now more recent than b
+    cache.put("c", b"x" * 100)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.size == 200
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a", "c"]
+
+
+@pytest.fixture()
+def dns(monkeypatch):
+    from app import images as core
+
+    names = {"img.example.com": ["93.184.216.34"], "intranet.example.com": ["10.0.0.5", "93.184.216.34"]}
+    monkeypatch.setattr(core, "_resolve", lambda host, port: names.get(host, [host]))
+    return core
+
+
+def _fetch(core, url, handler):
+    import httpx
+
+    return core.fetch_source(url, timeout=1, max_bytes=1024, user_agent="t", transport=httpx.MockTransport(handler))
+
+
+def test_source_fetch_refuses_non_public_targets(dns):
+    import httpx
+
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(200, content=b"img")
+
+    for url in (
+        "http://127.0.0.1/a.png",
+        "http://169.254.169.254/latest/meta-data/",
+        "http://[::ffff:127.0.0.1]/a.png",
+        "http://intranet.example.com/a.png",  # any private address in the answer is enough
+        "file:///etc/passwd",
+        "ftp://img.example.com/a.png",
+    ):
+        assert _fetch(dns, url, handler) == (None, 403), url
+    assert requested == []
+    assert _fetch(dns, "https://img.example.com/a.png", handler) == (b"img", 200)
+
+
+def test_source_fetch_rechecks_every_redirect(dns):
+    import httpx
+
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        if request.url.path == "/a.png":
+            return httpx.Response(302, headers={"Location": "/b.png"})
+        if request.url.path == "/b.png":
+            return httpx.Response(302, headers={"Location": "http://169.254.169.254/latest/meta-data/"})
+        return httpx.Response(200, content=b"img")
+
+    assert _fetch(dns, "https://img.example.com/a.png", handler) == (None, 403)
+    assert requested == ["https://img.example.com/a.png", "https://img.example.com/b.png"]
@@ -0,0 +1,84 @@
+from collections import Counter
+from http import HTTPStatus
+
+from app.db import get_db
+from app.models import Article, SearchDoc, SearchPosting, SearchStats, SearchTerm
+from app.search import tokenize
+
+
+def _index(app, *articles):
+    """Store articles and index them the way the crawler does (title tokens count twice)."""
+    db = next(app.dependency_overrides[get_db]())
+    try:
+        db.add_all(articles)
+        db.flush()
+        stats = db.get(SearchStats, 1) or SearchStats(id=1, docs=0, total_length=0)
+        db.add(stats)
+        for art in articles:
+            tf = Counter({t: 2 * n for t, n in Counter(tokenize(art.title)).items()})
+            tf.update(tokenize(art.summary))
+            for term, n in tf.items():
+                row = db.query(SearchTerm).filter(SearchTerm.term == term).first()
+                if row is None:
+                    row = SearchTerm(term=term, df=0)
+                    db.add(row)
+                    db.flush()
+                row.df += 1
+                db.add(SearchPosting(term_id=row.id, article_id=art.id, tf=n))
+            db.add(SearchDoc(article_id=art.id, length=sum(tf.values())))
+            stats.docs += 1
+            stats.total_length += sum(tf.values())
+        db.commit()
+        return [a.id for a in articles]
+    finally:
+        db.close()
+
+
+def test_tokenize_bigrams_korean_and_keeps_words():
+    assert tokenize("부동산을 AI") == ["부동", "동산", "산을", "ai"]
+    assert tokenize("집 GDP 2.5%") == ["집", "gdp", "2", "5"]
+
+
+def test_search_ranks_title_matches_and_requires_all_terms(app, client):
+    in_summary, in_title, partial = _index(
+        app,
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/s1", title="오늘의 날씨", summary="서울 부동산 시장 동향"),
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/s2", title="부동산 시장 급등", summary="전문가 분석"),
+        Article(site="Donga Ilbo", url="https://www.donga.com/s3", title="시장 소식", summary="전통시장 방문"),
+    )
+
+    r = client.get("/articles/", params={"q": "부동산 시장"})
+    assert r.status_code == HTTPStatus.OK
+    assert [a["id"] for a in r.json()] == [in_title, in_summary]
+
+    # filters apply to the candidates; an unknown term matches nothing
+    r2 = client.get("/articles/", params={"q": "시장", "site": "donga"})
+    assert [a["id"] for a in r2.json()] == [partial]
+    assert client.get("/articles/", params={"q": "부동산 없는말"}).json() == []
+
+
+def test_search_with_date_order_returns_matches_newest_first(app, client):
+    from datetime import datetime
+
+    older, newer = _index(
+        app,
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/s4", title="금리 인상 금리", published_at=datetime(2026, 1, 1)),
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/s5", title="금리 동결", published_at=datetime(2026, 2, 1)),
+    )
+    r = client.get("/articles/", params={"q": "금리", "order": "published_desc"})
+    assert [a["id"] for a in r.json()] == [newer, older]
+
+
+def test_single_hangul_character_and_punctuation_fall_back_to_substring_scan(app, client):
+    compound, other = _index(
+        app,
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/s6", title="서울 집값 상승세", summary="100% 전세"),
+        Article(site="YTN", url="https://www.ytn.co.kr/_ln/s7", title="금리 동결", summary="시장 관망"),
+    )
+    # "집" is only indexed inside the bigram "집값"
+    assert [a["id"] for a in client.get("/articles/", params={"q": "집"}).json()] == [compound]
+    # no tokens at all: matched literally, not as LIKE wildcards, and never a silent []
+    assert [a["id"] for a in client.get("/articles/", params={"q": "%"}).json()] == [compound]
+    assert client.get("/articles/", params={"q": "!?"}).json() == []
+    # whitespace only is no query
+    assert len(client.get("/articles/", params={"q": "  "}).json()) == 2
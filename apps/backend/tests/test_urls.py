@@ -0,0 +1,15 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from app.urls import normalize_url, url_hash
+
+# Owned by the crawler, which computes url_hash on insert: the backend must hash the same way
+VECTORS = json.loads((Path(__file__).resolve().parents[2] / "crawler" / "tests" / "url_vectors.json").read_text("utf-8"))
+
+
+@pytest.mark.parametrize("case", VECTORS, ids=lambda c: c["url"].strip())
+def test_url_vectors(case):
+    assert normalize_url(case["url"]) == case["normalized"]
+    assert url_hash(case["url"]) == case["url_hash"]
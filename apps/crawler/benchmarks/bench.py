@@ -0,0 +1,232 @@
+"""Crawler benchmarks over the frozen per-site corpus in benchmarks/fixtures.
+
+Measures feed parsing (fetch_rss_entries), clean_html, maybe_extract_main_image,
+extract_from_html per site, and an end-to-end fetch_site run against a local stub
+HTTP server and a throwaway SQLite database. Results are written as JSON; pass
+--compare to fail (exit 1) when a benchmark's best latency regresses past --threshold.
+
+    PYTHONPATH=apps/crawler/src python apps/crawler/benchmarks/bench.py --out /tmp/bench.json
+    PYTHONPATH=apps/crawler/src python apps/crawler/benchmarks/bench.py --compare apps/crawler/benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+HERE = Path(__file__).resolve().parent
+FIXTURES = HERE / "fixtures"
+
+# Configure the crawler before importing it: local SQLite, no politeness delays, no archive
+_DB_FILE = Path(tempfile.mkdtemp(prefix="crawler-bench-")) / "bench.db"
+os.environ["CRAWLER_DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ["CRAWLER_REQUEST_DELAY"] = "0"
+os.environ["CRAWLER_REQUEST_JITTER"] = "0"
+os.environ["CRAWLER_HOST_RATE"] = "100000"
+os.environ.pop("CRAWLER_ARCHIVE_DIR", None)
+sys.path.insert(0, str(HERE.parent / "src"))
+
+from crawler import fetchers  # noqa: E402
+from crawler.db import session_scope  # noqa: E402
+from crawler.extract import parse_fragment  # noqa: E402
+from crawler.models import (  # noqa: E402
+    Article,
+    ArticleBody,
+    ArticleCheck,
+    CrawlLog,
+    FeedState,
+    SearchDoc,
+    SearchPosting,
+    SearchStats,
+    SearchTerm,
+)
+from crawler.rules import RULES, extract_from_html  # noqa: E402
+from crawler.sites import SITES, SiteConfig  # noqa: E402
+
+
+def _summarize(latencies: List[float]) -> Dict[str, float]:
+    lat = sorted(latencies)
+    total = sum(lat)
+    return {
+        "n": len(lat),
+        "best_ms": round(lat[0] * 1000, 4),
+        "mean_ms": round(statistics.fmean(lat) * 1000, 4),
+        "p50_ms": round(lat[len(lat) // 2] * 1000, 4),
+        "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 4),
+        "max_ms": round(lat[-1] * 1000, 4),
+        "per_s": round(len(lat) / total, 1) if total else 0.0,
+    }
+
+
+def measure(fn: Callable, items: Iterable, *, rounds: int, before_round: Callable | None = None) -> Dict[str, float]:
+    items = list(items)
+    for it in items[:1]:  # warm imports, compiled rules and connection pools
+        fn(it)
+    latencies: List[float] = []
+    for _ in range(rounds):
+        if before_round:
+            before_round()
+        for it in items:
+            t = time.perf_counter()
+            fn(it)
+            latencies.append(time.perf_counter() - t)
+    return _summarize(latencies)
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """Serves fixtures/<site>/rss.xml (links rewritten to this server) and article.html.
+
+    Each article path gets its own page (the path is stamped into the headline), so
+    title + same-day dedup keeps every feed entry just like it would on the real site.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        key, _, rest = self.path.lstrip("/").partition("/")
+        site = FIXTURES / key
+        if not site.is_dir():
+            self.send_error(404)
+            return
+        if rest == "rss.xml":
+            base = f"http://{self.headers['Host']}/{key}"
+            body = (site / "rss.xml").read_text("utf-8").replace(SITES[key].homepage, base).encode("utf-8")
+            ctype = "application/rss+xml; charset=utf-8"
+        else:
+            body = _article_page(key, rest).encode("utf-8")
+            ctype = "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@lru_cache(maxsize=None)
+def _article_template(key: str) -> Tuple[str, str]:
+    html = (FIXTURES / key / "article.html").read_text("utf-8")
+    title = re.search(r'<meta property="og:title" content="([^"]*)"', html).group(1)
+    return html, title
+
+
+def _article_page(key: str, path: str) -> str:
+    # the headline appears in <title>, og:title and the page's <h1>/<h2>
+    html, title = _article_template(key)
+    return html.replace(title, f"{title} ({path.rsplit('/', 1)[-1]})")
+
+
+def _start_stub() -> str:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _reset_db() -> None:
+    with session_scope() as s:
+        for model in (SearchPosting, SearchDoc, SearchTerm, SearchStats, ArticleCheck, ArticleBody, Article, CrawlLog, FeedState):
+            s.query(model).delete()
+
+
+def run(rounds: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    base = _start_stub()
+    sites = sorted(k for k in SITES if (FIXTURES / k).is_dir())
+    feeds = {k: f"{base}/{k}/rss.xml" for k in sites}
+    pages = {k: (FIXTURES / k / "article.html").read_text("utf-8") for k in sites}
+
+    entries: List[dict] = []
+    for key in sites:
+        results[f"fetch_rss_entries.{key}"] = measure(lambda url: fetchers.fetch_rss_entries([url]), [feeds[key]], rounds=rounds)
+        entries.extend(fetchers.fetch_rss_entries([feeds[key]]))
+
+    snippets = [e.get("title") for e in entries] + [e.get("summary") for e in entries]
+    results["clean_html"] = measure(fetchers.clean_html, snippets, rounds=rounds, before_round=parse_fragment.cache_clear)
+    results["maybe_extract_main_image"] = measure(
+        fetchers.maybe_extract_main_image, entries, rounds=rounds, before_round=parse_fragment.cache_clear
+    )
+
+    for key in sites:
+        rule = RULES[key]
+        results[f"extract_from_html.{key}"] = measure(lambda html: extract_from_html(html, rule), [pages[key]], rounds=rounds * 10)
+
+    fetchers.ensure_tables()
+    latencies: List[float] = []
+    docs = 0
+    for _ in range(rounds):
+        for key in sites:
+            _reset_db()
+            cfg = SiteConfig(name=SITES[key].name, rss=[feeds[key]], homepage=base)
+            t = time.perf_counter()
+            docs += fetchers.fetch_site(cfg, limit=100, site_key=key)
+            latencies.append(time.perf_counter() - t)
+    results["fetch_site.e2e"] = _summarize(latencies)
+    results["fetch_site.e2e"]["articles_per_s"] = round(docs / sum(latencies), 1)
+    return results
+
+
+def compare(current: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    regressions = []
+    for name, cur in sorted(current.items()):
+        old = baseline.get(name)
+        if not old or not old.get("best_ms"):
+            continue
+        # best-of-N like timeit: noisy neighbours only ever make samples slower
+        ratio = cur["best_ms"] / old["best_ms"]
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{name:40s} {old['best_ms']:10.4f} -> {cur['best_ms']:10.4f} ms  x{ratio:5.2f} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Crawler parsing/extraction benchmarks")
+    p.add_argument("--rounds", type=int, default=5, help="Repetitions per benchmark")
+    p.add_argument("--out", default=None, help="Write results JSON here (default: stdout)")
+    p.add_argument("--compare", default=None, help="Baseline JSON to compare against")
+    p.add_argument("--threshold", type=float, default=0.5, help="Allowed best-latency increase (0.5 = +50%%)")
+    args = p.parse_args(argv)
+
+    # fetch_site prints one line per site; keep the report readable
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            results = run(max(1, args.rounds))
+        finally:
+            sys.stdout = stdout
+    doc = {
+        "version": 1,
+        "env": {"python": platform.python_version(), "platform": platform.platform(), "rounds": args.rounds},
+        "results": results,
+    }
+    text = json.dumps(doc, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.out:
+        Path(args.out).write_text(text + "\n", "utf-8")
+    elif not args.compare:
+        print(text)
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text("utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
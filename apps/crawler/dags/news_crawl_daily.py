@@ -25,7 +25,9 @@ with DAG(
     dag_id="news_crawl_daily",
     description="Fetch ~100 articles per KR publisher and store in DB",
     default_args=default_args,
-    schedule_interval="0 3 * * *",  # daily 03:00 KST-ish (adjust TZ separately)
+    # daily 03:00 KST-ish (adjust TZ separately); with the continuous scheduler daemon
+    # (`python -m crawler.run --daemon`, CRAWLER_SCHEDULER=daemon) this DAG is manual-only
+    schedule_interval=None if os.getenv("CRAWLER_SCHEDULER") == "daemon" else "0 3 * * *",
     start_date=datetime(2025, 1, 1),
     catchup=False,
 ) as dag:
@@ -34,9 +36,15 @@ with DAG(
     def crawl_site(site_key: str):
         limit = int(os.getenv("CRAWLER_DAILY_LIMIT", "100"))
         # Import at runtime to avoid DAG parse-time import errors
-        from crawler.run import fetch_site_once  # type: ignore
-
-        fetch_site_once(site_key, limit=limit)
+        from crawler.metrics import CrawlMetrics, metrics_document  # type: ignore
+        from crawler.run import emit_metrics, fetch_site_once  # type: ignore
+
+        metrics = CrawlMetrics()
+        saved = fetch_site_once(site_key, limit=limit, metrics=metrics)
+        doc = metrics_document({site_key: metrics}, {site_key: saved})
+        # one JSON line in the task log; the returned document is pushed to XCom
+        emit_metrics(doc, "-")
+        return doc
 
     # Create one task per site
     for key in [k.strip() for k in SITE_KEYS if k.strip()]:
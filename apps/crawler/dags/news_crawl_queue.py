@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.decorators import task
+
+
+default_args = {
+    "owner": "news",
+    "depends_on_past": False,
+    "retries": 1,
+    "retry_delay": timedelta(minutes=5),
+}
+
+
+SITE_KEYS = [
+    k.strip()
+    for k in os.getenv(
+        "CRAWLER_SITE_KEYS",
+        "khan,mk,donga,hankook,asiatoday,jtbc,mbc,ytn,koreatimes,koreaherald",
+    ).split(",")
+    if k.strip()
+]
+WORKERS = int(os.getenv("CRAWLER_QUEUE_WORKERS", "4"))
+
+
+with DAG(
+    dag_id="news_crawl_queue",
+    description="Queue feed tasks in crawl_tasks and drain them with parallel lease-based workers",
+    default_args=default_args,
+    schedule_interval=os.getenv("CRAWLER_QUEUE_SCHEDULE") or None,  # manual unless configured
+    start_date=datetime(2025, 1, 1),
+    catchup=False,
+) as dag:
+
+    @task
+    def enqueue():
+        # Import at runtime to avoid DAG parse-time import errors
+        from crawler.workqueue import enqueue_feeds  # type: ignore
+
+        return enqueue_feeds(SITE_KEYS)
+
+    @task
+    def drain(worker: int):
+        from crawler.workqueue import QueueWorker  # type: ignore
+
+        limit = int(os.getenv("CRAWLER_DAILY_LIMIT", "100"))
+        # workers share the queue; a task retried after a crash resumes from expired leases
+        return QueueWorker(limit=limit).run()
+
+    queued = enqueue()
+    for i in range(WORKERS):
+        queued >> drain.override(task_id=f"worker_{i}")(i)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+from airflow import DAG
+from airflow.decorators import task
+
+
+default_args = {
+    "owner": "news",
+    "depends_on_past": False,
+    "retries": 0,
+    "retry_delay": timedelta(minutes=5),
+}
+
+
+with DAG(
+    dag_id="news_recheck",
+    description="Re-check recently stored articles and update corrected ones",
+    default_args=default_args,
+    # the scheduler daemon runs its own re-check passes (CRAWLER_RECHECK_EVERY)
+    schedule_interval=None if os.getenv("CRAWLER_SCHEDULER") == "daemon" else "*/15 * * * *",
+    start_date=datetime(2025, 1, 1),
+    catchup=False,
+    max_active_runs=1,
+) as dag:
+
+    @task
+    def recheck_articles():
+        # Import at runtime to avoid DAG parse-time import errors
+        from crawler.metrics import CrawlMetrics, metrics_document  # type: ignore
+        from crawler.refresh import recheck  # type: ignore
+        from crawler.run import emit_metrics  # type: ignore
+
+        metrics = CrawlMetrics()
+        revised = recheck(metrics=metrics)
+        doc = metrics_document({"recheck": metrics}, {"recheck": revised})
+        emit_metrics(doc, "-")
+        return doc
+
+    recheck_articles()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+import zlib
+from pathlib import Path
+from typing import Optional
+
+try:  # optional: zstd is much faster/smaller; zlib keeps the archive usable without it
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover
+    zstandard = None  # type: ignore
+
+
+# Root of the raw HTML archive; unset/empty disables archiving
+ARCHIVE_DIR = os.getenv("CRAWLER_ARCHIVE_DIR", "")
+ARCHIVE_LEVEL = int(os.getenv("CRAWLER_ARCHIVE_LEVEL", "9"))
+
+_ZSTD = ".html.zst"
+_ZLIB = ".html.z"
+
+
+def _key(url_hash: int) -> str:
+    # unsigned hex so file names sort and shard evenly
+    return f"{url_hash & 0xFFFFFFFFFFFFFFFF:016x}"
+
+
+class HtmlArchive:
+    """On-disk archive of fetched article HTML, one compressed file per URL hash.
+
+    Layout: <root>/<aa>/<bb>/<hash16>.html.zst (zlib `.html.z` when zstandard is missing).
+    Writes are atomic (temp file + rename) and skipped when the stored bytes are identical.
+    """
+
+    def __init__(self, root: str | os.PathLike, level: int = ARCHIVE_LEVEL):
+        self.root = Path(root)
+        self.level = level
+
+    def _path(self, url_hash: int, suffix: str) -> Path:
+        key = _key(url_hash)
+        return self.root / key[:2] / key[2:4] / (key + suffix)
+
+    def _compress(self, data: bytes) -> tuple[bytes, str]:
+        if zstandard is not None:
+            return zstandard.ZstdCompressor(level=self.level).compress(data), _ZSTD
+        return zlib.compress(data, min(self.level, 9)), _ZLIB
+
+    def put(self, url_hash: int, html: str) -> Path:
+        blob, suffix = self._compress(html.encode("utf-8"))
+        path = self._path(url_hash, suffix)
+        if path.exists() and path.read_bytes() == blob:
+            return path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+        return path
+
+    def get(self, url_hash: int) -> Optional[str]:
+        path = self._path(url_hash, _ZSTD)
+        if path.exists():
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read .zst archive entries")
+            return zstandard.ZstdDecompressor().decompress(path.read_bytes()).decode("utf-8")
+        path = self._path(url_hash, _ZLIB)
+        if path.exists():
+            return zlib.decompress(path.read_bytes()).decode("utf-8")
+        return None
+
+
+def get_archive() -> Optional[HtmlArchive]:
+    return HtmlArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from .dedup import CHUNK
+from .models import ArticleBody
+
+
+BODY_LEVEL = int(os.getenv("CRAWLER_BODY_LEVEL", "9"))
+
+
+def pack_body(text: str, level: int = BODY_LEVEL) -> dict:
+    """ArticleBody columns for `text`: gzip bytes (fixed mtime, so equal text packs equally),
+    plain length and digest."""
+    raw = text.encode("utf-8")
+    return {
+        "body": gzip.compress(raw, compresslevel=level, mtime=0),
+        "length": len(raw),
+        "digest": hashlib.blake2b(raw, digest_size=16).hexdigest(),
+    }
+
+
+def unpack_body(blob: bytes) -> str:
+    return gzip.decompress(blob).decode("utf-8")
+
+
+def store_bodies(s: Session, texts: Dict[int, Optional[str]]) -> int:
+    """Insert or replace the bodies of `{article_id: text}`; unchanged texts are not rewritten.
+
+    Returns the number of rows written.
+    """
+    packed = {aid: pack_body(t) for aid, t in texts.items() if t}
+    if not packed:
+        return 0
+    current: Dict[int, str] = {}
+    ids = list(packed)
+    for i in range(0, len(ids), CHUNK):
+        chunk = ids[i : i + CHUNK]
+        current.update(s.query(ArticleBody.article_id, ArticleBody.digest).filter(ArticleBody.article_id.in_(chunk)))
+    now = datetime.utcnow()
+    new = [dict(p, article_id=aid, updated_at=now) for aid, p in packed.items() if aid not in current]
+    changed = [
+        dict(p, article_id=aid, updated_at=now)
+        for aid, p in packed.items()
+        if aid in current and current[aid] != p["digest"]
+    ]
+    if new:
+        s.execute(insert(ArticleBody), new)
+    if changed:
+        s.execute(update(ArticleBody), changed)
+    return len(new) + len(changed)
@@ -3,7 +3,7 @@ from contextlib import contextmanager
 from datetime import datetime
 from typing import Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, update
 from sqlalchemy.orm import sessionmaker, Session
 
 # SQLAlchemy 1.4/2.0 compatibility for Base
@@ -41,3 +41,46 @@ def session_scope() -> Iterator[Session]:
         raise
     finally:
         session.close()
+
+
+def insert_ignore(s: Session, table, key: str = "url_hash"):
+    """Multi-row INSERT that leaves rows hitting a unique key untouched.
+
+    `key` is a column of that unique key; MySQL needs one for its no-op update.
+    """
+    dialect = s.get_bind().dialect.name
+    if dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        # no-op update: the row already exists, keep it as is
+        return stmt.on_duplicate_key_update({key: stmt.inserted[key]})
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        return sqlite_insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        return pg_insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def bump_generation(name: str = "articles") -> None:
+    """Advance a cache generation counter in its own short transaction.
+
+    The backend drops cached article responses once it sees a new value, so call this right
+    after committing anything that changes what the API returns for articles. It is kept out
+    of the write transactions: every writer updates this one row, and holding its lock until
+    a batch commits would serialize concurrent workers.
+    """
+    from .models import CacheGeneration
+
+    now = datetime.utcnow()
+    with session_scope() as s:
+        s.execute(insert_ignore(s, CacheGeneration.__table__, key="name"), [{"name": name, "value": 0, "updated_at": now}])
+        s.execute(
+            update(CacheGeneration)
+            .where(CacheGeneration.name == name)
+            .values(value=CacheGeneration.value + 1, updated_at=now)
+        )
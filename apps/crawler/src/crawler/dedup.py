@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from .models import Article
+from .simhash import NearDupIndex
+
+
+# Keep IN (...) lists well below driver/DB parameter limits
+CHUNK = 500
+# How far back (by fetch time) cross-site near-duplicates are looked for
+NEAR_DUP_WINDOW = timedelta(days=3)
+
+TitleDay = Tuple[str, date]
+
+# Process-wide near-dup index shared by every ArticleWriter, and the highest article id
+# loaded into it from the database
+_near_dups: Optional[NearDupIndex] = None
+_near_dups_loaded_id = 0
+_near_dups_lock = threading.Lock()
+
+
+def _chunks(items: List, size: int = CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def title_day(title: str, published_at: Optional[datetime]) -> Optional[TitleDay]:
+    """Secondary dedup key: same (truncated) title published on the same day."""
+    if not title or published_at is None:
+        return None
+    return (title[:512], published_at.date())
+
+
+def known_url_hashes(s: Session, hashes: Iterable[int]) -> Set[int]:
+    """Return the subset of URL hashes already stored, one IN (...) query per chunk.
+
+    Uses the fixed-width `url_hash` index instead of the wide `url` one; hashes come
+    from crawler.urls.url_hash, so URLs differing only in tracking params match.
+    """
+    wanted = list(dict.fromkeys(h for h in hashes if h is not None))
+    found: Set[int] = set()
+    for chunk in _chunks(wanted):
+        found.update(h for (h,) in s.query(Article.url_hash).filter(Article.url_hash.in_(chunk)))
+    return found
+
+
+def known_title_days(s: Session, site: str, keys: Iterable[Optional[TitleDay]]) -> Set[TitleDay]:
+    """Return the subset of (title, day) keys already stored for `site`, in bulk."""
+    wanted = {k for k in keys if k}
+    if not wanted:
+        return set()
+    start = datetime.combine(min(d for _, d in wanted), datetime.min.time())
+    end = datetime.combine(max(d for _, d in wanted), datetime.min.time()) + timedelta(days=1)
+    found: Set[TitleDay] = set()
+    for chunk in _chunks(sorted({t for t, _ in wanted})):
+        rows = s.query(Article.title, Article.published_at).filter(
+            Article.site == site,
+            Article.title.in_(chunk),
+            Article.published_at >= start,
+            Article.published_at < end,
+        )
+        for title, published_at in rows:
+            key = title_day(title, published_at)
+            if key in wanted:
+                found.add(key)
+    return found
+
+
+def recent_url_hashes(s: Session, site: str, limit: int) -> Set[int]:
+    """URL hashes of the site's `limit` most recently stored articles (its feed high-water mark)."""
+    rows = s.query(Article.url_hash).filter(Article.site == site).order_by(Article.id.desc()).limit(limit)
+    return {h for (h,) in rows}
+
+
+def load_near_dup_index(
+    s: Session, window: timedelta = NEAR_DUP_WINDOW, index: Optional[NearDupIndex] = None, after_id: int = 0
+) -> NearDupIndex:
+    """Add recently fetched articles (all sites, id > `after_id`) to `index`, or a new one."""
+    index = index if index is not None else NearDupIndex()
+    since = datetime.utcnow() - window
+    rows = s.query(Article.id, Article.simhash, Article.cluster_id, Article.fetched_at).filter(
+        Article.simhash.isnot(None),
+        Article.fetched_at >= since,
+        Article.id > after_id,
+    )
+    for article_id, sig, cluster_id, fetched_at in rows:
+        index.add(sig, article_id, cluster_id, at=fetched_at)
+    return index
+
+
+def near_dup_index(s: Session, window: timedelta = NEAR_DUP_WINDOW) -> NearDupIndex:
+    """The process-wide SimHash index, caught up and trimmed to `window`.
+
+    Loaded in full on first use; later calls only read articles stored since (by other
+    processes too) and evict entries fetched before the window.
+    """
+    global _near_dups, _near_dups_loaded_id
+    with _near_dups_lock:
+        if _near_dups is None:
+            _near_dups = NearDupIndex()
+        loaded = _near_dups_loaded_id
+        top = s.query(func.max(Article.id)).scalar() or 0
+        if top > loaded:
+            load_near_dup_index(s, window, _near_dups, after_id=loaded)
+            _near_dups_loaded_id = top
+        _near_dups.prune(datetime.utcnow() - window)
+        return _near_dups
+
+
+def reset_near_dup_index() -> None:
+    """Forget the process-wide index (e.g. after the articles table was emptied)."""
+    global _near_dups, _near_dups_loaded_id
+    with _near_dups_lock:
+        _near_dups, _near_dups_loaded_id = None, 0
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Awaitable, Callable, Collection, Dict, Iterable, Mapping, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+
+if TYPE_CHECKING:
+    from .metrics import CrawlMetrics
+
+
+# End of the document head: `</head>` or, when that is omitted, the opening <body> tag
+_HEAD_END = re.compile(rb"</head\s*>|<body[\s>]", re.IGNORECASE)
+HEAD_MAX_BYTES = 256 * 1024
+
+
+@dataclass
+class Revalidation:
+    """Outcome of a conditional GET: 304 (`body` None) or 200 with the page and new validators."""
+
+    status: int
+    body: Optional[Union[str, bytes]] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests/second, bursts up to `capacity`.
+
+    `clock` and `sleep` default to the event loop's clock and asyncio.sleep.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        *,
+        clock: Optional[Callable[[], float]] = None,
+        sleep: Optional[Callable[[float], Awaitable]] = None,
+    ):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._clock = clock
+        self._sleep = sleep or asyncio.sleep
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so a host's requests go out in FIFO order
+        async with self._lock:
+            clock = self._clock or asyncio.get_running_loop().time
+            while True:
+                now = clock()
+                if self._updated is not None:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await self._sleep((1.0 - self._tokens) / self.rate)
+
+
+class AsyncFetcher:
+    """Pooled keep-alive HTTP client with bounded concurrency and per-host rate limits.
+
+    Usage:
+        async with AsyncFetcher(user_agent=UA) as f:
+            pages = await f.get_many(urls)
+    """
+
+    def __init__(
+        self,
+        *,
+        user_agent: str,
+        concurrency: int = 16,
+        host_rate: float = 2.0,
+        host_burst: float = 1.0,
+        timeout: float = 12.0,
+        retries: int = 3,
+        backoff: float = 0.8,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.user_agent = user_agent
+        self.concurrency = max(1, concurrency)
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def __aenter__(self) -> "AsyncFetcher":
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        self._client = httpx.AsyncClient(
+            headers={"User-Agent": self.user_agent},
+            timeout=self.timeout,
+            limits=limits,
+            follow_redirects=True,
+            transport=self.transport,
+        )
+        self._sem = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return bucket
+
+    async def get(self, url: str, metrics: Optional["CrawlMetrics"] = None) -> Optional[str]:
+        """Fetch one page; with `metrics`, record rate-limit wait, request time, status and bytes."""
+
+        async def read(r: httpx.Response) -> str:
+            await r.aread()
+            return r.text
+
+        return await self._fetch(url, metrics, read)
+
+    async def get_head(
+        self, url: str, metrics: Optional["CrawlMetrics"] = None, max_bytes: int = HEAD_MAX_BYTES
+    ) -> Optional[bytes]:
+        """Fetch only the start of a page, up to the end of its <head> (at most `max_bytes`).
+
+        The body is streamed and the connection closed as soon as `</head>` (or `<body>`) has
+        been received. Returns raw bytes so lxml can honour a `<meta charset>` declaration.
+        """
+        return await self._fetch(url, metrics, lambda r: _read_head(r, max_bytes))
+
+    async def revalidate(
+        self,
+        url: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        metrics: Optional["CrawlMetrics"] = None,
+        head_only: bool = False,
+    ) -> Optional[Revalidation]:
+        """Conditional GET with the stored validators; None when the page could not be fetched.
+
+        A 304 costs one round trip and no body. With `head_only` a changed page is read only
+        up to </head>, as in get_head().
+        """
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        async def read(r: httpx.Response) -> Revalidation:
+            body: Optional[Union[str, bytes]] = None
+            if r.status_code != 304:
+                if head_only:
+                    body = await _read_head(r)
+                else:
+                    await r.aread()
+                    body = r.text
+            return Revalidation(r.status_code, body, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+
+        return await self._fetch(url, metrics, read, headers)
+
+    async def _fetch(
+        self,
+        url: str,
+        metrics: Optional["CrawlMetrics"],
+        read: Callable[[httpx.Response], Awaitable],
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        assert self._client is not None and self._sem is not None, "use `async with AsyncFetcher(...)`"
+        bucket = self._bucket(url)
+        delay = 0.5
+        for attempt in range(self.retries):
+            if attempt and metrics is not None:
+                metrics.retry("page")
+            # Every attempt (including retries) counts against the host's budget
+            t = time.perf_counter()
+            await bucket.acquire()
+            async with self._sem:
+                started = time.perf_counter()
+                status, body, nbytes = None, None, 0
+                try:
+                    # leaving the stream early closes the connection instead of draining it
+                    async with self._client.stream("GET", url, headers=headers) as r:
+                        status = r.status_code
+                        # 304 only ever answers a conditional request (revalidate)
+                        if r.is_success or (headers and status == 304):
+                            body = await read(r)
+                        nbytes = r.num_bytes_downloaded
+                except Exception:
+                    body = None
+                if metrics is not None:
+                    metrics.observe("page_wait", started - t)
+                    metrics.observe("page_fetch", time.perf_counter() - started)
+                    metrics.response("page", status, nbytes)
+                if body is not None:
+                    return body
+            if attempt + 1 < self.retries:
+                await asyncio.sleep(delay)
+                delay *= (1.0 + self.backoff)
+        return None
+
+    async def get_many(
+        self,
+        urls: Iterable[str],
+        metrics: Optional["CrawlMetrics"] = None,
+        head_only: Collection[str] = (),
+    ) -> Dict[str, Optional[Union[str, bytes]]]:
+        """Fetch all `urls` concurrently; those in `head_only` only up to </head> (bytes)."""
+        unique = list(dict.fromkeys(u for u in urls if u))
+        bodies = await asyncio.gather(
+            *(self.get_head(u, metrics) if u in head_only else self.get(u, metrics) for u in unique)
+        )
+        return dict(zip(unique, bodies))
+
+    async def revalidate_many(
+        self,
+        checks: Iterable[Tuple[str, Optional[str], Optional[str]]],
+        metrics: Optional["CrawlMetrics"] = None,
+        head_only: Collection[str] = (),
+    ) -> Dict[str, Optional[Revalidation]]:
+        """Conditional GETs for (url, etag, last_modified) triples, concurrently."""
+        unique = {url: (etag, lm) for url, etag, lm in checks if url}
+        results = await asyncio.gather(
+            *(self.revalidate(u, etag, lm, metrics, u in head_only) for u, (etag, lm) in unique.items())
+        )
+        return dict(zip(unique, results))
+
+
+async def _read_head(r: httpx.Response, max_bytes: int = HEAD_MAX_BYTES) -> bytes:
+    """Read a streamed response up to the end of its <head> (at most `max_bytes`)."""
+    buf = bytearray()
+    async for chunk in r.aiter_bytes():
+        # re-scan a little of the previous chunk in case the tag straddles two chunks
+        start = max(0, len(buf) - 16)
+        buf += chunk
+        m = _HEAD_END.search(buf, start)
+        if m:
+            return bytes(buf[: m.end()])
+        if len(buf) >= max_bytes:
+            break
+    return bytes(buf)
+
+
+def fetch_many(
+    urls: Iterable[str],
+    metrics: Optional["CrawlMetrics"] = None,
+    head_only: Collection[str] = (),
+    **kwargs,
+) -> Dict[str, Optional[Union[str, bytes]]]:
+    """Blocking helper: fetch all `urls` concurrently and return {url: body or None}."""
+
+    async def _run() -> Dict[str, Optional[Union[str, bytes]]]:
+        async with AsyncFetcher(**kwargs) as f:
+            return await f.get_many(urls, metrics, head_only)
+
+    return asyncio.run(_run())
+
+
+def revalidate_many(
+    checks: Iterable[Tuple[str, Optional[str], Optional[str]]],
+    metrics: Optional["CrawlMetrics"] = None,
+    head_only: Collection[str] = (),
+    **kwargs,
+) -> Dict[str, Optional[Revalidation]]:
+    """Blocking helper: conditional GETs for (url, etag, last_modified) triples."""
+
+    async def _run() -> Dict[str, Optional[Revalidation]]:
+        async with AsyncFetcher(**kwargs) as f:
+            return await f.revalidate_many(checks, metrics, head_only)
+
+    return asyncio.run(_run())
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+from lxml.cssselect import CSSSelector
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .rules import SiteRule
+
+
+# Same text as BeautifulSoup's get_text(): no <script>/<style>/<template> bodies, no comments
+_TEXT = etree.XPath(
+    "descendant-or-self::text()[not(ancestor::script or ancestor::style or ancestor::template)]",
+    smart_strings=False,
+)
+_META = etree.XPath("//meta[@content]")
+_FIRST_IMG_SRC = etree.XPath("(.//img[@src])[1]/@src", smart_strings=False)
+
+
+def parse_html(html: str | bytes) -> Optional[lxml.html.HtmlElement]:
+    """Parse a full document once; returns None for empty/unparseable input."""
+    if not html:
+        return None
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration: let lxml sniff the bytes instead
+        return lxml.html.document_fromstring(html.encode("utf-8")) if isinstance(html, str) else None
+    except etree.ParserError:
+        return None
+
+
+@lru_cache(maxsize=256)
+def parse_fragment(text: str) -> Optional[lxml.html.HtmlElement]:
+    """Parse an HTML snippet (RSS title/summary). Cached so one entry's summary is parsed
+    once even though both the text and the first <img> are read from it."""
+    try:
+        return lxml.html.fragment_fromstring(text, create_parent="div")
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def text_of(node, sep: str = "") -> str:
+    """Equivalent of BeautifulSoup's node.get_text(sep, strip=True)."""
+    return sep.join(s for s in (t.strip() for t in _TEXT(node)) if s)
+
+
+def first_img_src(node) -> Optional[str]:
+    srcs = _FIRST_IMG_SRC(node)
+    return srcs[0] if srcs and srcs[0] else None
+
+
+def collect_meta(doc) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Single pass over <meta>: ({property: content}, {name: content}), first occurrence wins."""
+    by_prop: Dict[str, str] = {}
+    by_name: Dict[str, str] = {}
+    for meta in _META(doc):
+        content = meta.get("content")
+        if not content:
+            continue
+        prop = meta.get("property")
+        if prop and prop not in by_prop:
+            by_prop[prop] = content
+        name = meta.get("name")
+        if name and name not in by_name:
+            by_name[name] = content
+    return by_prop, by_name
+
+
+def meta_lookup(meta: Tuple[Dict[str, str], Dict[str, str]], prop: str) -> Optional[str]:
+    by_prop, by_name = meta
+    return by_prop.get(prop) or by_name.get(prop)
+
+
+@dataclass(frozen=True)
+class CompiledRule:
+    title: Tuple[CSSSelector, ...]
+    content: Tuple[CSSSelector, ...]
+    date_meta_props: Tuple[str, ...]
+    image_meta_props: Tuple[str, ...]
+
+
+_compiled: Dict[int, Tuple["SiteRule", CompiledRule]] = {}
+
+
+def compile_rule(rule: "SiteRule") -> CompiledRule:
+    """CSS selectors -> XPath, compiled once per SiteRule instance."""
+    hit = _compiled.get(id(rule))
+    if hit is not None and hit[0] is rule:
+        return hit[1]
+    compiled = CompiledRule(
+        title=tuple(CSSSelector(sel) for sel in rule.title_selectors),
+        content=tuple(CSSSelector(sel) for sel in rule.content_selectors),
+        date_meta_props=tuple(rule.date_meta_props or ()),
+        image_meta_props=tuple(rule.image_meta_props or ("og:image",)),
+    )
+    _compiled[id(rule)] = (rule, compiled)
+    return compiled
+
+
+def select_texts(doc, selectors: Tuple[CSSSelector, ...], sep: str = " ") -> List[str]:
+    """Texts of every node matched by the first selector that yields any text."""
+    for sel in selectors:
+        parts = [t for t in (text_of(node, sep) for node in sel(doc)) if t]
+        if parts:
+            return parts
+    return []
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import io
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterator, Optional
+
+import feedparser
+from lxml import etree
+
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_RSS1 = "{http://purl.org/rss/1.0/}"
+_CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+_DC = "{http://purl.org/dc/elements/1.1/}"
+_MEDIA = "{http://search.yahoo.com/mrss/}"
+
+_ITEM_TAGS = ("item", _RSS1 + "item", _ATOM + "entry")
+
+
+def _text(el) -> Optional[str]:
+    if el is None:
+        return None
+    if len(el):
+        # Atom type="xhtml" (or stray markup): keep the inner markup like feedparser does
+        inner = (el.text or "") + "".join(etree.tostring(c, encoding="unicode", with_tail=True) for c in el)
+        return inner.strip() or None
+    return (el.text or "").strip() or None
+
+
+def _struct_time(value: Optional[str]):
+    """RFC 822 (RSS) or ISO 8601 (Atom/dc:date) -> UTC struct_time, as feedparser's *_parsed."""
+    if not value:
+        return None
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)  # feedparser reads zoneless dates as UTC
+    return dt.utctimetuple()
+
+
+def _local(tag) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _entry(item) -> dict:
+    """Compact feedparser-compatible dict for one <item>/<entry> element."""
+    e: dict = {}
+    published = updated = None
+    content = description = None
+    for child in item:
+        tag = child.tag
+        if not isinstance(tag, str):
+            continue  # comments / processing instructions
+        name = _local(tag)
+        if name == "title":
+            e["title"] = _text(child)
+        elif name == "link":
+            href = child.get("href")
+            if href is not None:  # Atom: prefer rel="alternate" (or no rel)
+                if child.get("rel", "alternate") == "alternate" and "link" not in e:
+                    e["link"] = href.strip()
+            elif "link" not in e:
+                e["link"] = _text(child)
+        elif name in ("guid", "id"):
+            e["id"] = _text(child)
+        elif name in ("description", "summary"):
+            description = _text(child)
+        elif tag == _CONTENT + "encoded" or tag == _ATOM + "content":
+            content = _text(child)
+        elif name == "pubDate" or tag == _ATOM + "published":
+            published = _text(child)
+        elif tag == _DC + "date" or tag == _ATOM + "updated":
+            updated = _text(child)
+        elif tag in (_MEDIA + "content", _MEDIA + "thumbnail") and child.get("url"):
+            e.setdefault(f"media_{_local(tag)}", []).append({"url": child.get("url")})
+        elif tag == _MEDIA + "group":
+            for m in child:
+                if m.tag in (_MEDIA + "content", _MEDIA + "thumbnail") and m.get("url"):
+                    e.setdefault(f"media_{_local(m.tag)}", []).append({"url": m.get("url")})
+    if content:
+        e["content"] = [{"value": content}]
+    # feedparser falls back to the full content when an item has no description
+    summary = description or content
+    if summary:
+        e["summary"] = summary
+    if published:
+        e["published_parsed"] = _struct_time(published)
+    if updated:
+        e["updated_parsed"] = _struct_time(updated)
+    return e
+
+
+def iter_entries(body: bytes) -> Iterator[dict]:
+    """Stream RSS 2.0 / RSS 1.0 / Atom entries from a feed body, one dict at a time.
+
+    Each finished element is cleared and detached from the tree, so memory stays bounded by
+    a single entry regardless of feed size; stop iterating to stop parsing. Malformed XML
+    (bare `&`, bad bytes) hands the rest of the feed to feedparser, which is lenient but
+    not streaming.
+    """
+    yielded = 0
+    try:
+        for _, item in etree.iterparse(io.BytesIO(body), events=("end",), tag=_ITEM_TAGS, resolve_entities=False):
+            entry = _entry(item)
+            # free the element and everything parsed before it
+            item.clear()
+            parent = item.getparent()
+            if parent is not None:
+                while item.getprevious() is not None:
+                    del parent[0]
+            yielded += 1
+            yield entry
+    except etree.XMLSyntaxError:
+        for entry in feedparser.parse(body).entries[yielded:]:
+            yield entry
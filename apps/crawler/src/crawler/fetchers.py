@@ -3,44 +3,188 @@ from __future__ import annotations
 import time
 import os
 import random
+import hashlib
+import heapq
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Iterable, List, Optional
+from typing import Collection, Dict, Iterable, List, Optional, Set
 
-import feedparser
 import requests
-from bs4 import BeautifulSoup
 
 from .db import session_scope, Base, engine
-from .models import Article, CrawlLog
+from .models import CrawlLog, FeedState
 from .sites import SiteConfig
 from .rules import get_site_rule, extract_from_html
+from .extract import parse_fragment, text_of, first_img_src
+from .engine import fetch_many
+from .dedup import TitleDay, known_url_hashes, known_title_days, recent_url_hashes, title_day
+from .feeds import iter_entries
+from .simhash import article_simhash
+from .urls import url_hash
+from .writer import ArticleWriter
+from .archive import get_archive
+from .metrics import CrawlMetrics
+from .thumbs import THUMB_PREWARM, prewarm_thumbnails
 
 
 UA = os.getenv("CRAWLER_USER_AGENT", "news-crawler/1.0 (+https://example.com)")
 REQ_DELAY = float(os.getenv("CRAWLER_REQUEST_DELAY", "0.3"))
 REQ_JITTER = float(os.getenv("CRAWLER_REQUEST_JITTER", "0.25"))
+# Async article fetches: total in-flight requests and per-publisher rate (req/s).
+# The default host rate matches the old sequential `REQ_DELAY + jitter` pacing.
+CONCURRENCY = int(os.getenv("CRAWLER_CONCURRENCY", "16"))
+HOST_RATE = float(os.getenv("CRAWLER_HOST_RATE") or 1.0 / max(REQ_DELAY + REQ_JITTER / 2, 0.05))
+HOST_BURST = float(os.getenv("CRAWLER_HOST_BURST", "1"))
+# Streaming feed reads: stop after this many consecutive already-stored entries, comparing
+# against the hashes of the site's most recent FEED_HIGH_WATER stored articles
+FEED_STOP_AFTER = int(os.getenv("CRAWLER_FEED_STOP_AFTER", "10"))
+FEED_HIGH_WATER = int(os.getenv("CRAWLER_FEED_HIGH_WATER", "500"))
 
 
 def ensure_tables():
     Base.metadata.create_all(bind=engine)
 
 
-def fetch_rss_entries(rss_urls: Iterable[str], timeout: int = 10) -> List[dict]:
-    out: List[dict] = []
-    for url in rss_urls:
-        feed = feedparser.parse(url)
-        if getattr(feed, "entries", None):
-            out.extend(feed.entries)
+@dataclass
+class FeedPoll:
+    entries: List[dict] = field(default_factory=list)  # entries to consider, newest first
+    unchanged: int = 0  # feeds skipped via 304 or an identical body
+    states: List[dict] = field(default_factory=list)  # validators to persist once the run succeeds
+    read: int = 0  # entries read from changed feeds, including known ones not kept
+    known: int = 0  # entries skipped as already stored (high-water mark)
+    published: List[datetime] = field(default_factory=list)  # dates of every entry read
+
+
+def load_feed_states(feed_urls: Iterable[str]) -> Dict[str, dict]:
+    urls = list(feed_urls)
+    if not urls:
+        return {}
+    with session_scope() as s:
+        rows = s.query(FeedState).filter(FeedState.feed_url.in_(urls)).all()
+        return {
+            r.feed_url: {"etag": r.etag, "last_modified": r.last_modified, "content_hash": r.content_hash}
+            for r in rows
+        }
+
+
+def save_feed_states(s, states: Iterable[dict]) -> None:
+    now = datetime.utcnow()
+    for st in states:
+        row = s.query(FeedState).filter(FeedState.feed_url == st["feed_url"]).first()
+        if row is None:
+            row = FeedState(feed_url=st["feed_url"])
+            s.add(row)
+        if st.get("changed"):
+            row.changed_at = now
+        # A 304 carries no body; keep the validators we already have
+        row.etag = st.get("etag") or row.etag
+        row.last_modified = st.get("last_modified") or row.last_modified
+        row.content_hash = st.get("content_hash") or row.content_hash
+        row.checked_at = now
+
+
+def poll_feeds(
+    rss_urls: Iterable[str],
+    timeout: int = 10,
+    *,
+    conditional: bool = True,
+    metrics: Optional[CrawlMetrics] = None,
+    known_hashes: Optional[Set[int]] = None,
+    limit: Optional[int] = None,
+    stop_after: int = FEED_STOP_AFTER,
+) -> FeedPoll:
+    """Download and parse feeds, skipping ones that have not changed since the last run.
+
+    With `conditional`, stored ETag/Last-Modified validators are sent back and a 304 or a
+    body whose sha256 matches the stored hash is not parsed. New validators are returned in
+    `FeedPoll.states`; the caller persists them (save_feed_states) after the run succeeds.
+
+    Feeds are streamed (crawler.feeds.iter_entries). Entries whose URL hash is in
+    `known_hashes` are not kept, and a feed stops being read after `stop_after` of them in a
+    row. With `limit`, only the newest `limit` entries are kept (bounded heap).
+    """
+    urls = list(rss_urls)
+    metrics = metrics or CrawlMetrics()
+    known = load_feed_states(urls) if conditional else {}
+    poll = FeedPoll()
+    # (published, -seq, entry); a min-heap when `limit` is set. Undated entries count as
+    # newest and ties keep feed order, as the old full sort did
+    kept: List[tuple] = []
+    for url in urls:
+        prev = known.get(url) or {}
+        headers = {"User-Agent": UA}
+        if prev.get("etag"):
+            headers["If-None-Match"] = prev["etag"]
+        if prev.get("last_modified"):
+            headers["If-Modified-Since"] = prev["last_modified"]
+        with metrics.phase("feed_fetch"):
+            try:
+                r = requests.get(url, headers=headers, timeout=timeout)
+            except Exception:
+                r = None
+        metrics.response("feed", r.status_code if r is not None else None, len(r.content) if r is not None else 0)
+        if r is not None and r.status_code == 304:
+            poll.unchanged += 1
+            poll.states.append({"feed_url": url})
+        elif r is not None and r.ok:
+            digest = hashlib.sha256(r.content).hexdigest()
+            changed = digest != prev.get("content_hash")
+            if changed:
+                with metrics.phase("feed_parse"):
+                    run = 0
+                    for entry in iter_entries(r.content):
+                        poll.read += 1
+                        published = _parse_dt(entry)
+                        if published is not None:
+                            poll.published.append(published)
+                        link = entry.get("link") or entry.get("id")
+                        if known_hashes and link and url_hash(link) in known_hashes:
+                            poll.known += 1
+                            run += 1
+                            if run >= stop_after:
+                                break  # reached what we already have; the rest is older
+                            continue
+                        run = 0
+                        item = (published or datetime.max, -poll.read, entry)
+                        if limit is None:
+                            kept.append(item)
+                        elif len(kept) < limit:
+                            heapq.heappush(kept, item)
+                        else:
+                            heapq.heappushpop(kept, item)
+            else:
+                poll.unchanged += 1
+            poll.states.append(
+                {
+                    "feed_url": url,
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                    "content_hash": digest,
+                    "changed": changed,
+                }
+            )
         # polite pause between multiple RSS endpoints
         time.sleep(REQ_DELAY + random.random() * REQ_JITTER)
-    return out
+    poll.entries = [e for _, _, e in (sorted(kept, key=lambda k: k[:2], reverse=True) if limit else kept)]
+    metrics.count("feeds", len(urls))
+    metrics.count("feeds_unchanged", poll.unchanged)
+    metrics.count("entries", poll.read)
+    metrics.count("known", poll.known)
+    return poll
+
+
+def fetch_rss_entries(rss_urls: Iterable[str], timeout: int = 10) -> List[dict]:
+    return poll_feeds(rss_urls, timeout=timeout, conditional=False).entries
 
 
 def clean_html(text: Optional[str]) -> Optional[str]:
     if not text:
         return text
-    soup = BeautifulSoup(text, "lxml")
-    return soup.get_text(" ", strip=True)
+    if "<" not in text and "&" not in text:
+        # plain text (most RSS titles): nothing to parse
+        return text.strip()
+    frag = parse_fragment(text)
+    return text_of(frag, " ") if frag is not None else text.strip()
 
 
 def http_get(url: str, *, retries: int = 3, backoff: float = 0.8) -> Optional[str]:
@@ -57,6 +201,26 @@ def http_get(url: str, *, retries: int = 3, backoff: float = 0.8) -> Optional[st
     return None
 
 
+def fetch_pages(
+    urls: Iterable[str],
+    metrics: Optional[CrawlMetrics] = None,
+    head_only: Collection[str] = (),
+) -> Dict[str, Optional[str | bytes]]:
+    """Fetch article pages concurrently, throttled per host. Returns {url: html or None}.
+
+    URLs in `head_only` are only read up to </head> and come back as bytes.
+    """
+    return fetch_many(
+        urls,
+        metrics,
+        head_only,
+        user_agent=UA,
+        concurrency=CONCURRENCY,
+        host_rate=HOST_RATE,
+        host_burst=HOST_BURST,
+    )
+
+
 def maybe_extract_main_image(entry: dict) -> Optional[str]:
     # Try common fields in RSS feeds
     for key in ("media_content", "media_thumbnail"):
@@ -70,100 +234,282 @@ def maybe_extract_main_image(entry: dict) -> Optional[str]:
     # fallback: look in summary for <img>
     html = entry.get("summary") or entry.get("content", [{}])[0].get("value")
     if html:
-        soup = BeautifulSoup(html, "lxml")
-        img = soup.find("img")
-        if img and img.get("src"):
-            return img["src"]
+        # parse_fragment is cached, so this reuses the tree clean_html built for the summary
+        frag = parse_fragment(html)
+        if frag is not None:
+            return first_img_src(frag)
     return None
 
 
-def fetch_site(config: SiteConfig, limit: int = 100, site_key: str | None = None) -> int:
-    ensure_tables()
-    entries = fetch_rss_entries(config.rss)
+def _parse_dt(e) -> Optional[datetime]:
+    dt = None
+    for k in ("published_parsed", "updated_parsed"):
+        if e.get(k):
+            try:
+                dt = datetime(*e[k][:6])
+                break
+            except Exception:
+                pass
+    return dt
+
+
+@dataclass
+class SiteBatch:
+    """One site's crawl between stages: new candidates plus the dedup state to write them.
+
+    `poll` is None for candidates that did not come from a feed poll of this run (queued
+    page tasks): there are no feed states to save and no "no entries" outcome to log.
+    """
+
+    config: SiteConfig
+    site_key: Optional[str]
+    poll: Optional[FeedPoll]
+    candidates: List[dict] = field(default_factory=list)
+    seen_hashes: Set[int] = field(default_factory=set)
+    seen_days: Set[TitleDay] = field(default_factory=set)
+    failed: int = 0
+    metrics: CrawlMetrics = field(default_factory=CrawlMetrics)
+
+
+def collect_candidates(
+    config: SiteConfig,
+    limit: int = 100,
+    site_key: str | None = None,
+    metrics: Optional[CrawlMetrics] = None,
+) -> SiteBatch:
+    """Poll the site's feeds and return entries not stored yet (no article pages fetched).
+
+    Timings and counters of the whole site run accumulate in `batch.metrics` (`metrics`
+    when given, so callers can keep a handle on it).
+    """
+    metrics = metrics or CrawlMetrics()
+    with metrics.phase("dedup"), session_scope() as s:
+        high_water = recent_url_hashes(s, config.name, max(FEED_HIGH_WATER, limit))
+    # Newest `limit` entries not already stored, read with early stop at the high-water mark
+    poll = poll_feeds(config.rss, metrics=metrics, known_hashes=high_water, limit=limit)
+    batch = SiteBatch(config=config, site_key=site_key, poll=poll, metrics=metrics)
+    entries = poll.entries
     if not entries:
+        return batch
+    candidates: List[dict] = []
+    for entry in entries:
+        url = entry.get("link") or entry.get("id")
+        title = clean_html(entry.get("title")) or ""
+        if not url or not title:
+            batch.failed += 1
+            continue
+        candidates.append(
+            {
+                "url": url,
+                "url_hash": url_hash(url),
+                "title": title,
+                "summary": clean_html(entry.get("summary")),
+                "published_at": _parse_dt(entry),
+                "image_url": maybe_extract_main_image(entry),
+            }
+        )
+    # Dedup pre-pass: drop entries we already store before any article fetch.
+    # One IN (...) lookup for URLs plus one bulk (title, same day) lookup.
+    with metrics.phase("dedup"), session_scope() as s:
+        batch.seen_hashes = known_url_hashes(s, (c["url_hash"] for c in candidates))
+        batch.seen_days = known_title_days(s, config.name, (title_day(c["title"], c["published_at"]) for c in candidates))
+    batch.candidates = [
+        c
+        for c in candidates
+        if c["url_hash"] not in batch.seen_hashes and title_day(c["title"], c["published_at"]) not in batch.seen_days
+    ]
+    metrics.count("candidates", len(batch.candidates))
+    metrics.count("known", len(candidates) - len(batch.candidates))
+    return batch
+
+
+def apply_parsed(c: dict, parsed: dict) -> None:
+    """Merge fields extracted from the article page into an RSS candidate."""
+    # Prefer parsed results when available
+    if parsed.get("title"):
+        c["title"] = parsed["title"]
+    if parsed.get("content"):
+        # full text goes to article_bodies (ArticleWriter), not the articles row
+        c["content"] = parsed["content"]
+        # derive summary from content if RSS summary missing
+        if not c["summary"]:
+            content = parsed["content"]
+            c["summary"] = (content[:400] + "…") if len(content) > 400 else content
+    if parsed.get("image_url"):
+        c["image_url"] = parsed["image_url"]
+    if parsed.get("published_at"):
+        c["published_at"] = parsed["published_at"]
+
+
+# Reader-visible fields covered by the article fingerprint (change detection)
+FINGERPRINT_FIELDS = ("title", "summary", "image_url", "published_at")
+# Keys of an article update that the API never serves (no cache invalidation needed)
+UNSERVED_FIELDS = frozenset({"id", "fingerprint", "simhash"})
+
+
+def _naive(dt: Optional[datetime]) -> Optional[datetime]:
+    # DATETIME columns store naive wall-clock time; compare like with like
+    return dt.replace(tzinfo=None) if dt is not None and dt.tzinfo is not None else dt
+
+
+def article_fingerprint(fields: dict) -> int:
+    """Signed 64-bit BLAKE2b digest of an article's title, summary, image URL and date."""
+    h = hashlib.blake2b(digest_size=8)
+    for name in FINGERPRINT_FIELDS:
+        value = fields.get(name)
+        if name == "title" and value:
+            value = value[:512]
+        elif name == "published_at" and value is not None:
+            value = _naive(value).isoformat()
+        h.update(("" if value is None else str(value)).encode("utf-8") + b"\x1f")
+    return int.from_bytes(h.digest(), "big", signed=True)
+
+
+def article_changes(row, parsed: dict) -> Optional[dict]:
+    """Fields of a stored article that change when `parsed` page fields are merged into it.
+
+    Returns an `update(Article)` parameter dict (id, changed fields, new fingerprint, and
+    simhash when title/summary changed), or None when the fingerprint stays the same.
+    """
+    current = {f: getattr(row, f) for f in FINGERPRINT_FIELDS}
+    merged = dict(current)
+    apply_parsed(merged, parsed)
+    merged["title"] = (merged["title"] or "")[:512]
+    merged["published_at"] = _naive(merged["published_at"])
+    fingerprint = article_fingerprint(merged)
+    if fingerprint == (getattr(row, "fingerprint", None) or article_fingerprint(current)):
+        return None
+    diff = {f: merged[f] for f in FINGERPRINT_FIELDS if merged[f] != current[f]}
+    if "title" in diff or "summary" in diff:
+        diff["simhash"] = article_simhash(merged["title"], merged["summary"])
+    diff["fingerprint"] = fingerprint
+    diff["id"] = row.id
+    return diff
+
+
+def article_row(site: str, c: dict) -> dict:
+    return {
+        "site": site,
+        "url": c["url"],
+        "url_hash": c["url_hash"],
+        "title": c["title"][:512],
+        "summary": c["summary"],
+        "content": c.get("content"),  # stored compressed in article_bodies
+        "author": None,
+        "category": None,
+        "image_url": c["image_url"],
+        "published_at": c["published_at"],
+        "simhash": article_simhash(c["title"], c["summary"]),
+        "fingerprint": article_fingerprint(c),
+    }
+
+
+def write_batch(batch: SiteBatch, writer: Optional[ArticleWriter] = None) -> int:
+    """Insert a site's (enriched) candidates and record the CrawlLog row. Returns saved count.
+
+    Rows go through `writer` (short multi-row transactions); pass a shared one to collect
+    per-site counts across sites.
+    """
+    config = batch.config
+    poll = batch.poll
+    metrics = batch.metrics
+    if poll is not None and not poll.read:
         with session_scope() as s:
-            s.add(CrawlLog(site=config.name, status="error", saved=0, failed=0, message="no entries"))
-        return 0
-    # Sort by published if present
-    def parse_dt(e):
-        dt = None
-        for k in ("published_parsed", "updated_parsed"):
-            if e.get(k):
-                try:
-                    dt = datetime(*e[k][:6])
-                    break
-                except Exception:
-                    pass
-        return dt
-
-    entries.sort(key=lambda e: parse_dt(e) or datetime.utcnow(), reverse=True)
-    saved = 0
-    failed = 0
-    with session_scope() as s:
-        for entry in entries[:limit]:
-            url = entry.get("link") or entry.get("id")
-            title = clean_html(entry.get("title")) or ""
-            if not url or not title:
-                failed += 1
-                continue
-            summary = clean_html(entry.get("summary"))
-            published_at = parse_dt(entry)
-            image_url = maybe_extract_main_image(entry)
-            # If we have site-specific rules, enrich/override by fetching the article HTML
-            rule = get_site_rule(site_key or "")
-            if rule and url:
-                html = http_get(url) or ""
-                if html:
-                    parsed = extract_from_html(html, rule)
-                    # Prefer parsed results when available
-                    if parsed.get("title"):
-                        title = parsed["title"]
-                    if parsed.get("content"):
-                        # derive summary from content if RSS summary missing
-                        if not summary:
-                            summary = (parsed["content"][:400] + "…") if len(parsed["content"]) > 400 else parsed["content"]
-                    if parsed.get("image_url"):
-                        image_url = parsed["image_url"]
-                    if parsed.get("published_at"):
-                        published_at = parsed["published_at"]
-            try:
-                # Duplicate check: by URL or by (title + published date same day)
-                exists = s.query(Article).filter(Article.url == url).first()
-                if not exists and published_at is not None:
-                    start = datetime(published_at.year, published_at.month, published_at.day)
-                    end = start.replace(hour=23, minute=59, second=59)
-                    exists = (
-                        s.query(Article)
-                        .filter(
-                            Article.title == title[:512],
-                            Article.published_at >= start,
-                            Article.published_at <= end,
-                            Article.site == config.name,
-                        )
-                        .first()
+            if poll.unchanged:
+                # Nothing new since the last run: record the check and skip the pipeline
+                save_feed_states(s, poll.states)
+                s.add(
+                    CrawlLog(
+                        site=config.name,
+                        status="unchanged",
+                        saved=0,
+                        failed=0,
+                        message="feed not modified",
+                        metrics=metrics.to_json(),
+                    )
+                )
+            else:
+                s.add(
+                    CrawlLog(
+                        site=config.name, status="error", saved=0, failed=0, message="no entries", metrics=metrics.to_json()
                     )
-                if exists:
-                    continue
-                art = Article(
-                    site=config.name,
-                    url=url,
-                    title=title[:512],
-                    summary=summary,
-                    content=None,  # optionally store parsed content later
-                    author=None,
-                    category=None,
-                    image_url=image_url,
-                    published_at=published_at,
                 )
-                s.add(art)
-                s.flush()
-                saved += 1
-            except Exception as e:
-                s.rollback()
-                failed += 1
-            # polite pause between entries to avoid burst traffic
-            time.sleep(REQ_DELAY + random.random() * REQ_JITTER)
-        s.add(CrawlLog(site=config.name, status="ok", saved=saved, failed=failed, message=None))
+        return 0
+    writer = writer or ArticleWriter()
+    candidates = batch.candidates
+    seen_hashes = batch.seen_hashes
+    seen_days = batch.seen_days
+    with metrics.phase("dedup"), session_scope() as s:
+        # Other writers (pipeline sites, parallel tasks) may have stored some of these since
+        # the pre-pass, and enrichment may change title/date: re-check both keys once, in bulk
+        seen_hashes |= known_url_hashes(s, (c["url_hash"] for c in candidates))
+        seen_days |= known_title_days(s, config.name, (title_day(c["title"], c["published_at"]) for c in candidates))
+    with metrics.phase("db_write"):
+        for c in candidates:
+            key = title_day(c["title"], c["published_at"])
+            # Duplicate check: by URL or by (title + published date same day), incl. this batch
+            if c["url_hash"] in seen_hashes or (key and key in seen_days):
+                continue
+            seen_hashes.add(c["url_hash"])
+            if key:
+                seen_days.add(key)
+            writer.add(article_row(config.name, c))
+        writer.flush()
+    saved = writer.saved.pop(config.name, 0)
+    with_images = writer.with_images.pop(config.name, [])
+    failed = batch.failed + writer.failed.pop(config.name, 0)
+    metrics.count("saved", saved)
+    metrics.count("failed", failed)
+    if THUMB_PREWARM:
+        # rows are committed, so the backend can look them up
+        prewarm_thumbnails(with_images, metrics)
+    with session_scope() as s:
+        if poll is not None:
+            save_feed_states(s, poll.states)
+        s.add(CrawlLog(site=config.name, status="ok", saved=saved, failed=failed, message=None, metrics=metrics.to_json()))
     # simple stdout log for Airflow task logs
-    print(f"[crawler] site={config.name} saved={saved} failed={failed}")
+    print(f"[crawler] site={config.name} saved={saved} failed={failed} {metrics.summary()}")
     return saved
+
+
+def needs_body(rule, c: dict) -> bool:
+    """Whether enrichment needs the whole page, or `<head>` alone carries every wanted field."""
+    # without the body there is no stored article text (article_bodies); sites opt in via
+    # CRAWLER_HEAD_ONLY when meta fields are all they need
+    return not rule.head_only or not c["summary"]
+
+
+def enrich_batch(batch: SiteBatch) -> None:
+    """Fetch the candidates' article pages and merge what the site's rule extracts."""
+    metrics = batch.metrics
+    # If we have site-specific rules, enrich/override by fetching the article HTML.
+    # Pages are fetched concurrently up front (per-host token bucket keeps us polite).
+    rule = get_site_rule(batch.site_key or "")
+    if rule and batch.candidates:
+        head_only = {c["url"] for c in batch.candidates if not needs_body(rule, c)}
+        metrics.count("head_only", len(head_only))
+        pages = fetch_pages((c["url"] for c in batch.candidates), metrics, head_only)
+        archive = get_archive()
+        for c in batch.candidates:
+            html = pages.get(c["url"])
+            if html:
+                # partial pages are not archived: replay needs the whole document
+                if archive is not None and isinstance(html, str):
+                    with metrics.phase("archive"):
+                        archive.put(c["url_hash"], html)
+                with metrics.phase("html_parse"):
+                    parsed = extract_from_html(html, rule)
+                apply_parsed(c, parsed)
+
+
+def fetch_site(
+    config: SiteConfig,
+    limit: int = 100,
+    site_key: str | None = None,
+    metrics: Optional[CrawlMetrics] = None,
+) -> int:
+    """Crawl one site end to end. Pass `metrics` to read the run's instrumentation afterwards."""
+    ensure_tables()
+    batch = collect_candidates(config, limit=limit, site_key=site_key, metrics=metrics)
+    enrich_batch(batch)
+    return write_batch(batch)
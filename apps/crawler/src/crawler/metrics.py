@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import json
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, Mapping, Optional
+
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Phases in crawl order; anything else a caller times is reported after these
+PHASES = ("feed_fetch", "feed_parse", "dedup", "page_wait", "page_fetch", "archive", "html_parse", "db_write")
+
+
+@dataclass
+class Histogram:
+    """Fixed-bucket latency histogram (count/sum/max plus bucket counts), cheap to merge."""
+
+    counts: list = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    count: int = 0
+    total: float = 0.0  # seconds
+    max: float = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS_MS, seconds * 1000.0)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound (ms) of the bucket holding the q-quantile, capped at the observed max."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = BUCKETS_MS[i] if i < len(BUCKETS_MS) else float("inf")
+                return round(min(bound, self.max * 1000.0), 2)
+        return round(self.max * 1000.0, 2)
+
+    def to_dict(self) -> dict:
+        labels = [f"le_{b}ms" for b in BUCKETS_MS] + ["inf"]
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            "mean_ms": round(self.total * 1000.0 / self.count, 2) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "max_ms": round(self.max * 1000.0, 2),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class CrawlMetrics:
+    """Per-run crawl instrumentation: phase timings, bytes, HTTP statuses and retries.
+
+    One instance per site run. Phases are timed with `with m.phase("dedup"): ...` or
+    `m.observe(name, seconds)`; HTTP traffic is recorded per kind ("feed" / "page").
+    `to_dict()` is the structured document stored in `crawl_logs.metrics` and printed by
+    the CLI/Airflow task.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, Histogram] = defaultdict(Histogram)
+        self.bytes: Dict[str, int] = Counter()
+        self.http: Dict[str, Counter] = defaultdict(Counter)
+        self.retries: Dict[str, int] = Counter()
+        self.counts: Dict[str, int] = Counter()
+        self.started = time.time()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t)
+
+    def observe(self, name: str, seconds: float) -> None:
+        self.phases[name].observe(seconds)
+
+    def response(self, kind: str, status: Optional[int], nbytes: int = 0) -> None:
+        """Record one HTTP attempt; `status=None` means a transport error (timeout, reset...)."""
+        self.http[kind][str(status) if status is not None else "error"] += 1
+        if nbytes:
+            self.bytes[kind] += nbytes
+
+    def retry(self, kind: str) -> None:
+        self.retries[kind] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] += n
+
+    def merge(self, other: "CrawlMetrics") -> None:
+        for name, h in other.phases.items():
+            self.phases[name].merge(h)
+        self.bytes.update(other.bytes)
+        for kind, statuses in other.http.items():
+            self.http[kind].update(statuses)
+        self.retries.update(other.retries)
+        self.counts.update(other.counts)
+        self.started = min(self.started, other.started)
+
+    def to_dict(self) -> dict:
+        order = list(PHASES) + sorted(set(self.phases) - set(PHASES))
+        return {
+            "elapsed_s": round(time.time() - self.started, 3),
+            "phases": {name: self.phases[name].to_dict() for name in order if name in self.phases},
+            "bytes": dict(self.bytes),
+            "http": {kind: dict(statuses) for kind, statuses in self.http.items()},
+            "retries": dict(self.retries),
+            "counts": dict(self.counts),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def summary(self) -> str:
+        """One log line: total seconds per phase plus bytes/status/retry totals."""
+        parts = [f"{name}={h.total:.2f}s/{h.count}" for name, h in self.phases.items()]
+        parts += [f"bytes_{kind}={n}" for kind, n in self.bytes.items()]
+        parts += [f"http_{kind}=" + ",".join(f"{s}:{n}" for s, n in sorted(c.items())) for kind, c in self.http.items()]
+        if self.retries:
+            parts.append("retries=" + ",".join(f"{k}:{n}" for k, n in self.retries.items()))
+        return " ".join(parts)
+
+
+def metrics_document(per_site: Mapping[str, CrawlMetrics], saved: Optional[Mapping[str, int]] = None) -> dict:
+    """Structured report of one crawl run: per-site metrics plus a merged `total`."""
+    total = CrawlMetrics()
+    sites = {}
+    for key, m in per_site.items():
+        total.merge(m)
+        sites[key] = dict(m.to_dict(), saved=(saved or {}).get(key, m.counts.get("saved", 0)))
+    return {"run_at": datetime.utcnow().isoformat(timespec="seconds") + "Z", "sites": sites, "total": total.to_dict()}
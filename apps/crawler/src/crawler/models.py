@@ -2,16 +2,23 @@ from __future__ import annotations
 
 from datetime import datetime
 from sqlalchemy import (
+    BigInteger,
     String,
     Integer,
     DateTime,
     Text,
     Index,
+    LargeBinary,
     UniqueConstraint,
     Column,
 )
 
 from .db import Base
+from .urls import url_hash
+
+
+def _default_url_hash(context) -> int:
+    return url_hash(context.get_current_parameters()["url"])
 
 
 class Article(Base):
@@ -20,6 +27,8 @@ class Article(Base):
     id = Column(Integer, primary_key=True)
     site = Column(String(80), index=True, nullable=False)
     url = Column(String(1024), unique=True, nullable=False)
+    # 64-bit digest of the normalized URL; small unique index used for dedup/lookups
+    url_hash = Column(BigInteger, nullable=False, default=_default_url_hash)
     title = Column(String(512), nullable=False)
     summary = Column(Text())
     content = Column(Text())
@@ -28,20 +37,171 @@ class Article(Base):
     image_url = Column(String(1024))
     published_at = Column(DateTime(timezone=False))
     fetched_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False, index=True)
+    # Near-duplicate clustering (crawler.simhash): 64-bit SimHash of title+summary and the
+    # id of the cluster's first article; NULL cluster_id marks a cluster representative
+    simhash = Column(BigInteger)
+    cluster_id = Column(Integer, index=True)
+    # Change detection (crawler.refresh): 64-bit digest of title/summary/image/date, bumped
+    # revision and time of the last content change found by a re-check
+    fingerprint = Column(BigInteger)
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
+    revised_at = Column(DateTime(timezone=False))
 
     __table_args__ = (
         Index("ix_articles_site_fetched", "site", "fetched_at"),
+        # keyset pagination of the listing (see the backend's app.pagination)
+        Index("ix_articles_published_fetched_id", "published_at", "fetched_at", "id"),
+        Index("ix_articles_fetched_id", "fetched_at", "id"),
         UniqueConstraint("url", name="uq_articles_url"),
+        Index("uq_articles_url_hash", "url_hash", unique=True),
     )
 
 
+class ArticleBody(Base):
+    """Extracted article text, gzip-compressed, kept out of `articles` so listing scans stay narrow.
+
+    Stored as a gzip member so the API can send it as-is with `Content-Encoding: gzip`;
+    `digest` (BLAKE2b of the plain text) is the strong ETag.
+    """
+
+    __tablename__ = "article_bodies"
+
+    article_id = Column(Integer, primary_key=True)
+    body = Column(LargeBinary(length=2**24), nullable=False)  # MEDIUMBLOB on MySQL/MariaDB
+    length = Column(Integer, nullable=False)  # uncompressed UTF-8 bytes
+    digest = Column(String(32), nullable=False)
+    updated_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
+
+
 class CrawlLog(Base):
     __tablename__ = "crawl_logs"
 
     id = Column(Integer, primary_key=True)
     site = Column(String(80), index=True, nullable=False)
     run_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False, index=True)
-    status = Column(String(20), default="ok")  # ok|error
+    status = Column(String(20), default="ok")  # ok|error|unchanged|recheck
     saved = Column(Integer, default=0)
     failed = Column(Integer, default=0)
     message = Column(Text())
+    # JSON document from crawler.metrics.CrawlMetrics: phase histograms, bytes, HTTP statuses, retries
+    metrics = Column(Text())
+
+
+class FeedState(Base):
+    """HTTP validators for conditional GETs of RSS feeds (one row per feed URL)."""
+
+    __tablename__ = "feed_states"
+
+    id = Column(Integer, primary_key=True)
+    feed_url = Column(String(512), unique=True, nullable=False)
+    etag = Column(String(255))
+    last_modified = Column(String(64))
+    content_hash = Column(String(64))  # sha256 hex of the last parsed body
+    checked_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
+    changed_at = Column(DateTime(timezone=False))
+
+
+class ArticleCheck(Base):
+    """Re-check state of a recently stored article page (one row per article, crawler.refresh).
+
+    Holds the page's HTTP validators for conditional GETs, a digest of the last body read
+    (pages without validators are only re-parsed when their bytes change) and when the next
+    check is due.
+    """
+
+    __tablename__ = "article_checks"
+
+    article_id = Column(Integer, primary_key=True)
+    etag = Column(String(255))
+    last_modified = Column(String(64))
+    body_hash = Column(BigInteger)
+    checks = Column(Integer, nullable=False, default=0)
+    changes = Column(Integer, nullable=False, default=0)
+    checked_at = Column(DateTime(timezone=False))
+    next_check_at = Column(DateTime(timezone=False), index=True)
+
+
+class CrawlTask(Base):
+    """Unit of work in the shared crawl queue (crawler.workqueue): one feed or one article page.
+
+    Workers lease tasks for a bounded time (lease_owner / lease_expires_at), extend the lease
+    with heartbeats and mark them done; an expired lease makes the task claimable again.
+    """
+
+    __tablename__ = "crawl_tasks"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(10), nullable=False)  # feed|page
+    site = Column(String(80), nullable=False)  # site key (crawler.sites.SITES)
+    url = Column(String(1024), nullable=False)
+    url_hash = Column(BigInteger, nullable=False)
+    payload = Column(Text())  # JSON: RSS candidate fields for page tasks
+    status = Column(String(10), nullable=False, default="pending")  # pending|leased|done|failed
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String(128))
+    lease_expires_at = Column(DateTime(timezone=False))
+    last_error = Column(Text())
+    created_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime(timezone=False), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("kind", "url_hash", name="uq_crawl_tasks_kind_hash"),
+        Index("ix_crawl_tasks_claim", "status", "lease_expires_at"),
+    )
+
+
+class SearchTerm(Base):
+    """Vocabulary of the article search index (crawler.search): one row per token."""
+
+    __tablename__ = "search_terms"
+
+    id = Column(Integer, primary_key=True)
+    term = Column(String(32), nullable=False, unique=True)
+    df = Column(Integer, nullable=False, default=0)  # documents containing the term
+
+
+class SearchPosting(Base):
+    """Inverted index entry: (term, article) -> term frequency. The primary key keeps a term's
+    postings contiguous (clustered on InnoDB), so reading a posting list is one range scan."""
+
+    __tablename__ = "search_postings"
+
+    term_id = Column(Integer, primary_key=True, autoincrement=False)
+    article_id = Column(Integer, primary_key=True, autoincrement=False)
+    tf = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("ix_search_postings_article", "article_id"),)
+
+
+class SearchDoc(Base):
+    """Indexed articles and their token counts (BM25 length normalization)."""
+
+    __tablename__ = "search_docs"
+
+    article_id = Column(Integer, primary_key=True, autoincrement=False)
+    length = Column(Integer, nullable=False)
+
+
+class SearchStats(Base):
+    """Single row (id=1) of corpus totals, kept incrementally so queries never count documents."""
+
+    __tablename__ = "search_stats"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    docs = Column(Integer, nullable=False, default=0)
+    total_length = Column(BigInteger, nullable=False, default=0)
+
+
+class CacheGeneration(Base):
+    """Counters the backend keys its response cache on.
+
+    db.bump_generation() advances them in a short transaction of its own, right after the data
+    commit. Do not move the bump into the write transactions: every writer updates the same row,
+    so holding its lock until a batch commits would serialize concurrent workers.
+    """
+
+    __tablename__ = "cache_generations"
+
+    name = Column(String(32), primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=True)
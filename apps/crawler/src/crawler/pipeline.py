@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from .archive import get_archive
+from .db import session_scope
+from .engine import AsyncFetcher
+from .metrics import CrawlMetrics
+from .fetchers import (
+    UA,
+    CONCURRENCY,
+    HOST_RATE,
+    HOST_BURST,
+    SiteBatch,
+    apply_parsed,
+    collect_candidates,
+    ensure_tables,
+    needs_body,
+    write_batch,
+)
+from .models import CrawlLog
+from .rules import extract_from_html, get_site_rule
+from .sites import SITES
+from .writer import ArticleWriter
+
+
+# Max pages waiting between stages (fetched-but-unparsed, parsed-but-unwritten)
+QUEUE_SIZE = int(os.getenv("CRAWLER_QUEUE_SIZE", "64"))
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy: float = 0.0  # seconds spent inside the stage, summed over its concurrent workers
+    first: Optional[float] = None
+    last: Optional[float] = None
+
+    def add(self, started: float, items: int = 1) -> None:
+        now = time.perf_counter()
+        self.items += items
+        self.busy += now - started
+        self.first = started if self.first is None else min(self.first, started)
+        self.last = now if self.last is None else max(self.last, now)
+
+    @property
+    def wall(self) -> float:
+        return (self.last - self.first) if self.first is not None else 0.0
+
+    def summary(self) -> str:
+        rate = self.items / self.wall if self.wall else 0.0
+        return f"{self.name}={self.items} wall={self.wall:.2f}s busy={self.busy:.2f}s ({rate:.1f}/s)"
+
+
+@dataclass
+class _SiteState:
+    key: str
+    batch: SiteBatch
+    pending: int  # candidates not yet through the parse stage
+
+
+def parse_page(site_key: str, html: str | bytes) -> dict:
+    """Parse-stage worker (runs in a child process): extract fields with the site's rule."""
+    rule = get_site_rule(site_key)
+    return extract_from_html(html, rule) if rule else {}
+
+
+def _timed_parse_page(site_key: str, html: str | bytes) -> Tuple[dict, float]:
+    # timed in the child so html_parse excludes pool queueing and pickling
+    t = time.perf_counter()
+    parsed = parse_page(site_key, html)
+    return parsed, time.perf_counter() - t
+
+
+def _log_error(site_key: str, err: Exception) -> None:
+    with session_scope() as s:
+        s.add(CrawlLog(site=SITES[site_key].name, status="error", saved=0, failed=0, message=repr(err)[:1000]))
+
+
+async def _crawl(
+    site_keys: Iterable[str],
+    limit: int,
+    workers: int,
+    queue_size: int,
+    metrics: Dict[str, CrawlMetrics],
+) -> Dict[str, int]:
+    loop = asyncio.get_running_loop()
+    parse_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    write_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    stats = {name: StageStats(name) for name in ("collect", "fetch", "parse", "write")}
+    archive = get_archive()
+    results: Dict[str, int] = {}
+
+    async def produce(key: str, fetcher: AsyncFetcher) -> None:
+        started = time.perf_counter()
+        try:
+            batch = await asyncio.to_thread(collect_candidates, SITES[key], limit, key, metrics.setdefault(key, CrawlMetrics()))
+        except Exception as e:
+            print(f"[pipeline] site={key} collect failed: {e!r}")
+            await asyncio.to_thread(_log_error, key, e)
+            results[key] = 0
+            return
+        stats["collect"].add(started)
+        rule = get_site_rule(key)
+        state = _SiteState(key=key, batch=batch, pending=len(batch.candidates) if rule else 0)
+        if not state.pending:
+            await write_q.put((state, None))
+            return
+
+        # Caps this site's fetched pages not yet accepted by parse_q, so a slow parse stage
+        # stalls fetching. Per site, so one slow publisher's bucket can't hold every slot.
+        inflight = asyncio.Semaphore(queue_size)
+
+        async def fetch_one(c: dict) -> None:
+            async with inflight:
+                t = time.perf_counter()
+                if needs_body(rule, c):
+                    html = await fetcher.get(c["url"], batch.metrics)
+                else:
+                    html = await fetcher.get_head(c["url"], batch.metrics)
+                    batch.metrics.count("head_only")
+                if html and archive is not None and isinstance(html, str):
+                    a = time.perf_counter()
+                    try:
+                        await asyncio.to_thread(archive.put, c["url_hash"], html)
+                        batch.metrics.observe("archive", time.perf_counter() - a)
+                    except Exception as e:
+                        # the page still goes on to parse/write; only `--reparse` loses it
+                        print(f"[pipeline] archive failed url={c['url']}: {e!r}")
+                        batch.metrics.count("archive_failed")
+                stats["fetch"].add(t)
+                await parse_q.put((state, c, html))
+
+        await asyncio.gather(*(fetch_one(c) for c in batch.candidates))
+
+    async def parse(pool: ProcessPoolExecutor) -> None:
+        while True:
+            item = await parse_q.get()
+            if item is None:
+                return
+            state, c, html = item
+            if html:
+                t = time.perf_counter()
+                try:
+                    parsed, seconds = await loop.run_in_executor(pool, _timed_parse_page, state.key, html)
+                    state.batch.metrics.observe("html_parse", seconds)
+                    apply_parsed(c, parsed)
+                except Exception as e:
+                    print(f"[pipeline] parse failed url={c['url']}: {e!r}")
+                stats["parse"].add(t)
+            await write_q.put((state, c))
+
+    async def write() -> None:
+        # One writer for the whole run: per-site counts in one place, short batched transactions
+        writer = ArticleWriter()
+        while True:
+            item = await write_q.get()
+            if item is None:
+                return
+            state, c = item
+            if c is not None:
+                state.pending -= 1
+            if state.pending > 0:
+                continue
+            # Site complete: write it in short multi-row batches, no network I/O inside
+            t = time.perf_counter()
+            try:
+                results[state.key] = await asyncio.to_thread(write_batch, state.batch, writer)
+            except Exception as e:
+                print(f"[pipeline] site={state.key} write failed: {e!r}")
+                results[state.key] = 0
+            stats["write"].add(t, len(state.batch.candidates))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parsers = [asyncio.create_task(parse(pool)) for _ in range(workers)]
+        writer = asyncio.create_task(write())
+        async with AsyncFetcher(
+            user_agent=UA,
+            concurrency=CONCURRENCY,
+            host_rate=HOST_RATE,
+            host_burst=HOST_BURST,
+        ) as fetcher:
+            await asyncio.gather(*(produce(key, fetcher) for key in site_keys))
+        for _ in parsers:
+            await parse_q.put(None)
+        await asyncio.gather(*parsers)
+        await write_q.put(None)
+        await writer
+    print("[pipeline] " + " ".join(st.summary() for st in stats.values()))
+    return results
+
+
+def crawl_sites(
+    site_keys: Optional[Iterable[str]] = None,
+    *,
+    limit: int = 100,
+    workers: Optional[int] = None,
+    queue_size: int = QUEUE_SIZE,
+    metrics: Optional[Dict[str, CrawlMetrics]] = None,
+) -> Dict[str, int]:
+    """Crawl several sites as one staged pipeline: fetch (async I/O) -> parse (process pool) -> write.
+
+    Returns {site_key: saved}. Feed polling and fetching overlap across sites; each
+    publisher is still rate-limited by its own token bucket. Pass a dict as `metrics` to
+    receive each site's CrawlMetrics (also stored on its crawl_logs row).
+    """
+    ensure_tables()
+    keys = list(site_keys or SITES.keys())
+    workers = max(1, workers or os.cpu_count() or 1)
+    metrics = metrics if metrics is not None else {}
+    return asyncio.run(_crawl(keys, limit, workers, max(1, queue_size), metrics))
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, update
+
+from .bodies import store_bodies
+from .db import bump_generation, session_scope
+from .engine import Revalidation, revalidate_many
+from .fetchers import (
+    CONCURRENCY,
+    FINGERPRINT_FIELDS,
+    HOST_BURST,
+    HOST_RATE,
+    UA,
+    UNSERVED_FIELDS,
+    article_changes,
+    article_fingerprint,
+    ensure_tables,
+    needs_body,
+)
+from .metrics import CrawlMetrics
+from .models import Article, ArticleCheck, CrawlLog
+from .rules import extract_from_html, get_site_rule
+from .search import reindex_changed
+from .sites import SITES
+
+
+# Articles fetched within this window are re-checked; older ones are considered settled
+RECHECK_WINDOW = timedelta(hours=float(os.getenv("CRAWLER_RECHECK_HOURS", "48")))
+# Bounds (seconds) of the gap between two checks of one article
+RECHECK_MIN = float(os.getenv("CRAWLER_RECHECK_MIN", "600"))
+RECHECK_MAX = float(os.getenv("CRAWLER_RECHECK_MAX", "21600"))
+# Articles re-checked per run
+RECHECK_BATCH = int(os.getenv("CRAWLER_RECHECK_BATCH", "200"))
+# Next check after this fraction of the article's age: ~10 checks over the first two days
+_DECAY = 0.5
+
+
+def next_check_delay(age: timedelta, changed: bool = False) -> float:
+    """Seconds until an article of `age` is checked again.
+
+    The gap grows with the article's age (corrections cluster in the first hours), so
+    checks thin out geometrically; a change just found brings the next check to the minimum.
+    """
+    if changed:
+        return RECHECK_MIN
+    return min(RECHECK_MAX, max(RECHECK_MIN, age.total_seconds() * _DECAY))
+
+
+def body_digest(body) -> int:
+    data = body.encode("utf-8") if isinstance(body, str) else body
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big", signed=True)
+
+
+def due_articles(s, site_names: List[str], now: datetime, limit: int) -> List:
+    """Recent articles whose next check is due (never-checked ones after RECHECK_MIN), oldest due first."""
+    due_at = func.coalesce(ArticleCheck.next_check_at, Article.fetched_at)
+    return (
+        s.query(
+            Article.id,
+            Article.site,
+            Article.url,
+            Article.fetched_at,
+            Article.fingerprint,
+            Article.revision,
+            *(getattr(Article, f) for f in FINGERPRINT_FIELDS),
+            ArticleCheck.article_id.label("check_id"),
+            ArticleCheck.etag,
+            ArticleCheck.last_modified,
+            ArticleCheck.body_hash,
+            ArticleCheck.checks,
+            ArticleCheck.changes,
+        )
+        .outerjoin(ArticleCheck, ArticleCheck.article_id == Article.id)
+        .filter(
+            Article.site.in_(site_names),
+            Article.fetched_at >= now - RECHECK_WINDOW,
+            (ArticleCheck.next_check_at <= now)
+            | (ArticleCheck.article_id.is_(None) & (Article.fetched_at <= now - timedelta(seconds=RECHECK_MIN))),
+        )
+        .order_by(due_at)
+        .limit(limit)
+        .all()
+    )
+
+
+def recheck(
+    site_keys: Optional[Iterable[str]] = None,
+    *,
+    limit: int = RECHECK_BATCH,
+    metrics: Optional[CrawlMetrics] = None,
+) -> int:
+    """Re-check recently stored articles and update the ones whose content changed.
+
+    Each due page is fetched with a conditional GET (stored ETag/Last-Modified). A 304, or a
+    body identical to the last one read, is not parsed; otherwise the site's rule runs over
+    the page and the row is updated only when the article fingerprint changes (revision +1,
+    revised_at). Every checked article gets its next check scheduled by next_check_delay().
+    Returns the number of updated articles.
+    """
+    ensure_tables()
+    metrics = metrics or CrawlMetrics()
+    keys = [k for k in (site_keys or SITES.keys()) if get_site_rule(k)]
+    by_name: Dict[str, str] = {SITES[k].name: k for k in keys}
+    now = datetime.utcnow()
+    with metrics.phase("dedup"), session_scope() as s:
+        rows = due_articles(s, list(by_name), now, limit) if by_name else []
+    if not rows:
+        return 0
+    # Same rule as enrichment: <head> alone is enough when the site's fields live in meta tags
+    head_only = {r.url for r in rows if not needs_body(get_site_rule(by_name[r.site]), {"summary": r.summary})}
+    results = revalidate_many(
+        ((r.url, r.etag, r.last_modified) for r in rows),
+        metrics,
+        head_only,
+        user_agent=UA,
+        concurrency=CONCURRENCY,
+        host_rate=HOST_RATE,
+        host_burst=HOST_BURST,
+    )
+    fixes: List[dict] = []
+    new_checks: List[dict] = []
+    old_checks: List[dict] = []
+    texts: Dict[int, Optional[str]] = {}
+    per_site: Dict[str, Counter] = defaultdict(Counter)
+    for r in rows:
+        res: Optional[Revalidation] = results.get(r.url)
+        check = {
+            "article_id": r.id,
+            "etag": r.etag,
+            "last_modified": r.last_modified,
+            "body_hash": r.body_hash,
+            "checks": (r.checks or 0) + 1,
+            "changes": r.changes or 0,
+            "checked_at": now,
+        }
+        fix: Optional[dict] = None
+        outcome = "unchanged"
+        if res is None:
+            outcome = "failed"
+        elif res.not_modified:
+            outcome = "not_modified"
+        else:
+            check["etag"] = res.etag
+            check["last_modified"] = res.last_modified
+            digest = body_digest(res.body or b"")
+            if digest == r.body_hash:
+                outcome = "same_body"
+            else:
+                check["body_hash"] = digest
+                with metrics.phase("html_parse"):
+                    parsed = extract_from_html(res.body, get_site_rule(by_name[r.site]))
+                fix = article_changes(r, parsed)
+                texts[r.id] = parsed.get("content")
+                if fix is not None and set(fix) != {"id", "fingerprint"}:
+                    outcome = "revised"
+                    fix.update(revision=(r.revision or 0) + 1, revised_at=now)
+                    check["changes"] += 1
+        if fix is None and r.fingerprint is None:
+            # backfill rows stored before fingerprints existed
+            fix = {"id": r.id, "fingerprint": article_fingerprint({f: getattr(r, f) for f in FINGERPRINT_FIELDS})}
+        if fix is not None:
+            fixes.append(fix)
+        metrics.count(f"recheck_{outcome}")
+        per_site[r.site][outcome] += 1
+        check["next_check_at"] = now + timedelta(seconds=next_check_delay(now - r.fetched_at, outcome == "revised"))
+        (old_checks if r.check_id is not None else new_checks).append(check)
+    with metrics.phase("db_write"), session_scope() as s:
+        if fixes:
+            s.execute(update(Article), fixes)
+            reindex_changed(s, fixes)
+        if old_checks:
+            s.execute(update(ArticleCheck), old_checks)
+        if new_checks:
+            s.execute(insert(ArticleCheck), new_checks)
+        # the text may change without touching any fingerprinted field; unchanged ones are skipped
+        store_bodies(s, texts)
+        for site, outcomes in per_site.items():
+            s.add(
+                CrawlLog(
+                    site=site,
+                    status="recheck",
+                    saved=outcomes["revised"],
+                    failed=outcomes["failed"],
+                    message=", ".join(f"{k}={n}" for k, n in sorted(outcomes.items())),
+                )
+            )
+    if any(set(f) - UNSERVED_FIELDS for f in fixes):
+        bump_generation()
+    revised = sum(o["revised"] for o in per_site.values())
+    print(f"[recheck] checked={len(rows)} revised={revised} {metrics.summary()}")
+    return revised
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+
+from .archive import ARCHIVE_DIR, HtmlArchive
+from .bodies import store_bodies
+from .db import bump_generation, session_scope
+from .fetchers import FINGERPRINT_FIELDS, UNSERVED_FIELDS, article_changes, ensure_tables
+from .models import Article
+from .rules import extract_from_html, get_site_rule
+from .search import reindex_changed
+from .sites import SITES
+from .writer import WRITE_BATCH
+
+
+def _reextract(job: Tuple[str, str, int]) -> Optional[dict]:
+    """Pool worker: load one archived page and run the site's current rule over it."""
+    root, site_key, url_hash = job
+    html = HtmlArchive(root).get(url_hash)
+    if not html:
+        return None
+    return extract_from_html(html, get_site_rule(site_key))
+
+
+def replay(
+    site_keys: Optional[Iterable[str]] = None,
+    *,
+    workers: Optional[int] = None,
+    batch_size: int = WRITE_BATCH,
+    archive_dir: str = ARCHIVE_DIR,
+) -> int:
+    """Re-run extract_from_html over archived pages and update changed Article rows.
+
+    No network access: pages come from the raw HTML archive (CRAWLER_ARCHIVE_DIR).
+    Parsing runs in a process pool; each batch of updates is one short transaction.
+    Returns the number of updated rows.
+    """
+    if not archive_dir:
+        raise SystemExit("replay needs an archive: set CRAWLER_ARCHIVE_DIR")
+    ensure_tables()
+    keys = [k for k in (site_keys or SITES.keys()) if get_site_rule(k)]
+    by_name: Dict[str, str] = {SITES[k].name: k for k in keys}
+    workers = max(1, workers or os.cpu_count() or 1)
+    scanned = updated = 0
+    last_id = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            with session_scope() as s:
+                rows: List = (
+                    s.query(Article.id, Article.site, Article.url_hash, Article.fingerprint, *(getattr(Article, f) for f in FINGERPRINT_FIELDS))
+                    .filter(Article.site.in_(list(by_name)), Article.id > last_id)
+                    .order_by(Article.id)
+                    .limit(batch_size)
+                    .all()
+                )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            scanned += len(rows)
+            jobs = [(archive_dir, by_name[r.site], r.url_hash) for r in rows]
+            fixes = []
+            texts = {}
+            for row, parsed in zip(rows, pool.map(_reextract, jobs, chunksize=16)):
+                if parsed:
+                    texts[row.id] = parsed.get("content")
+                    diff = article_changes(row, parsed)
+                    if diff:
+                        fixes.append(diff)
+            with session_scope() as s:
+                if fixes:
+                    s.execute(update(Article), fixes)
+                    reindex_changed(s, fixes)
+                # archived pages also (re)fill the stored article text
+                store_bodies(s, texts)
+            if any(set(f) - UNSERVED_FIELDS for f in fixes):
+                bump_generation()
+            updated += len(fixes)
+    print(f"[replay] sites={','.join(keys)} scanned={scanned} updated={updated}")
+    return updated
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, replace
 from datetime import datetime
 from typing import Optional, Dict, List
 
-from bs4 import BeautifulSoup
+from .extract import collect_meta, compile_rule, meta_lookup, parse_html, select_texts, text_of
 
 
 @dataclass(frozen=True)
@@ -13,6 +14,9 @@ class SiteRule:
     content_selectors: List[str]
     date_meta_props: List[str] = None  # e.g., ['article:published_time', 'og:article:published_time']
     image_meta_props: List[str] = None  # e.g., ['og:image']
+    # Only <head> fields are wanted (og:title, date/image meta): when the RSS entry already has a
+    # summary, the page is streamed only up to </head>. Title selectors then fall back to og:title.
+    head_only: bool = False
 
 
 def parse_datetime(dt_str: str) -> Optional[datetime]:
@@ -32,48 +36,52 @@ def parse_datetime(dt_str: str) -> Optional[datetime]:
     return None
 
 
-def extract_from_html(html: str, rule: SiteRule) -> Dict[str, Optional[str | datetime]]:
-    soup = BeautifulSoup(html, "lxml")
+def extract_from_html(html: str | bytes, rule: SiteRule) -> Dict[str, Optional[str | datetime]]:
+    doc = parse_html(html)
+    if doc is None:
+        return {"title": None, "content": None, "published_at": None, "image_url": None}
+    return extract_from_doc(doc, rule)
+
+
+def extract_from_doc(doc, rule: SiteRule) -> Dict[str, Optional[str | datetime]]:
+    """Extract fields from an already parsed lxml document (one tree per page)."""
     out: Dict[str, Optional[str | datetime]] = {
         "title": None,
         "content": None,
         "published_at": None,
         "image_url": None,
     }
+    compiled = compile_rule(rule)
+    meta = collect_meta(doc)
     # title
-    for sel in rule.title_selectors:
-        node = soup.select_one(sel)
-        if node and node.get_text(strip=True):
-            out["title"] = node.get_text(strip=True)
-            break
+    for sel in compiled.title:
+        nodes = sel(doc)
+        if nodes:
+            txt = text_of(nodes[0])
+            if txt:
+                out["title"] = txt
+                break
     if not out["title"]:
-        ogt = soup.find("meta", property="og:title") or soup.find("meta", attrs={"name":"og:title"})
-        if ogt and ogt.get("content"):
-            out["title"] = ogt["content"].strip()
+        ogt = meta_lookup(meta, "og:title")
+        if ogt:
+            out["title"] = ogt.strip()
     # content
-    parts: List[str] = []
-    for sel in rule.content_selectors:
-        for node in soup.select(sel):
-            txt = node.get_text(" ", strip=True)
-            if txt:
-                parts.append(txt)
-        if parts:
-            break
+    parts = select_texts(doc, compiled.content)
     if parts:
         out["content"] = "\n".join(parts)
     # date
-    for prop in (rule.date_meta_props or []):
-        meta = soup.find("meta", property=prop) or soup.find("meta", attrs={"name": prop})
-        if meta and meta.get("content"):
-            dt = parse_datetime(meta["content"]) 
+    for prop in compiled.date_meta_props:
+        value = meta_lookup(meta, prop)
+        if value:
+            dt = parse_datetime(value)
             if dt:
                 out["published_at"] = dt
                 break
     # image
-    for prop in (rule.image_meta_props or ["og:image"]):
-        meta = soup.find("meta", property=prop) or soup.find("meta", attrs={"name": prop})
-        if meta and meta.get("content"):
-            out["image_url"] = meta["content"].strip()
+    for prop in compiled.image_meta_props:
+        value = meta_lookup(meta, prop)
+        if value:
+            out["image_url"] = value.strip()
             break
     return out
 
@@ -152,6 +160,12 @@ RULES: Dict[str, SiteRule] = {
 }
 
 
+# Comma-separated site keys (or "all") switched to head-only enrichment at deploy time
+_HEAD_ONLY = {k.strip() for k in os.getenv("CRAWLER_HEAD_ONLY", "").split(",") if k.strip()}
+if _HEAD_ONLY:
+    RULES = {k: replace(r, head_only=True) if ("all" in _HEAD_ONLY or k in _HEAD_ONLY) else r for k, r in RULES.items()}
+
+
 def get_site_rule(key: str) -> Optional[SiteRule]:
     return RULES.get(key)
 
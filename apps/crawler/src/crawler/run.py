@@ -1,30 +1,114 @@
 from __future__ import annotations
 
 import argparse
-from typing import Optional
+import json
+import sys
+from typing import Dict, Optional
 
 from .sites import SITES
-from .fetchers import fetch_site
+from .fetchers import ensure_tables, fetch_site
+from .metrics import CrawlMetrics, metrics_document
+from .pipeline import crawl_sites
+from .refresh import recheck
+from .replay import replay
+from .scheduler import CrawlScheduler
+from .search import reindex
+from .workqueue import QueueWorker, enqueue_feeds
 
 
-def fetch_site_once(site_key: str, *, limit: int = 100) -> int:
+def fetch_site_once(site_key: str, *, limit: int = 100, metrics: Optional[CrawlMetrics] = None) -> int:
     cfg = SITES[site_key]
-    return fetch_site(cfg, limit=limit, site_key=site_key)
+    return fetch_site(cfg, limit=limit, site_key=site_key, metrics=metrics)
+
+
+def emit_metrics(doc: dict, dest: str) -> None:
+    """Write a metrics document as JSON to `dest` ("-" = one line on stdout)."""
+    if dest == "-":
+        print("[metrics] " + json.dumps(doc, separators=(",", ":")))
+        sys.stdout.flush()
+        return
+    with open(dest, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=2)
 
 
 def main(argv: Optional[list[str]] = None) -> int:
     p = argparse.ArgumentParser(description="Fetch news via RSS and persist to DB")
     p.add_argument("--site", choices=SITES.keys(), help="Specific site to fetch (default: all)", default=None)
     p.add_argument("--limit", type=int, default=100, help="Max items per site")
+    p.add_argument("--workers", type=int, default=None, help="Parse processes for multi-site/replay runs (default: CPU count)")
+    p.add_argument(
+        "--replay",
+        action="store_true",
+        help="Re-extract stored articles from the raw HTML archive (no network) and update changed rows",
+    )
+    p.add_argument(
+        "--recheck",
+        action="store_true",
+        help="Re-check recently stored articles (conditional GETs) and update the ones that changed",
+    )
+    p.add_argument(
+        "--reindex",
+        action="store_true",
+        help="Add stored articles missing from the search index (backfill after upgrading)",
+    )
+    p.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Run the adaptive scheduler: poll each site continuously at a rate learned from its feed",
+    )
+    p.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Queue feed tasks (all sites or --site) in crawl_tasks for --worker processes",
+    )
+    p.add_argument(
+        "--worker",
+        action="store_true",
+        help="Pull feed/page tasks from crawl_tasks until the queue is drained (run any number in parallel)",
+    )
+    p.add_argument("--forever", action="store_true", help="With --worker: keep polling the queue instead of exiting")
+    p.add_argument(
+        "--metrics",
+        metavar="PATH",
+        default=None,
+        help="Write per-site/per-phase crawl metrics as JSON to PATH ('-' for stdout)",
+    )
     args = p.parse_args(argv)
 
-    total = 0
+    if args.replay:
+        replay([args.site] if args.site else None, workers=args.workers)
+        return 0
+    if args.reindex:
+        ensure_tables()
+        print(f"Indexed {reindex()} articles")
+        return 0
+    if args.recheck:
+        metrics = {args.site or "recheck": CrawlMetrics()}
+        revised = recheck([args.site] if args.site else None, metrics=metrics[args.site or "recheck"])
+        if args.metrics:
+            emit_metrics(metrics_document(metrics, {args.site or "recheck": revised}), args.metrics)
+        print(f"Revised {revised} articles")
+        return 0
+    if args.enqueue:
+        print(f"Queued {enqueue_feeds([args.site] if args.site else None)} feeds")
+        return 0
+    if args.worker:
+        QueueWorker(limit=args.limit).run(forever=args.forever)
+        return 0
+    if args.daemon:
+        CrawlScheduler([args.site] if args.site else None, limit=args.limit).run_forever()
+        return 0
+
+    metrics: Dict[str, CrawlMetrics] = {}
     if args.site:
-        total += fetch_site_once(args.site, limit=args.limit)
+        metrics[args.site] = CrawlMetrics()
+        saved = {args.site: fetch_site_once(args.site, limit=args.limit, metrics=metrics[args.site])}
     else:
-        for key in SITES.keys():
-            total += fetch_site_once(key, limit=args.limit)
-    print(f"Saved {total} articles")
+        # All sites at once: staged fetch -> parse (process pool) -> write pipeline
+        saved = crawl_sites(SITES.keys(), limit=args.limit, workers=args.workers, metrics=metrics)
+    if args.metrics:
+        emit_metrics(metrics_document(metrics, saved), args.metrics)
+    print(f"Saved {sum(saved.values())} articles")
     return 0
 
 
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import heapq
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from .db import session_scope
+from .fetchers import collect_candidates, enrich_batch, ensure_tables, write_batch
+from .models import Article, CrawlLog
+from .refresh import recheck
+from .sites import SITES
+
+
+# Polling interval bounds (seconds) and the number of new entries we aim to find per poll
+POLL_MIN = float(os.getenv("CRAWLER_POLL_MIN", "120"))
+POLL_MAX = float(os.getenv("CRAWLER_POLL_MAX", "21600"))
+POLL_TARGET = float(os.getenv("CRAWLER_POLL_TARGET", "5"))
+SCHEDULER_WORKERS = int(os.getenv("CRAWLER_SCHEDULER_WORKERS", "4"))
+# How often the daemon runs a change-detection pass over recent articles (0 = never)
+RECHECK_EVERY = float(os.getenv("CRAWLER_RECHECK_EVERY", "300"))
+# Heap key of the recurring re-check job (not a site key)
+RECHECK_JOB = "@recheck"
+
+# Entries older than this do not count towards a feed's publish rate
+RATE_WINDOW = timedelta(hours=24)
+_ALPHA = 0.3  # EWMA weight of the newest rate observation
+_BACKOFF = 1.5  # interval growth when a poll tells us nothing (304, no dates, error)
+
+
+def observed_rate(timestamps: Iterable[Optional[datetime]], now: datetime, window: timedelta = RATE_WINDOW) -> Optional[float]:
+    """Entries per second published over the span the feed covers (at most `window`).
+
+    None when fewer than two dated entries fall inside the window.
+    """
+    recent = sorted(t for t in timestamps if t is not None and now - window <= t <= now + timedelta(minutes=5))
+    if len(recent) < 2:
+        return None
+    span = max((now - recent[0]).total_seconds(), 60.0)
+    return len(recent) / span
+
+
+@dataclass
+class FeedSchedule:
+    site_key: str
+    interval: float
+    rate: Optional[float] = None  # EWMA of entries/second
+    next_due: float = 0.0  # time.time()
+    polls: int = 0
+
+
+class CrawlScheduler:
+    """Long-running crawl daemon with a per-site polling interval learned from the feeds.
+
+    Sites sit in a heap keyed by next-due time. A due site is crawled on a worker thread
+    (collect -> enrich -> write, same as fetch_site), then re-queued. Its interval is
+    `target / rate`, where `rate` is an EWMA of the publish rate read from the feed's entry
+    timestamps, clamped to [min_interval, max_interval]. Unchanged feeds or failed polls back
+    off, and a poll where no entry was known yet (the feed rolled past unseen stories) halves
+    the interval. Every `recheck_every` seconds a crawler.refresh pass re-checks recent
+    articles for corrections.
+    """
+
+    def __init__(
+        self,
+        site_keys: Optional[Iterable[str]] = None,
+        *,
+        limit: int = 100,
+        workers: int = SCHEDULER_WORKERS,
+        min_interval: float = POLL_MIN,
+        max_interval: float = POLL_MAX,
+        target: float = POLL_TARGET,
+        recheck_every: float = RECHECK_EVERY,
+    ):
+        self.site_keys = list(site_keys or SITES.keys())
+        self.limit = limit
+        self.workers = max(1, workers)
+        self.min_interval = max(1.0, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self.target = max(1.0, target)
+        self.recheck_every = recheck_every
+        self.schedules: Dict[str, FeedSchedule] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._cond = threading.Condition()
+        self._stopping = False
+
+    def _clamp(self, seconds: float) -> float:
+        return min(self.max_interval, max(self.min_interval, seconds))
+
+    def seed(self) -> None:
+        """Initial rates from articles stored in the last RATE_WINDOW; every site is due now."""
+        now = datetime.utcnow()
+        by_name = {SITES[k].name: k for k in self.site_keys}
+        with session_scope() as s:
+            counts = dict(
+                s.query(Article.site, func.count(Article.id))
+                .filter(Article.site.in_(list(by_name)), Article.published_at >= now - RATE_WINDOW)
+                .group_by(Article.site)
+                .all()
+            )
+        start = time.time()
+        for i, key in enumerate(self.site_keys):
+            n = counts.get(SITES[key].name, 0)
+            rate = n / RATE_WINDOW.total_seconds() if n >= 2 else None
+            interval = self._clamp(self.target / rate) if rate else self.min_interval
+            # stagger the first round a little so sites don't all hit the DB at once
+            self._push(FeedSchedule(site_key=key, interval=interval, rate=rate, next_due=start + i * 2.0))
+        if self.recheck_every > 0:
+            self._push(FeedSchedule(site_key=RECHECK_JOB, interval=self.recheck_every, next_due=start + self.recheck_every))
+
+    def _push(self, sched: FeedSchedule) -> None:
+        with self._cond:
+            self.schedules[sched.site_key] = sched
+            heapq.heappush(self._heap, (sched.next_due, sched.site_key))
+            self._cond.notify()
+
+    def next_interval(self, sched: FeedSchedule, timestamps: List[Optional[datetime]], *, overflowed: bool) -> float:
+        obs = observed_rate(timestamps, datetime.utcnow())
+        if obs is not None:
+            sched.rate = obs if sched.rate is None else _ALPHA * obs + (1 - _ALPHA) * sched.rate
+            interval = self.target / sched.rate
+        else:
+            interval = sched.interval * _BACKOFF
+        if overflowed:
+            interval = min(interval, sched.interval / 2)
+        return self._clamp(interval)
+
+    def poll(self, key: str) -> Tuple[List[Optional[datetime]], bool]:
+        """Crawl one site once. Returns (entry timestamps seen, whether the feed overflowed)."""
+        batch = collect_candidates(SITES[key], limit=self.limit, site_key=key)
+        enrich_batch(batch)
+        write_batch(batch)
+        counts = batch.metrics.counts
+        overflowed = counts.get("candidates", 0) > 0 and counts.get("known", 0) == 0
+        return list(batch.poll.published), overflowed
+
+    def _run_one(self, sched: FeedSchedule) -> None:
+        if sched.site_key == RECHECK_JOB:
+            self._recheck(sched)
+            return
+        try:
+            timestamps, overflowed = self.poll(sched.site_key)
+            # nothing to compare against on the first poll of a fresh schedule
+            sched.interval = self.next_interval(sched, timestamps, overflowed=overflowed and sched.polls > 0)
+        except Exception as e:
+            print(f"[scheduler] site={sched.site_key} poll failed: {e!r}")
+            with session_scope() as s:
+                s.add(CrawlLog(site=SITES[sched.site_key].name, status="error", saved=0, failed=0, message=repr(e)[:1000]))
+            sched.interval = self._clamp(sched.interval * _BACKOFF)
+        sched.polls += 1
+        sched.next_due = time.time() + sched.interval
+        rate = f"{sched.rate * 3600:.1f}/h" if sched.rate else "-"
+        print(f"[scheduler] site={sched.site_key} rate={rate} next_in={sched.interval:.0f}s")
+        if not self._stopping:
+            self._push(sched)
+
+    def _recheck(self, sched: FeedSchedule) -> None:
+        try:
+            recheck(self.site_keys)
+        except Exception as e:
+            print(f"[scheduler] recheck failed: {e!r}")
+        sched.polls += 1
+        sched.next_due = time.time() + sched.interval
+        if not self._stopping:
+            self._push(sched)
+
+    def stop(self, *_args) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        """Poll due sites until stop() (or SIGTERM/SIGINT via run_forever); `max_polls` bounds a test run."""
+        ensure_tables()
+        if not self.schedules:
+            self.seed()
+        started = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while max_polls is None or started < max_polls:
+                with self._cond:
+                    while not self._stopping:
+                        wait = (self._heap[0][0] - time.time()) if self._heap else None
+                        if wait is not None and wait <= 0:
+                            break
+                        self._cond.wait(timeout=wait)
+                    if self._stopping:
+                        break
+                    _, key = heapq.heappop(self._heap)
+                    sched = self.schedules[key]
+                pool.submit(self._run_one, sched)
+                started += 1
+            # let in-flight polls finish but do not re-queue them
+            self._stopping = True
+
+    def run_forever(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        print(
+            f"[scheduler] sites={','.join(self.site_keys)} interval={self.min_interval:.0f}-{self.max_interval:.0f}s "
+            f"target={self.target:g}/poll workers={self.workers}"
+        )
+        self.run()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from .db import insert_ignore, session_scope
+from .dedup import CHUNK
+from .models import Article, SearchDoc, SearchPosting, SearchStats, SearchTerm
+
+
+MAX_TERM = 32
+# Title tokens count this many times, so a match in the headline outranks one in the summary
+TITLE_WEIGHT = 2
+
+# Runs of Hangul / Han (bigrammed) and of Latin letters or digits (whole words)
+_TOKEN_RUNS = re.compile(r"([가-힣ㄱ-ㆎ一-鿿]+)|([a-z0-9]+)")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Index/query tokens: character bigrams for Korean (and Han) runs, words for Latin/digits.
+
+    Bigrams need no morphological analysis and match inside compounds and particles
+    ("부동산을" -> 부동, 동산, 산을), which is what substring search gave us before. A single
+    Hangul character stays a unigram. Keep in sync with app.search.tokenize in the backend.
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    tokens: List[str] = []
+    for hangul, word in _TOKEN_RUNS.findall(text):
+        if hangul:
+            if len(hangul) == 1:
+                tokens.append(hangul)
+            else:
+                tokens.extend(hangul[i : i + 2] for i in range(len(hangul) - 1))
+        elif len(word) <= MAX_TERM:
+            tokens.append(word)
+    return tokens
+
+
+def document_terms(title: Optional[str], summary: Optional[str]) -> Counter:
+    """Term frequencies of one article (title tokens weighted by TITLE_WEIGHT)."""
+    tf: Counter = Counter()
+    for t in tokenize(title):
+        tf[t] += TITLE_WEIGHT
+    tf.update(tokenize(summary))
+    return tf
+
+
+def _term_ids(s: Session, terms: Iterable[str]) -> Dict[str, int]:
+    wanted = sorted(set(terms))
+    ids: Dict[str, int] = {}
+    for i in range(0, len(wanted), CHUNK):
+        chunk = wanted[i : i + CHUNK]
+        ids.update(s.execute(select(SearchTerm.term, SearchTerm.id).where(SearchTerm.term.in_(chunk))).all())
+    missing = [t for t in wanted if t not in ids]
+    if missing:
+        # concurrent writers may add the same term; the unique key keeps one row
+        s.execute(insert_ignore(s, SearchTerm.__table__, key="term"), [{"term": t, "df": 0} for t in missing])
+        for i in range(0, len(missing), CHUNK):
+            chunk = missing[i : i + CHUNK]
+            ids.update(s.execute(select(SearchTerm.term, SearchTerm.id).where(SearchTerm.term.in_(chunk))).all())
+    return ids
+
+
+def _bump(s: Session, df: Counter, docs: int, length: int) -> None:
+    if df:
+        # sorted ids: parallel writers lock term rows in the same order
+        terms = SearchTerm.__table__
+        s.execute(
+            update(terms).where(terms.c.id == bindparam("tid")).values(df=terms.c.df + bindparam("n")),
+            [{"tid": tid, "n": n} for tid, n in sorted(df.items()) if n],
+        )
+    if docs or length:
+        s.execute(insert_ignore(s, SearchStats.__table__, key="id"), [{"id": 1, "docs": 0, "total_length": 0}])
+        s.execute(
+            update(SearchStats)
+            .where(SearchStats.id == 1)
+            .values(docs=SearchStats.docs + docs, total_length=SearchStats.total_length + length)
+        )
+
+
+def _unindex(s: Session, article_ids: List[int]) -> None:
+    """Remove documents from the index, decrementing df and corpus totals."""
+    df: Counter = Counter()
+    docs = length = 0
+    for i in range(0, len(article_ids), CHUNK):
+        chunk = article_ids[i : i + CHUNK]
+        for (tid,) in s.execute(select(SearchPosting.term_id).where(SearchPosting.article_id.in_(chunk))):
+            df[tid] -= 1
+        for (n,) in s.execute(select(SearchDoc.length).where(SearchDoc.article_id.in_(chunk))):
+            docs -= 1
+            length -= n
+        s.execute(delete(SearchPosting).where(SearchPosting.article_id.in_(chunk)))
+        s.execute(delete(SearchDoc).where(SearchDoc.article_id.in_(chunk)))
+    _bump(s, df, docs, length)
+
+
+def index_documents(s: Session, docs: Dict[int, Tuple[Optional[str], Optional[str]]], *, replace: bool = False) -> int:
+    """Add `{article_id: (title, summary)}` to the search index inside the caller's transaction.
+
+    Already indexed articles are skipped, or re-indexed with `replace` (edited title/summary).
+    Postings, document frequencies and corpus totals are all updated incrementally.
+    Returns the number of documents indexed.
+    """
+    if not docs:
+        return 0
+    ids = list(docs)
+    if replace:
+        _unindex(s, ids)
+    else:
+        indexed = set()
+        for i in range(0, len(ids), CHUNK):
+            chunk = ids[i : i + CHUNK]
+            indexed.update(aid for (aid,) in s.execute(select(SearchDoc.article_id).where(SearchDoc.article_id.in_(chunk))))
+        ids = [aid for aid in ids if aid not in indexed]
+    terms = {aid: document_terms(*docs[aid]) for aid in ids}
+    term_ids = _term_ids(s, (t for tf in terms.values() for t in tf))
+    postings = []
+    df: Counter = Counter()
+    total = 0
+    for aid, tf in terms.items():
+        for term, n in tf.items():
+            postings.append({"term_id": term_ids[term], "article_id": aid, "tf": n})
+            df[term_ids[term]] += 1
+        total += sum(tf.values())
+    if postings:
+        s.execute(insert(SearchPosting), postings)
+    if ids:
+        s.execute(insert(SearchDoc), [{"article_id": aid, "length": sum(terms[aid].values())} for aid in ids])
+    _bump(s, df, len(ids), total)
+    return len(ids)
+
+
+def reindex_changed(s: Session, updates: List[dict]) -> None:
+    """Re-index articles whose title or summary an `update(Article)` parameter list changed."""
+    changed = [u["id"] for u in updates if "title" in u or "summary" in u]
+    if changed:
+        rows = s.query(Article.id, Article.title, Article.summary).filter(Article.id.in_(changed))
+        index_documents(s, {r.id: (r.title, r.summary) for r in rows}, replace=True)
+
+
+def reindex(batch_size: int = 500) -> int:
+    """Index stored articles that are not in the search index yet (backfill). Returns count."""
+    done = 0
+    last_id = 0
+    while True:
+        with session_scope() as s:
+            rows = (
+                s.query(Article.id, Article.title, Article.summary)
+                .outerjoin(SearchDoc, SearchDoc.article_id == Article.id)
+                .filter(SearchDoc.article_id.is_(None), Article.id > last_id)
+                .order_by(Article.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            last_id = rows[-1].id
+            done += index_documents(s, {r.id: (r.title, r.summary) for r in rows})
+    print(f"[search] indexed={done}")
+    return done
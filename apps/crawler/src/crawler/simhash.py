@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import re
+import threading
+import unicodedata
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+BITS = 64
+# 4 bands x 16 bits: any two signatures within Hamming distance 3 share at least one band
+BANDS = 4
+BAND_BITS = BITS // BANDS
+MAX_DISTANCE = 3
+SHINGLE = 3
+MIN_CHARS = 12
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    # Drop punctuation/whitespace: Korean headlines vary mostly in spacing and brackets
+    return _NON_WORD.sub("", text)
+
+
+def _to_signed(v: int) -> int:
+    return v - (1 << BITS) if v >= 1 << (BITS - 1) else v
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-bit SimHash over character shingles of the normalized text (signed, BIGINT-sized).
+
+    Returns None when the text is too short to fingerprint meaningfully.
+    """
+    norm = normalize_text(text)
+    if len(norm) < MIN_CHARS:
+        return None
+    shingles = {norm[i : i + SHINGLE] for i in range(len(norm) - SHINGLE + 1)}
+    counts = [0] * BITS
+    for sh in shingles:
+        h = int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big")
+        for i in range(BITS):
+            counts[i] += 1 if (h >> i) & 1 else -1
+    v = 0
+    for i, c in enumerate(counts):
+        if c > 0:
+            v |= 1 << i
+    return _to_signed(v)
+
+
+def article_simhash(title: str, summary: Optional[str]) -> Optional[int]:
+    return simhash(f"{title or ''} {summary or ''}")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << BITS) - 1)).count("1")
+
+
+class NearDupIndex:
+    """In-memory banded SimHash index: exact lookups per 16-bit band, then a Hamming check.
+
+    Each entry maps a signature to (article_id, cluster_id); cluster_id is None for the
+    first article of a cluster (the representative). An article is indexed once; entries
+    added with a timestamp can be evicted with prune(). Safe to share between threads.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.max_distance = max_distance
+        self._bands: List[Dict[int, List[Tuple[int, int, Optional[int]]]]] = [{} for _ in range(BANDS)]
+        self._entries: Dict[int, Tuple[int, Optional[int]]] = {}
+        self._expiry: List[Tuple[datetime, int]] = []
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, article_id: int) -> bool:
+        return article_id in self._entries
+
+    @staticmethod
+    def _band_keys(sig: int):
+        u = sig & ((1 << BITS) - 1)
+        mask = (1 << BAND_BITS) - 1
+        for b in range(BANDS):
+            yield b, (u >> (b * BAND_BITS)) & mask
+
+    def add(self, sig: int, article_id: int, cluster_id: Optional[int] = None, at: Optional[datetime] = None) -> None:
+        """Index `article_id` (no-op if already there); `at` (fetch time) makes it prunable."""
+        with self._lock:
+            if article_id in self._entries:
+                return
+            self._entries[article_id] = (sig, cluster_id)
+            for b, key in self._band_keys(sig):
+                self._bands[b].setdefault(key, []).append((sig, article_id, cluster_id))
+            if at is not None:
+                heapq.heappush(self._expiry, (at, article_id))
+
+    def prune(self, before: datetime) -> int:
+        """Drop entries added with a timestamp older than `before`. Returns how many."""
+        dropped = 0
+        with self._lock:
+            while self._expiry and self._expiry[0][0] < before:
+                _, article_id = heapq.heappop(self._expiry)
+                sig, cluster_id = self._entries.pop(article_id)
+                for b, key in self._band_keys(sig):
+                    bucket = self._bands[b][key]
+                    bucket.remove((sig, article_id, cluster_id))
+                    if not bucket:
+                        del self._bands[b][key]
+                dropped += 1
+        return dropped
+
+    def find(self, sig: int) -> Optional[Tuple[int, Optional[int]]]:
+        """Return (article_id, cluster_id) of the closest match within max_distance."""
+        best: Optional[Tuple[int, int, Optional[int]]] = None
+        with self._lock:
+            for b, key in self._band_keys(sig):
+                for other, article_id, cluster_id in self._bands[b].get(key, ()):
+                    d = hamming(sig, other)
+                    if d <= self.max_distance and (best is None or d < best[0]):
+                        best = (d, article_id, cluster_id)
+        return (best[1], best[2]) if best else None
+
+    def cluster_for(self, sig: Optional[int]) -> Optional[int]:
+        """Cluster (representative article id) a new signature belongs to, if any."""
+        if sig is None:
+            return None
+        match = self.find(sig)
+        if match is None:
+            return None
+        article_id, cluster_id = match
+        return cluster_id or article_id
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Iterable, List, Optional
+
+import httpx
+
+from .metrics import CrawlMetrics
+
+
+# Backend base URL (e.g. http://backend:8000) whose /images proxy is warmed right after
+# new articles are stored; unset = disabled
+THUMB_PREWARM = os.getenv("CRAWLER_THUMB_PREWARM", "").rstrip("/")
+# Card widths to render ahead of the first reader; keep in line with the web thumbUrl() default
+# (the proxy rounds up to its width buckets)
+THUMB_WIDTHS = [int(w) for w in os.getenv("CRAWLER_THUMB_WIDTHS", "640").split(",") if w.strip()]
+THUMB_CONCURRENCY = int(os.getenv("CRAWLER_THUMB_CONCURRENCY", "4"))
+
+
+def prewarm_thumbnails(
+    article_ids: Iterable[int],
+    metrics: Optional[CrawlMetrics] = None,
+    *,
+    base_url: str = THUMB_PREWARM,
+    widths: List[int] = THUMB_WIDTHS,
+    timeout: float = 15.0,
+) -> int:
+    """Request each article's resized image from the backend proxy so it is cached before
+    the feed is read. Best effort: failures are only counted. Returns variants warmed."""
+    ids = list(dict.fromkeys(article_ids))
+    if not base_url or not ids or not widths:
+        return 0
+    metrics = metrics or CrawlMetrics()
+
+    async def _run() -> int:
+        sem = asyncio.Semaphore(max(1, THUMB_CONCURRENCY))
+        # the web app asks for WebP; warm the variant it will actually request
+        async with httpx.AsyncClient(timeout=timeout, headers={"Accept": "image/webp,image/*"}) as client:
+
+            async def one(aid: int, width: int) -> bool:
+                async with sem:
+                    try:
+                        r = await client.get(f"{base_url}/images/articles/{aid}", params={"w": width})
+                        return r.is_success
+                    except httpx.HTTPError:
+                        return False
+
+            done = await asyncio.gather(*(one(aid, w) for aid in ids for w in widths))
+        return sum(done)
+
+    with metrics.phase("thumb_prewarm"):
+        warmed = asyncio.run(_run())
+    metrics.count("thumbs_warmed", warmed)
+    metrics.count("thumbs_failed", len(ids) * len(widths) - warmed)
+    return warmed
@@ -0,0 +1,379 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, func, or_, update
+
+from .db import insert_ignore, session_scope
+from .fetchers import (
+    SiteBatch,
+    collect_candidates,
+    enrich_batch,
+    ensure_tables,
+    save_feed_states,
+    write_batch,
+)
+from .models import CrawlLog, CrawlTask
+from .rules import get_site_rule
+from .sites import SITES
+from .urls import url_hash
+
+
+# Lease length (s) a worker holds a task before others may take it over; heartbeats extend it
+LEASE_SECONDS = int(os.getenv("CRAWLER_LEASE_SECONDS", "120"))
+# Tasks claimed per lease call
+LEASE_BATCH = int(os.getenv("CRAWLER_LEASE_BATCH", "20"))
+# Claims per task before it is marked failed (a crashing worker also uses up an attempt)
+TASK_ATTEMPTS = int(os.getenv("CRAWLER_TASK_ATTEMPTS", "3"))
+# Finished page tasks are kept this long (re-enqueueing a known page is a no-op meanwhile)
+TASK_RETENTION = timedelta(days=7)
+
+
+@dataclass(frozen=True)
+class LeasedTask:
+    id: int
+    kind: str
+    site: str
+    url: str
+    url_hash: int
+    payload: Optional[str]
+
+
+@dataclass
+class Lease:
+    token: str  # owner written into lease_owner; needed to heartbeat/complete/fail
+    tasks: List[LeasedTask]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _claimable(now: datetime, max_attempts: int):
+    return and_(
+        CrawlTask.attempts < max_attempts,
+        or_(
+            CrawlTask.status == "pending",
+            and_(CrawlTask.status == "leased", CrawlTask.lease_expires_at < now),
+        ),
+    )
+
+
+def enqueue_feeds(site_keys: Optional[Iterable[str]] = None) -> int:
+    """Queue one feed task per RSS URL of each site. Finished feed tasks are re-opened; a feed
+    still leased by a worker is left alone. Returns the number of feed URLs queued."""
+    ensure_tables()
+    now = datetime.utcnow()
+    rows = [
+        {"kind": "feed", "site": key, "url": url, "url_hash": url_hash(url), "status": "pending", "attempts": 0}
+        for key in (site_keys or SITES.keys())
+        for url in SITES[key].rss
+    ]
+    if not rows:
+        return 0
+    with session_scope() as s:
+        s.execute(insert_ignore(s, CrawlTask.__table__), rows)
+        s.execute(
+            update(CrawlTask)
+            .where(
+                CrawlTask.kind == "feed",
+                CrawlTask.url_hash.in_([r["url_hash"] for r in rows]),
+                or_(
+                    CrawlTask.status.in_(("done", "failed")),
+                    and_(CrawlTask.status == "leased", CrawlTask.lease_expires_at < now),
+                ),
+            )
+            .values(status="pending", attempts=0, lease_owner=None, lease_expires_at=None, last_error=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        s.query(CrawlTask).filter(
+            CrawlTask.kind == "page", CrawlTask.status == "done", CrawlTask.updated_at < now - TASK_RETENTION
+        ).delete(synchronize_session=False)
+    return len(rows)
+
+
+def _payload(c: dict) -> str:
+    data = dict(c)
+    if data.get("published_at") is not None:
+        data["published_at"] = data["published_at"].isoformat()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _candidate(payload: str) -> dict:
+    c = json.loads(payload)
+    if c.get("published_at"):
+        c["published_at"] = datetime.fromisoformat(c["published_at"])
+    return c
+
+
+def enqueue_pages(s, site_key: str, candidates: Sequence[dict]) -> int:
+    """Queue one page task per candidate in the caller's transaction; known URLs are skipped."""
+    rows = [
+        {
+            "kind": "page",
+            "site": site_key,
+            "url": c["url"][:1024],
+            "url_hash": c["url_hash"],
+            "payload": _payload(c),
+            "status": "pending",
+            "attempts": 0,
+        }
+        for c in candidates
+    ]
+    if rows:
+        s.execute(insert_ignore(s, CrawlTask.__table__), rows)
+    return len(rows)
+
+
+def lease(
+    worker_id: str,
+    *,
+    limit: int = LEASE_BATCH,
+    lease_seconds: int = LEASE_SECONDS,
+    kinds: Sequence[str] = ("feed", "page"),
+    max_attempts: int = TASK_ATTEMPTS,
+) -> Lease:
+    """Claim up to `limit` pending (or lease-expired) tasks for `worker_id`.
+
+    Claiming is a conditional UPDATE keyed on the task ids, so two workers racing for the
+    same rows cannot both win one: each row ends up with exactly one lease token.
+    """
+    now = datetime.utcnow()
+    token = f"{worker_id}/{uuid.uuid4().hex[:12]}"
+    claimable = _claimable(now, max_attempts)
+    with session_scope() as s:
+        # leases that expired on their last attempt (worker kept dying): give up on them
+        s.execute(
+            update(CrawlTask)
+            .where(CrawlTask.status == "leased", CrawlTask.lease_expires_at < now, CrawlTask.attempts >= max_attempts)
+            .values(status="failed", last_error="lease expired", updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+    with session_scope() as s:
+        ids = [
+            i
+            for (i,) in s.query(CrawlTask.id)
+            .filter(claimable, CrawlTask.kind.in_(list(kinds)))
+            .order_by(CrawlTask.id)
+            .limit(limit * 4)
+        ]
+        if not ids:
+            return Lease(token, [])
+        # sample from the oldest tasks so concurrent workers mostly go for different rows
+        ids = random.sample(ids, min(limit, len(ids)))
+        s.execute(
+            update(CrawlTask)
+            .where(CrawlTask.id.in_(ids), claimable)
+            .values(
+                status="leased",
+                lease_owner=token,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=CrawlTask.attempts + 1,
+                updated_at=now,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    with session_scope() as s:
+        rows = (
+            s.query(CrawlTask.id, CrawlTask.kind, CrawlTask.site, CrawlTask.url, CrawlTask.url_hash, CrawlTask.payload)
+            .filter(CrawlTask.lease_owner == token, CrawlTask.status == "leased")
+            .order_by(CrawlTask.id)
+            .all()
+        )
+    return Lease(token, [LeasedTask(*r) for r in rows])
+
+
+def heartbeat(token: str, lease_seconds: int = LEASE_SECONDS) -> int:
+    """Extend every task still held under `token`. Returns how many are still held."""
+    now = datetime.utcnow()
+    with session_scope() as s:
+        result = s.execute(
+            update(CrawlTask)
+            .where(CrawlTask.lease_owner == token, CrawlTask.status == "leased")
+            .values(lease_expires_at=now + timedelta(seconds=lease_seconds), updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+def complete(token: str, task_ids: Iterable[int]) -> int:
+    """Mark tasks done if `token` still holds them. Safe to repeat; a lease lost to another
+    worker is not overwritten (its result was written idempotently anyway)."""
+    ids = list(task_ids)
+    if not ids:
+        return 0
+    now = datetime.utcnow()
+    with session_scope() as s:
+        result = s.execute(
+            update(CrawlTask)
+            .where(CrawlTask.id.in_(ids), CrawlTask.lease_owner == token, CrawlTask.status == "leased")
+            .values(status="done", lease_expires_at=None, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+
+def fail(token: str, task_ids: Iterable[int], error: str, max_attempts: int = TASK_ATTEMPTS) -> None:
+    """Release tasks after an error: back to pending, or failed once out of attempts."""
+    ids = list(task_ids)
+    if not ids:
+        return
+    now = datetime.utcnow()
+    with session_scope() as s:
+        held = (CrawlTask.id.in_(ids), CrawlTask.lease_owner == token, CrawlTask.status == "leased")
+        for status, cond in (("failed", CrawlTask.attempts >= max_attempts), ("pending", CrawlTask.attempts < max_attempts)):
+            s.execute(
+                update(CrawlTask)
+                .where(*held, cond)
+                .values(status=status, lease_owner=None, lease_expires_at=None, last_error=error[:1000], updated_at=now)
+                .execution_options(synchronize_session=False)
+            )
+
+
+def outstanding() -> int:
+    """Tasks not finished yet: pending, or leased (possibly by a worker that died)."""
+    with session_scope() as s:
+        return (
+            s.query(func.count(CrawlTask.id))
+            .filter(CrawlTask.status.in_(("pending", "leased")), CrawlTask.attempts < TASK_ATTEMPTS)
+            .scalar()
+        )
+
+
+def queue_stats() -> Dict[str, Dict[str, int]]:
+    """{kind: {status: count}}"""
+    with session_scope() as s:
+        rows = s.query(CrawlTask.kind, CrawlTask.status, func.count(CrawlTask.id)).group_by(CrawlTask.kind, CrawlTask.status)
+        stats: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for kind, status, n in rows:
+            stats[kind][status] = n
+        return dict(stats)
+
+
+class Heartbeat:
+    """Background thread that keeps a lease alive while its tasks are being worked on."""
+
+    def __init__(self, token: str, lease_seconds: int = LEASE_SECONDS):
+        self.token = token
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._beat, name=f"heartbeat-{token}", daemon=True)
+
+    def _beat(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                heartbeat(self.token, self.lease_seconds)
+            except Exception as e:  # a missed beat only shortens the lease
+                print(f"[queue] heartbeat failed token={self.token}: {e!r}")
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class QueueWorker:
+    """Pulls feed/page tasks from crawl_tasks until the queue is drained (or forever).
+
+    A feed task polls one RSS URL and queues a page task per new candidate (or, for sites
+    without a rule, writes the entries directly). Page tasks are leased in batches, fetched
+    concurrently, enriched and written per site with the usual dedup re-check, so a task
+    retried after a crash never stores an article twice.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        *,
+        limit: int = 100,
+        batch: int = LEASE_BATCH,
+        lease_seconds: int = LEASE_SECONDS,
+    ):
+        self.worker_id = worker_id or default_worker_id()
+        self.limit = limit
+        self.batch = max(1, batch)
+        self.lease_seconds = lease_seconds
+        self.processed = 0
+
+    def run_once(self) -> int:
+        """Lease one batch and work it. Returns the number of tasks handled (0 = nothing to do)."""
+        held = lease(self.worker_id, limit=self.batch, lease_seconds=self.lease_seconds)
+        if not held.tasks:
+            return 0
+        with Heartbeat(held.token, self.lease_seconds):
+            for task in (t for t in held.tasks if t.kind == "feed"):
+                self._guarded(held.token, [task], self._run_feed, task)
+            pages: Dict[str, List[LeasedTask]] = defaultdict(list)
+            for task in held.tasks:
+                if task.kind == "page":
+                    pages[task.site].append(task)
+            for site_key, tasks in pages.items():
+                self._guarded(held.token, tasks, self._run_pages, site_key, tasks)
+        self.processed += len(held.tasks)
+        return len(held.tasks)
+
+    def _guarded(self, token: str, tasks: List[LeasedTask], fn, *args) -> None:
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[queue] worker={self.worker_id} {tasks[0].kind} task failed site={tasks[0].site}: {e!r}")
+            fail(token, (t.id for t in tasks), repr(e))
+            return
+        complete(token, (t.id for t in tasks))
+
+    def _run_feed(self, task: LeasedTask) -> None:
+        config = replace(SITES[task.site], rss=[task.url])
+        batch = collect_candidates(config, limit=self.limit, site_key=task.site)
+        if get_site_rule(task.site) is None or not batch.candidates:
+            write_batch(batch)  # nothing to fetch: store RSS-only rows / record unchanged
+            return
+        with session_scope() as s:
+            queued = enqueue_pages(s, task.site, batch.candidates)
+            # page tasks are durable now, so the feed counts as read
+            save_feed_states(s, batch.poll.states)
+            s.add(
+                CrawlLog(
+                    site=config.name,
+                    status="ok",
+                    saved=0,
+                    failed=batch.failed,
+                    message=f"queued {queued} pages",
+                    metrics=batch.metrics.to_json(),
+                )
+            )
+        print(f"[queue] worker={self.worker_id} site={task.site} queued={queued}")
+
+    def _run_pages(self, site_key: str, tasks: List[LeasedTask]) -> None:
+        candidates = [_candidate(t.payload) for t in tasks if t.payload]
+        batch = SiteBatch(config=SITES[site_key], site_key=site_key, poll=None, candidates=candidates)
+        enrich_batch(batch)
+        write_batch(batch)
+
+    def run(self, *, forever: bool = False, idle_sleep: float = 5.0) -> int:
+        """Work until the queue is drained (or forever, polling every `idle_sleep` s).
+
+        Drained means nothing pending or leased: tasks held by other workers are waited for,
+        so a task whose worker died is picked up here once its lease expires.
+        """
+        ensure_tables()
+        while True:
+            if self.run_once():
+                continue
+            if not forever and not outstanding():
+                break
+            time.sleep(idle_sleep)
+        print(f"[queue] worker={self.worker_id} processed={self.processed} stats={queue_stats()}")
+        return self.processed
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .bodies import store_bodies
+from .db import bump_generation, insert_ignore, session_scope
+from .dedup import known_url_hashes, near_dup_index
+from .models import Article
+from .search import index_documents
+from .simhash import NearDupIndex
+
+
+# Rows per multi-row INSERT (one short transaction each)
+WRITE_BATCH = int(os.getenv("CRAWLER_WRITE_BATCH", "200"))
+
+_COLUMNS = (
+    "site",
+    "url",
+    "url_hash",
+    "title",
+    "summary",
+    "author",
+    "category",
+    "image_url",
+    "published_at",
+    "fetched_at",
+    "simhash",
+    "cluster_id",
+    "fingerprint",
+)
+
+
+class ArticleWriter:
+    """Buffers new article rows and writes them in short multi-row transactions.
+
+    Rows (dicts with Article columns plus `site`) are flushed every `batch_size` rows or
+    on flush(). A failing batch is retried row by row inside savepoints, so one bad row
+    only costs itself. Per-site outcomes accumulate in `saved` / `failed` (and `with_images`).
+    """
+
+    def __init__(self, batch_size: int = WRITE_BATCH):
+        self.batch_size = max(1, batch_size)
+        self.saved: Dict[str, int] = defaultdict(int)
+        self.failed: Dict[str, int] = defaultdict(int)
+        # ids of stored rows that have an image_url, per site (thumbnail pre-warming)
+        self.with_images: Dict[str, List[int]] = defaultdict(list)
+        self._buffer: List[dict] = []
+        self._near_dups: Optional[NearDupIndex] = None
+
+    def add(self, row: dict) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        while self._buffer:
+            rows, self._buffer = self._buffer[: self.batch_size], self._buffer[self.batch_size :]
+            with session_scope() as s:
+                written = self._write(s, rows)
+            if written:
+                bump_generation()
+
+    def _write(self, s: Session, rows: List[dict]) -> int:
+        """Insert `rows` in the caller's transaction. Returns how many were stored."""
+        # shared by all writers of the process, caught up with other processes' rows
+        self._near_dups = near_dup_index(s)
+        # Last-moment check in the same transaction; the upsert still guards against races
+        existing = known_url_hashes(s, (r["url_hash"] for r in rows))
+        fresh: Dict[int, dict] = {}
+        for r in rows:
+            if r["url_hash"] not in existing and r["url_hash"] not in fresh:
+                fresh[r["url_hash"]] = r
+        rows = list(fresh.values())
+        if not rows:
+            return 0
+        now = datetime.utcnow()
+        for r in rows:
+            r.setdefault("fetched_at", now)
+            r["cluster_id"] = self._near_dups.cluster_for(r.get("simhash"))
+        values = [{c: r.get(c) for c in _COLUMNS} for r in rows]
+        stmt = insert_ignore(s, Article.__table__)
+        # Only rows this INSERT wrote are reported, not ones a concurrent writer stored
+        # after `known_url_hashes` (those are skipped by the unique key)
+        returning = s.get_bind().dialect.insert_executemany_returning
+        if returning:
+            stmt = stmt.returning(Article.__table__.c.url_hash, Article.__table__.c.id)
+        inserted: Dict[int, int] = {}
+        try:
+            with s.begin_nested():
+                inserted.update(self._insert(s, stmt, values, returning))
+            written = rows
+        except Exception:
+            written = []
+            for r, v in zip(rows, values):
+                try:
+                    with s.begin_nested():
+                        inserted.update(self._insert(s, stmt, [v], returning))
+                    written.append(r)
+                except Exception:
+                    self.failed[r["site"]] += 1
+        written = [r for r in written if r["url_hash"] in inserted]
+        self._link_clusters(s, written, inserted)
+        # article text lives in the compressed side table, keyed by the new ids
+        store_bodies(s, {inserted[r["url_hash"]]: r.get("content") for r in written})
+        # search index, same transaction
+        index_documents(s, {inserted[r["url_hash"]]: (r["title"], r.get("summary")) for r in written})
+        return len(written)
+
+    @staticmethod
+    def _insert(s: Session, stmt, values: List[dict], returning: bool) -> Dict[int, int]:
+        """Run the upsert, returning {url_hash: id} of the rows it actually inserted.
+
+        Without RETURNING the rows go one statement each: an insert reports its id in
+        `lastrowid`, while a row skipped by the unique key affects nothing (SQLite) or
+        generates no id (MySQL's no-op ON DUPLICATE KEY UPDATE), whatever the isolation level.
+        """
+        if returning:
+            return dict(s.execute(stmt, values).all())
+        ids = {}
+        for v in values:
+            result = s.execute(stmt, v)
+            if result.rowcount == 1 and result.lastrowid:
+                ids[v["url_hash"]] = result.lastrowid
+        return ids
+
+    def _link_clusters(self, s: Session, rows: List[dict], ids: Dict[int, int]) -> None:
+        """Count the rows this writer inserted (`ids`: {url_hash: id}), register them in the
+        near-dup index and fix cluster_id for rows that duplicate an earlier row of the batch."""
+        fixes = []
+        for r in rows:
+            article_id = ids[r["url_hash"]]
+            self.saved[r["site"]] += 1
+            if r.get("image_url"):
+                self.with_images[r["site"]].append(article_id)
+            sig = r.get("simhash")
+            if sig is None:
+                continue
+            cluster_id = self._near_dups.cluster_for(sig)
+            if cluster_id != r["cluster_id"]:
+                fixes.append({"id": article_id, "cluster_id": cluster_id})
+            self._near_dups.add(sig, article_id, cluster_id, at=r["fetched_at"])
+        if fixes:
+            s.execute(update(Article), fixes)
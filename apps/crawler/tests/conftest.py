@@ -0,0 +1,26 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# crawler.db builds its engine at import: point it at a throwaway SQLite file first
+_DB_FILE = Path(tempfile.mkdtemp(prefix="crawler-test-")) / "test.db"
+os.environ["CRAWLER_DATABASE_URL"] = f"sqlite:///{_DB_FILE}"
+os.environ.pop("CRAWLER_ARCHIVE_DIR", None)
+os.environ.pop("CRAWLER_THUMB_PREWARM", None)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from crawler.db import Base, engine  # noqa: E402
+from crawler import models  # noqa: E402,F401  (registers the tables)
+from crawler.dedup import reset_near_dup_index  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def db():
+    """Fresh schema for every test."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    reset_near_dup_index()
+    yield engine
@@ -0,0 +1,109 @@
+import asyncio
+
+import httpx
+import pytest
+
+from crawler.engine import AsyncFetcher, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _acquire(bucket: TokenBucket, n: int) -> None:
+    async def run():
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(run())
+
+
+def test_bucket_allows_a_burst_then_paces_at_the_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+    _acquire(bucket, 3)
+    assert clock.sleeps == []
+    _acquire(bucket, 3)
+    assert clock.sleeps == pytest.approx([0.5, 0.5, 0.5])
+    assert clock.now == pytest.approx(1.5)
+
+
+def test_bucket_refills_while_idle_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=4, capacity=2, clock=clock, sleep=clock.sleep)
+    _acquire(bucket, 2)
+    clock.now += 0.25  # one token back
+    _acquire(bucket, 1)
+    assert clock.sleeps == []
+    clock.now += 100  # a long idle period still only refills `capacity`
+    _acquire(bucket, 3)
+    assert clock.sleeps == pytest.approx([0.25])
+
+
+def test_bucket_capacity_below_one_still_admits_requests():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=10, capacity=0, clock=clock, sleep=clock.sleep)
+    _acquire(bucket, 3)
+    assert clock.sleeps == pytest.approx([0.1, 0.1])
+
+
+class ChunkStream(httpx.AsyncByteStream):
+    """Endless body (or `chunks` then EOF) that records how much was read and whether it was closed."""
+
+    def __init__(self, chunks, filler: bytes = b""):
+        self.chunks = list(chunks)
+        self.filler = filler
+        self.read = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.read += 1
+            yield chunk
+        while self.filler:
+            self.read += 1
+            yield self.filler
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+def _get_head(stream: ChunkStream, max_bytes: int):
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=stream))
+
+    async def run():
+        async with AsyncFetcher(user_agent="t", host_rate=1000, retries=1, transport=transport) as f:
+            return await f.get_head("https://news.example.com/a/1", max_bytes=max_bytes)
+
+    return asyncio.run(run())
+
+
+def test_get_head_stops_at_head_end_and_closes_the_stream():
+    # `</head>` straddles two chunks; nothing after it is read
+    stream = ChunkStream([b"<html><head><title>t</title></he", b"ad><body>", b"<p>body</p>"], filler=b"x" * 100)
+    assert _get_head(stream, max_bytes=1024) == b"<html><head><title>t</title></head>"
+    assert stream.read == 2
+    assert stream.closed
+
+
+def test_get_head_stops_at_max_bytes_and_closes_the_stream():
+    stream = ChunkStream([b"<html><head>"], filler=b"<meta>" * 50)
+    head = _get_head(stream, max_bytes=1000)
+    assert 1000 <= len(head) < 1000 + 300
+    assert stream.read == 1 + -(-(1000 - 12) // 300)
+    assert stream.closed
+
+
+def test_get_head_of_a_short_page_returns_all_of_it():
+    stream = ChunkStream([b"<html><title>no head end</title>"])
+    assert _get_head(stream, max_bytes=1024) == b"<html><title>no head end</title>"
+    assert stream.closed
@@ -0,0 +1,154 @@
+from pathlib import Path
+
+import feedparser
+import pytest
+
+from crawler import fetchers
+from crawler.feeds import iter_entries
+from crawler.urls import url_hash
+
+# feedparser warns about its own updated_parsed -> published_parsed alias on every lookup
+pytestmark = pytest.mark.filterwarnings("ignore:To avoid breaking existing software:DeprecationWarning")
+
+FIXTURES = Path(__file__).resolve().parents[1] / "benchmarks" / "fixtures"
+
+RSS = """<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/">
+<channel><title>feed</title><link>https://news.example.com</link>
+  <item>
+    <title><![CDATA[부동산 <b>대책</b> 발표]]></title>
+    <link>https://news.example.com/a/1</link>
+    <guid isPermaLink="false">n-1</guid>
+    <description>&lt;p&gt;요약 &amp;amp; 본문&lt;/p&gt;</description>
+    <media:content url="https://img.example.com/1.jpg" medium="image"/>
+    <pubDate>Mon, 06 Oct 2025 09:30:00 +0900</pubDate>
+  </item>
+  <item>
+    <title>금리 &amp; 환율 &lt;속보&gt;</title>
+    <link>https://news.example.com/a/2</link>
+    <media:group>
+      <media:content url="https://img.example.com/2-large.jpg"/>
+      <media:thumbnail url="https://img.example.com/2-thumb.jpg"/>
+    </media:group>
+    <pubDate>not a date</pubDate>
+  </item>
+  <item>
+    <title>날짜 없음</title>
+    <link>https://news.example.com/a/3</link>
+    <media:thumbnail url="https://img.example.com/3.jpg"/>
+    <dc:date>2025-10-06T10:00:00Z</dc:date>
+  </item>
+  <item>
+    <title>정말 날짜 없음</title>
+    <link>https://news.example.com/a/4</link>
+  </item>
+</channel></rss>
+""".encode("utf-8")
+
+ATOM = """<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <title>atom</title>
+  <entry>
+    <title type="html">&lt;em&gt;Atom&lt;/em&gt; 기사</title>
+    <link rel="enclosure" href="https://img.example.com/e.jpg"/>
+    <link rel="alternate" href="https://news.example.com/e/1"/>
+    <id>urn:uuid:1</id>
+    <published>2025-10-06T09:30:00+09:00</published>
+    <updated>2025-10-06T11:00:00+09:00</updated>
+    <summary>짧은 요약</summary>
+  </entry>
+  <entry>
+    <title>본문만 있음</title>
+    <link href="https://news.example.com/e/2"/>
+    <id>urn:uuid:2</id>
+    <updated>2025-10-07T08:00:00</updated>
+    <content type="html">&lt;p&gt;전체 본문&lt;/p&gt;</content>
+  </entry>
+</feed>
+""".encode("utf-8")
+
+
+def _view(e) -> dict:
+    """The fields the crawler reads from an entry."""
+    return {
+        "title": e.get("title"),
+        "link": e.get("link"),
+        "id": e.get("id"),
+        "summary": e.get("summary"),
+        "date": fetchers._parse_dt(e),
+        "media": [m["url"] for key in ("media_content", "media_thumbnail") for m in e.get(key) or ()],
+    }
+
+
+@pytest.mark.parametrize("body", [RSS, ATOM], ids=["rss", "atom"])
+def test_entries_match_feedparser(body):
+    ours = [_view(e) for e in iter_entries(body)]
+    assert ours == [_view(e) for e in feedparser.parse(body).entries]
+
+
+@pytest.mark.parametrize("site", sorted(p.name for p in FIXTURES.iterdir() if (p / "rss.xml").is_file()))
+def test_fixture_feeds_match_feedparser(site):
+    body = (FIXTURES / site / "rss.xml").read_bytes()
+    ours = [_view(e) for e in iter_entries(body)]
+    assert len(ours) == 40
+    assert ours == [_view(e) for e in feedparser.parse(body).entries]
+
+
+def test_rss_fields():
+    first, second, third, fourth = iter_entries(RSS)
+    # CDATA keeps the markup, entities are decoded once (clean_html strips tags later)
+    assert first["title"] == "부동산 <b>대책</b> 발표"
+    assert first["summary"] == "<p>요약 &amp; 본문</p>"
+    assert second["title"] == "금리 & 환율 <속보>"
+    assert first["media_content"] == [{"url": "https://img.example.com/1.jpg"}]
+    assert second["media_content"] == [{"url": "https://img.example.com/2-large.jpg"}]
+    assert second["media_thumbnail"] == [{"url": "https://img.example.com/2-thumb.jpg"}]
+    assert third["media_thumbnail"] == [{"url": "https://img.example.com/3.jpg"}]
+    # bad date: no parsed value; dc:date is the fallback; nothing at all: undated
+    assert tuple(first["published_parsed"])[:6] == (2025, 10, 6, 0, 30, 0)
+    assert second.get("published_parsed") is None and fetchers._parse_dt(second) is None
+    assert fetchers._parse_dt(third).isoformat() == "2025-10-06T10:00:00"
+    assert fetchers._parse_dt(fourth) is None
+
+
+def test_atom_fields():
+    first, second = iter_entries(ATOM)
+    assert first["link"] == "https://news.example.com/e/1"
+    assert first["title"] == "<em>Atom</em> 기사"
+    assert fetchers._parse_dt(first).isoformat() == "2025-10-06T00:30:00"
+    # no summary: the content stands in; zoneless dates are UTC
+    assert second["summary"] == "<p>전체 본문</p>"
+    assert fetchers._parse_dt(second).isoformat() == "2025-10-07T08:00:00"
+
+
+def test_malformed_xml_falls_back_to_feedparser():
+    body = RSS.replace(b"<title>\xeb\x82\xa0\xec\xa7\x9c \xec\x97\x86\xec\x9d\x8c</title>", b"<title>A & B</title>")
+    titles = [e.get("title") for e in iter_entries(body)]
+    assert titles == ["부동산 <b>대책</b> 발표", "금리 & 환율 <속보>", "A & B", "정말 날짜 없음"]
+
+
+class _Response:
+    def __init__(self, body: bytes):
+        self.status_code = 200
+        self.content = body
+        self.headers = {}
+        self.ok = True
+
+
+def test_poll_stops_at_the_high_water_mark(monkeypatch):
+    body = (FIXTURES / "khan" / "rss.xml").read_bytes()
+    links = [e["link"] for e in iter_entries(body)]
+    monkeypatch.setattr(fetchers.requests, "get", lambda url, **kw: _Response(body))
+    monkeypatch.setattr(fetchers, "REQ_DELAY", 0)
+    monkeypatch.setattr(fetchers, "REQ_JITTER", 0)
+
+    # entries 5.. are stored already: reading stops after `stop_after` of them in a row
+    known = {url_hash(u) for u in links[5:]}
+    poll = fetchers.poll_feeds(["https://www.khan.co.kr/rss"], conditional=False, known_hashes=known, stop_after=3)
+    assert (poll.read, poll.known) == (8, 3)
+    assert sorted(e["link"] for e in poll.entries) == sorted(links[:5])
+
+    # a known entry followed by new ones resets the run: nothing new is lost
+    known = {url_hash(links[1]), url_hash(links[2])}
+    poll = fetchers.poll_feeds(["https://www.khan.co.kr/rss"], conditional=False, known_hashes=known, stop_after=3)
+    assert (poll.read, poll.known, len(poll.entries)) == (40, 2, 38)
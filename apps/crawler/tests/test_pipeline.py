@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from crawler import pipeline
+from crawler.db import session_scope
+from crawler.fetchers import FeedPoll, SiteBatch
+from crawler.models import Article
+from crawler.urls import url_hash
+
+
+class FakeFetcher:
+    def __init__(self, **_kwargs):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, url, metrics=None):
+        return f"<html><body>{url}</body></html>"
+
+
+class FlakyArchive:
+    """Fails the first write, stores the rest."""
+
+    def __init__(self):
+        self.calls = 0
+        self.stored = []
+
+    def put(self, url_hash, html):
+        self.calls += 1
+        if self.calls == 1:
+            raise OSError("No space left on device")
+        self.stored.append(url_hash)
+
+
+def test_archive_error_only_loses_the_archived_copy(monkeypatch):
+    urls = [f"https://www.khan.co.kr/article/2026101800{n}" for n in range(3)]
+
+    def collect(config, limit, key, metrics):
+        candidates = [
+            {"url": u, "url_hash": url_hash(u), "title": f"기사 {n}", "summary": "요약", "image_url": None, "published_at": None}
+            for n, u in enumerate(urls)
+        ]
+        return SiteBatch(config=config, site_key=key, poll=FeedPoll(read=3), candidates=candidates, metrics=metrics)
+
+    archive = FlakyArchive()
+    monkeypatch.setattr(pipeline, "collect_candidates", collect)
+    monkeypatch.setattr(pipeline, "get_archive", lambda: archive)
+    monkeypatch.setattr(pipeline, "AsyncFetcher", FakeFetcher)
+    monkeypatch.setattr(pipeline, "parse_page", lambda key, html: {})
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", ThreadPoolExecutor)
+
+    metrics = {}
+    assert pipeline.crawl_sites(["khan"], workers=1, metrics=metrics) == {"khan": 3}
+    assert metrics["khan"].counts["archive_failed"] == 1
+    assert len(archive.stored) == 2
+    with session_scope() as s:
+        assert s.query(Article).count() == 3
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from crawler import refresh
+from crawler.db import session_scope
+from crawler.engine import Revalidation
+from crawler.fetchers import article_fingerprint
+from crawler.models import Article, ArticleCheck, CacheGeneration, CrawlLog
+from crawler.sites import SITES
+
+PAGE = (Path(__file__).resolve().parents[1] / "benchmarks" / "fixtures" / "khan" / "article.html").read_text("utf-8")
+URL = "https://www.khan.co.kr/article/202510060001"
+
+
+class Pages:
+    """Revalidation results served to recheck() in order (None = fetch failed)."""
+
+    def __init__(self):
+        self.results = []
+        self.seen = []  # (url, etag, last_modified) of every conditional GET
+
+    def revalidate_many(self, checks, metrics=None, head_only=(), **kwargs):
+        checks = list(checks)
+        self.seen.extend(checks)
+        return {url: self.results.pop(0) for url, _, _ in checks}
+
+
+@pytest.fixture()
+def pages(monkeypatch):
+    pages = Pages()
+    monkeypatch.setattr(refresh, "revalidate_many", pages.revalidate_many)
+    return pages
+
+
+@pytest.fixture()
+def article():
+    fields = {"title": "원래 제목", "summary": "요약", "image_url": None, "published_at": datetime(2025, 10, 6, 9, 30)}
+    with session_scope() as s:
+        art = Article(
+            site=SITES["khan"].name,
+            url=URL,
+            url_hash=1,
+            fetched_at=datetime.utcnow() - timedelta(hours=1),
+            fingerprint=article_fingerprint(fields),
+            **fields,
+        )
+        s.add(art)
+        s.flush()
+        return art.id
+
+
+def _state(article_id):
+    with session_scope() as s:
+        art = s.get(Article, article_id)
+        row = s.get(ArticleCheck, article_id)
+        check = SimpleNamespace(**{c: getattr(row, c) for c in ("etag", "checks", "changes", "checked_at", "next_check_at")})
+        generation = s.query(CacheGeneration.value).filter(CacheGeneration.name == "articles").scalar() or 0
+        return art.title, art.revision, check, generation
+
+
+def _make_due(article_id):
+    with session_scope() as s:
+        s.get(ArticleCheck, article_id).next_check_at = datetime.utcnow() - timedelta(seconds=1)
+
+
+def _recheck(pages, *results):
+    pages.results = list(results)
+    return refresh.recheck(["khan"])
+
+
+def test_changed_page_revises_the_article_once(pages, article):
+    assert _recheck(pages, Revalidation(200, PAGE, etag='"v1"')) == 1
+    title, revision, check, generation = _state(article)
+    assert title.startswith("기획재정부와") and revision == 1 and generation == 1
+    assert (check.etag, check.checks, check.changes) == ('"v1"', 1, 1)
+    # a change brings the next check to the minimum gap
+    assert check.next_check_at - check.checked_at == timedelta(seconds=refresh.RECHECK_MIN)
+
+    # same body again: not parsed, nothing written
+    _make_due(article)
+    assert _recheck(pages, Revalidation(200, PAGE)) == 0
+    # different bytes, same article fields: fingerprint unchanged, no revision
+    _make_due(article)
+    assert _recheck(pages, Revalidation(200, PAGE.replace("</body>", "<!-- ad --></body>"))) == 0
+    title, revision, check, generation = _state(article)
+    assert (revision, check.checks, check.changes, generation) == (1, 3, 1, 1)
+    # the conditional GETs send the stored validators
+    assert pages.seen == [(URL, None, None), (URL, '"v1"', None), (URL, None, None)]
+
+
+def test_not_modified_and_failed_checks_leave_the_row_alone(pages, article):
+    assert _recheck(pages, Revalidation(304, etag='"v0"')) == 0
+    title, revision, check, generation = _state(article)
+    assert (title, revision, generation, check.checks) == ("원래 제목", 0, 0, 1)
+    _make_due(article)
+    assert _recheck(pages, None) == 0
+    with session_scope() as s:
+        logs = [m for (m,) in s.query(CrawlLog.message).filter(CrawlLog.status == "recheck").order_by(CrawlLog.id)]
+    assert logs == ["not_modified=1", "failed=1"]
+
+
+def test_only_due_articles_are_checked(pages, article):
+    with session_scope() as s:
+        # fetched moments ago: too early; older than the window: settled
+        s.add(Article(site=SITES["khan"].name, url=URL + "-new", url_hash=2, title="새", fetched_at=datetime.utcnow()))
+        s.add(
+            Article(
+                site=SITES["khan"].name,
+                url=URL + "-old",
+                url_hash=3,
+                title="옛",
+                fetched_at=datetime.utcnow() - refresh.RECHECK_WINDOW - timedelta(hours=1),
+            )
+        )
+    _recheck(pages, Revalidation(304))
+    assert [url for url, _, _ in pages.seen] == [URL]
+
+
+def test_next_check_delay_grows_with_age():
+    assert refresh.next_check_delay(timedelta(minutes=1)) == refresh.RECHECK_MIN
+    assert refresh.next_check_delay(timedelta(hours=4)) == 2 * 3600
+    assert refresh.next_check_delay(timedelta(days=30)) == refresh.RECHECK_MAX
+    assert refresh.next_check_delay(timedelta(days=1), changed=True) == refresh.RECHECK_MIN
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from crawler.scheduler import CrawlScheduler, FeedSchedule, observed_rate
+
+
+def _every(minutes: float, n: int, now: datetime):
+    return [now - timedelta(minutes=minutes * i) for i in range(n)]
+
+
+@pytest.fixture()
+def scheduler():
+    return CrawlScheduler(["khan"], min_interval=120, max_interval=3600, target=5, recheck_every=0)
+
+
+def test_observed_rate_uses_dated_entries_inside_the_window():
+    now = datetime(2026, 3, 1, 12)
+    # 10 entries over 90 minutes -> 10 / 5400 s
+    assert observed_rate(_every(10, 10, now), now) == pytest.approx(10 / 5400)
+    noisy = _every(10, 10, now) + [None, now - timedelta(days=3), now + timedelta(hours=2)]
+    assert observed_rate(noisy, now) == observed_rate(_every(10, 10, now), now)
+    # a burst published at once is spread over at least a minute
+    assert observed_rate([now, now, now], now) == pytest.approx(3 / 60)
+    assert observed_rate([now], now) is None
+    assert observed_rate([], now) is None
+    assert observed_rate([None, None], now) is None
+
+
+def test_interval_follows_the_rate_within_bounds(scheduler):
+    now = datetime.utcnow()
+    sched = FeedSchedule("khan", interval=600)
+    # one entry every 10 minutes, target 5 per poll -> ~50 minutes
+    interval = scheduler.next_interval(sched, _every(10, 10, now), overflowed=False)
+    assert interval == pytest.approx(5 / sched.rate)
+    assert 120 < interval < 3600
+
+    busy = FeedSchedule("khan", interval=600)
+    assert scheduler.next_interval(busy, _every(0.1, 50, now), overflowed=False) == 120
+    quiet = FeedSchedule("khan", interval=600)
+    assert scheduler.next_interval(quiet, [now - timedelta(hours=20), now], overflowed=False) == 3600
+
+
+def test_rate_is_smoothed_across_polls(scheduler):
+    now = datetime.utcnow()
+    sched = FeedSchedule("khan", interval=600, rate=1 / 60)
+    scheduler.next_interval(sched, _every(10, 10, now), overflowed=False)
+    obs = observed_rate(_every(10, 10, now), now)
+    assert sched.rate == pytest.approx(0.3 * obs + 0.7 / 60, rel=1e-3)
+
+
+def test_overflow_at_least_halves_the_interval(scheduler):
+    now = datetime.utcnow()
+    # the rate alone would allow a long interval, but the feed rolled past unseen entries
+    sched = FeedSchedule("khan", interval=1000)
+    assert scheduler.next_interval(sched, [now - timedelta(hours=20), now], overflowed=True) == 500
+    # never below the minimum
+    fast = FeedSchedule("khan", interval=200)
+    assert scheduler.next_interval(fast, [now - timedelta(hours=20), now], overflowed=True) == 120
+    # already short enough: overflow does not lengthen it
+    busy = FeedSchedule("khan", interval=1000)
+    assert scheduler.next_interval(busy, _every(0.1, 50, now), overflowed=True) == 120
+
+
+@pytest.mark.parametrize("timestamps", [[], [None, None], [datetime(2020, 1, 1)]])
+def test_no_usable_dates_backs_off_from_the_current_interval(scheduler, timestamps):
+    # a fresh schedule starts at the default (minimum) interval, as seed() gives sites without history
+    sched = FeedSchedule("khan", interval=scheduler.min_interval)
+    assert scheduler.next_interval(sched, timestamps, overflowed=False) == 180
+    assert sched.rate is None
+    # the learned rate is kept, and backing off stops at the maximum
+    sched = FeedSchedule("khan", interval=3000, rate=0.01)
+    assert scheduler.next_interval(sched, timestamps, overflowed=False) == 3600
+    assert sched.rate == 0.01
@@ -0,0 +1,107 @@
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import select
+
+from crawler.db import session_scope
+from crawler.models import Article, SearchDoc, SearchPosting, SearchStats, SearchTerm
+from crawler.search import _unindex, document_terms, index_documents, reindex_changed, tokenize
+
+
+def _articles(*titles_summaries) -> list:
+    with session_scope() as s:
+        arts = [
+            Article(site="YTN", url=f"https://www.ytn.co.kr/_ln/s{i}", url_hash=i, title=title, summary=summary)
+            for i, (title, summary) in enumerate(titles_summaries, 1)
+        ]
+        s.add_all(arts)
+        s.flush()
+        return [a.id for a in arts]
+
+
+def _df() -> dict:
+    with session_scope() as s:
+        return dict(s.execute(select(SearchTerm.term, SearchTerm.df)).all())
+
+
+def _postings(article_id: int) -> dict:
+    with session_scope() as s:
+        rows = s.execute(
+            select(SearchTerm.term, SearchPosting.tf)
+            .join(SearchTerm, SearchTerm.id == SearchPosting.term_id)
+            .where(SearchPosting.article_id == article_id)
+        )
+        return dict(rows.all())
+
+
+def _length(title, summary) -> int:
+    return sum(document_terms(title, summary).values())
+
+
+def _stats() -> tuple:
+    with session_scope() as s:
+        stats = s.get(SearchStats, 1)
+        return (stats.docs, stats.total_length) if stats else (0, 0)
+
+
+def test_index_documents_counts_terms_once_per_document():
+    a, b = _articles(("부동산 시장", "시장 동향"), ("금리 동결", "부동산 영향"))
+    with session_scope() as s:
+        assert index_documents(s, {a: ("부동산 시장", "시장 동향"), b: ("금리 동결", "부동산 영향")}) == 2
+        # already indexed: skipped without `replace`
+        assert index_documents(s, {a: ("부동산 시장", "시장 동향")}) == 0
+
+    # title tokens weigh TITLE_WEIGHT, summary tokens once
+    assert _postings(a) == {"부동": 2, "동산": 2, "시장": 3, "동향": 1}
+    df = _df()
+    assert (df["부동"], df["시장"], df["금리"]) == (2, 1, 1)
+    length_a, length_b = _length("부동산 시장", "시장 동향"), _length("금리 동결", "부동산 영향")
+    assert _stats() == (2, length_a + length_b)
+    with session_scope() as s:
+        assert dict(s.execute(select(SearchDoc.article_id, SearchDoc.length)).all()) == {a: length_a, b: length_b}
+
+
+def test_unindex_removes_postings_and_decrements_totals():
+    a, b = _articles(("부동산 시장", None), ("부동산 정책", None))
+    with session_scope() as s:
+        index_documents(s, {a: ("부동산 시장", None), b: ("부동산 정책", None)})
+    with session_scope() as s:
+        _unindex(s, [a])
+
+    assert _postings(a) == {}
+    df = _df()
+    assert (df["부동"], df["시장"], df["정책"]) == (1, 0, 1)
+    assert _stats() == (1, _length("부동산 정책", None))
+    with session_scope() as s:
+        # unindexing twice changes nothing
+        _unindex(s, [a])
+    assert _df() == df
+
+
+def test_reindex_changed_moves_df_to_the_new_terms():
+    (a,) = _articles(("금리 인상", "한국은행"))
+    with session_scope() as s:
+        index_documents(s, {a: ("금리 인상", "한국은행")})
+    with session_scope() as s:
+        s.query(Article).filter(Article.id == a).update({"title": "금리 동결"})
+        reindex_changed(s, [{"id": a, "title": "금리 동결"}])
+        # updates that do not touch title/summary leave the index alone
+        reindex_changed(s, [{"id": a, "image_url": "https://img.example.com/x.jpg"}])
+
+    df = _df()
+    assert (df["금리"], df["인상"], df["동결"], df["한국"]) == (1, 0, 1, 1)
+    assert _postings(a) == {"금리": 2, "동결": 2, "한국": 1, "국은": 1, "은행": 1}
+    assert _stats() == (1, _length("금리 동결", "한국은행"))
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["부동산을 AI", "집 GDP 2.5%", "Ｓａｍｓｕｎｇ전자 3분기 실적", "北 미사일 ICBM-발사", "", "x" * 40 + " 짧은 k-pop"],
+)
+def test_tokenizer_matches_the_backend(text):
+    backend_src = Path(__file__).resolve().parents[2] / "backend" / "src"
+    if str(backend_src) not in sys.path:
+        sys.path.append(str(backend_src))
+    backend = pytest.importorskip("app.search")
+    assert tokenize(text) == backend.tokenize(text)
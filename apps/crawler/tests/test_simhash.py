@@ -0,0 +1,82 @@
+from datetime import datetime
+
+import pytest
+
+from crawler.simhash import BAND_BITS, MAX_DISTANCE, NearDupIndex, article_simhash, hamming, simhash
+
+SIG = 0x0123_4567_89AB_CDEF
+
+
+def _flip(sig: int, *bits: int) -> int:
+    for b in bits:
+        sig ^= 1 << b
+    return sig
+
+
+def test_simhash_ignores_spacing_and_punctuation():
+    a = simhash("[속보] 정부, 부동산 안정 대책 발표…시장 반응 주목")
+    b = simhash("속보 정부 부동산안정대책 발표 시장반응 주목")
+    assert a == b
+    assert hamming(a, simhash("한국은행 기준금리 동결, 물가 상승세 둔화 판단")) > MAX_DISTANCE
+    # too short to fingerprint
+    assert simhash("짧은 제목") is None and article_simhash("짧은", None) is None
+
+
+def test_hamming_counts_differing_bits_of_signed_values():
+    assert hamming(SIG, SIG) == 0
+    assert hamming(SIG, _flip(SIG, 0, 63)) == 2
+    assert hamming(-1, 0) == 64
+
+
+@pytest.mark.parametrize("bits", [(0,), (0, 17), (1, 20, 40)])
+def test_matches_within_the_distance_are_found(bits):
+    # up to MAX_DISTANCE flipped bits hit at most 3 of the 4 bands: one band still matches
+    index = NearDupIndex()
+    index.add(SIG, 10)
+    assert index.find(_flip(SIG, *bits)) == (10, None)
+
+
+def test_matches_beyond_the_distance_are_not():
+    index = NearDupIndex()
+    index.add(SIG, 10)
+    # four bits in one band: candidate found by the other bands, rejected by the Hamming check
+    assert index.find(_flip(SIG, 0, 1, 2, 3)) is None
+    # one bit in every band: no band matches at all
+    assert index.find(_flip(SIG, *(b * BAND_BITS for b in range(4)))) is None
+    loose = NearDupIndex(max_distance=4)
+    loose.add(SIG, 10)
+    assert loose.find(_flip(SIG, 0, 1, 2, 3)) == (10, None)
+
+
+def test_closest_match_and_cluster_representative():
+    index = NearDupIndex()
+    index.add(SIG, 1)  # representative
+    index.add(_flip(SIG, 5, 6), 2, cluster_id=1)
+    assert len(index) == 2
+    # nearer to article 2 than to 1: still clusters under the representative
+    assert index.find(_flip(SIG, 5, 6, 30)) == (2, 1)
+    assert index.cluster_for(_flip(SIG, 5, 6, 30)) == 1
+    assert index.cluster_for(SIG) == 1
+    assert index.cluster_for(~SIG) is None
+    assert index.cluster_for(None) is None
+
+
+def test_negative_signatures_band_like_their_unsigned_value():
+    index = NearDupIndex()
+    neg = -0x0123_4567_89AB_CDEF
+    index.add(neg, 7)
+    assert index.find(_flip(neg, 63)) == (7, None)
+
+
+def test_articles_are_indexed_once_and_pruned_by_fetch_time():
+    index = NearDupIndex()
+    old, new = datetime(2026, 10, 1), datetime(2026, 10, 5)
+    index.add(SIG, 1, at=old)
+    index.add(SIG, 1, at=new)  # already indexed: ignored
+    index.add(_flip(SIG, 9), 2, cluster_id=1, at=new)
+    index.add(~SIG, 3)  # no timestamp: kept
+    assert len(index) == 3
+    assert index.prune(datetime(2026, 10, 3)) == 1
+    assert 1 not in index and len(index) == 2
+    assert index.find(SIG) == (2, 1)
+    assert index.prune(datetime(2026, 10, 3)) == 0
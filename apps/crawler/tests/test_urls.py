@@ -0,0 +1,15 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from crawler.urls import normalize_url, url_hash
+
+# Shared with the backend's tests/test_urls.py: both copies of the URL code must agree
+VECTORS = json.loads((Path(__file__).with_name("url_vectors.json")).read_text("utf-8"))
+
+
+@pytest.mark.parametrize("case", VECTORS, ids=lambda c: c["url"].strip())
+def test_url_vectors(case):
+    assert normalize_url(case["url"]) == case["normalized"]
+    assert url_hash(case["url"]) == case["url_hash"]
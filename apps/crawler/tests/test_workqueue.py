@@ -0,0 +1,102 @@
+from datetime import datetime
+
+from crawler.db import session_scope
+from crawler.fetchers import SiteBatch, write_batch
+from crawler.models import Article, CrawlLog, CrawlTask, FeedState
+from crawler.sites import SITES
+from crawler.urls import url_hash
+from crawler.workqueue import complete, enqueue_pages, fail, heartbeat, lease
+
+
+def _candidate(n: int) -> dict:
+    url = f"https://www.ytn.co.kr/_ln/q{n}"
+    return {
+        "url": url,
+        "url_hash": url_hash(url),
+        "title": f"기사 {n}",
+        "summary": "요약",
+        "image_url": None,
+        "published_at": datetime(2026, 3, 1, 9, n),
+    }
+
+
+def _queue(*ns: int) -> None:
+    with session_scope() as s:
+        enqueue_pages(s, "ytn", [_candidate(n) for n in ns])
+
+
+def _task(task_id: int) -> CrawlTask:
+    with session_scope() as s:
+        task = s.get(CrawlTask, task_id)
+        s.expunge(task)
+        return task
+
+
+def test_leased_task_is_not_claimed_twice():
+    _queue(1, 2)
+    first = lease("w1", limit=10)
+    assert len(first.tasks) == 2
+    assert lease("w2", limit=10).tasks == []
+    # re-enqueueing a queued page is a no-op
+    _queue(1)
+    assert lease("w2", limit=10).tasks == []
+
+
+def test_expired_lease_is_taken_over():
+    _queue(1)
+    stale = lease("w1", lease_seconds=-1)
+    (task,) = stale.tasks
+    takeover = lease("w2")
+    assert [t.id for t in takeover.tasks] == [task.id]
+    assert _task(task.id).attempts == 2
+    # the first worker lost the lease: its late result does not overwrite the new owner's
+    assert complete(stale.token, [task.id]) == 0
+    assert heartbeat(stale.token) == 0
+    assert heartbeat(takeover.token) == 1
+
+
+def test_heartbeat_extends_the_lease():
+    _queue(1)
+    held = lease("w1", lease_seconds=-1)
+    (task,) = held.tasks
+    assert heartbeat(held.token, lease_seconds=600) == 1
+    assert _task(task.id).lease_expires_at > datetime.utcnow()
+    assert lease("w2").tasks == []
+    assert heartbeat("nobody") == 0
+
+
+def test_complete_and_fail_are_idempotent():
+    _queue(1, 2)
+    held = lease("w1")
+    done, retry = (t.id for t in held.tasks)
+
+    assert complete(held.token, [done]) == 1
+    assert complete(held.token, [done]) == 0
+    assert _task(done).status == "done"
+
+    fail(held.token, [retry], "boom")
+    fail(held.token, [retry], "boom again")
+    task = _task(retry)
+    assert (task.status, task.attempts, task.last_error, task.lease_owner) == ("pending", 1, "boom", None)
+    # a completed task cannot be failed afterwards either
+    fail(held.token, [done], "late")
+    assert _task(done).status == "done"
+
+
+def test_fail_gives_up_after_max_attempts():
+    _queue(1)
+    for _ in range(2):
+        held = lease("w1", max_attempts=2)
+        fail(held.token, [t.id for t in held.tasks], "boom", max_attempts=2)
+    assert _task(held.tasks[0].id).status == "failed"
+    assert lease("w1", max_attempts=2).tasks == []
+
+
+def test_page_batch_writes_without_a_feed_poll():
+    batch = SiteBatch(config=SITES["ytn"], site_key="ytn", poll=None, candidates=[_candidate(1), _candidate(2)])
+    assert write_batch(batch) == 2
+    with session_scope() as s:
+        assert s.query(Article).count() == 2
+        assert s.query(FeedState).count() == 0
+        (log,) = s.query(CrawlLog.status, CrawlLog.saved).all()
+    assert tuple(log) == ("ok", 2)
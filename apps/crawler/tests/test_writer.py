@@ -0,0 +1,110 @@
+from datetime import datetime
+
+import pytest
+
+from crawler import writer as writer_module
+from crawler.db import engine, session_scope
+from crawler.dedup import NEAR_DUP_WINDOW, near_dup_index
+from crawler.models import Article, ArticleBody, CacheGeneration, SearchDoc
+from crawler.writer import ArticleWriter
+
+
+@pytest.fixture(autouse=True, params=["returning", "per-row"])
+def insert_path(request, monkeypatch):
+    # MySQL has no INSERT .. RETURNING; exercise its per-row lastrowid path on SQLite too
+    if request.param == "per-row":
+        monkeypatch.setattr(engine.dialect, "insert_executemany_returning", False)
+    return request.param
+
+
+def _row(n: int, **extra) -> dict:
+    row = {
+        "site": "YTN",
+        "url": f"https://www.ytn.co.kr/_ln/w{n}",
+        "url_hash": n,
+        "title": f"기사 {n}",
+        "summary": "요약",
+        "content": f"본문 {n}",
+        "simhash": None,
+    }
+    row.update(extra)
+    return row
+
+
+def _store(*rows: dict) -> None:
+    with session_scope() as s:
+        s.add_all(Article(**{k: v for k, v in r.items() if k != "content"}) for r in rows)
+
+
+def test_bad_row_fails_alone():
+    w = ArticleWriter()
+    for row in (_row(1), _row(2, url=None), _row(3)):
+        w.add(row)
+    w.flush()
+    assert (w.saved["YTN"], w.failed["YTN"]) == (2, 1)
+    with session_scope() as s:
+        assert sorted(h for (h,) in s.query(Article.url_hash)) == [1, 3]
+        assert s.query(ArticleBody).count() == 2
+        assert s.query(SearchDoc).count() == 2
+
+
+def test_existing_url_hash_is_not_counted():
+    _store(_row(1, title="원래 제목"))
+    w = ArticleWriter()
+    w.add(_row(1))
+    w.add(_row(2))
+    w.flush()
+    assert (w.saved["YTN"], w.failed["YTN"]) == (1, 0)
+
+
+def test_row_stored_by_another_writer_meanwhile_is_left_alone(monkeypatch):
+    # the pre-insert check misses a row that a concurrent writer commits just before the INSERT
+    _store(_row(1, title="원래 제목", cluster_id=None))
+    monkeypatch.setattr(writer_module, "known_url_hashes", lambda s, hashes: set())
+    w = ArticleWriter()
+    w.add(_row(1, simhash=7))
+    w.add(_row(2))
+    w.flush()
+    assert w.saved["YTN"] == 1
+    with session_scope() as s:
+        stored = s.query(Article).filter(Article.url_hash == 1).one()
+        assert (stored.title, stored.cluster_id) == ("원래 제목", None)
+        assert s.get(ArticleBody, stored.id) is None
+        assert s.get(SearchDoc, stored.id) is None
+
+
+def test_generation_bumped_once_per_stored_batch():
+    def generation():
+        with session_scope() as s:
+            return s.query(CacheGeneration.value).filter(CacheGeneration.name == "articles").scalar() or 0
+
+    w = ArticleWriter(batch_size=2)
+    for n in range(1, 4):
+        w.add(_row(n))
+    w.flush()
+    assert generation() == 2
+    # nothing new stored: the backend's cache stays valid
+    w.add(_row(1))
+    w.flush()
+    assert generation() == 2
+
+
+def test_writers_share_one_near_dup_index_kept_current():
+    sig = 0x0123_4567_89AB_CDEF
+    first = ArticleWriter()
+    first.add(_row(1, simhash=sig))
+    first.flush()
+    # stored by another process, and one fetched before the window
+    _store(_row(2, simhash=~sig), _row(3, simhash=sig ^ 0xFF00, fetched_at=datetime.utcnow() - 2 * NEAR_DUP_WINDOW))
+    second = ArticleWriter()
+    second.add(_row(4, simhash=sig ^ 1))
+    second.add(_row(5, simhash=~sig ^ 1))
+    second.flush()
+    with session_scope() as s:
+        index = near_dup_index(s)
+        assert index is second._near_dups is first._near_dups
+        clusters = dict(s.query(Article.url_hash, Article.cluster_id))
+    assert (clusters[4], clusters[5]) == (1, 2)
+    assert sorted(a for a in range(1, 6) if a in index) == [1, 2, 4, 5]
+    # entries age out of the long-lived index
+    assert index.prune(datetime.utcnow() + NEAR_DUP_WINDOW) == 4 and len(index) == 0
@@ -43,8 +43,9 @@ const TRUST_LABEL: Record<1|2|3|4|5,string> = {
   5: '매우 높음',
 }
 
-import { toggleBookmark as storeToggle, isBookmarked as storeIs, serverHas, serverSet } from '../lib/bookmarks'
-import { serverGetReaction, serverToggleLike, serverToggleDislike } from '../lib/reactions'
+import { toggleBookmark as storeToggle, isBookmarked as storeIs, serverSet } from '../lib/bookmarks'
+import { serverToggleLike, serverToggleDislike } from '../lib/reactions'
+import { serverArticleState } from '../lib/articleState'
 import { useAuth } from '../context/AuthContext'
 import { track } from '../lib/analytics'
 
@@ -59,13 +60,12 @@ export default function Card({ id, image, title, description, sources, trustLeve
     ;(async()=>{
       if (id){
         if (token){
-          const has = await serverHas(id, token)
-          if(alive) setBookmarked(has)
-          const r = await serverGetReaction(id, token)
+          const st = await serverArticleState(id, token)
           if (alive){
-            setLiked(r === 'like')
+            setBookmarked(st.bookmarked)
+            setLiked(st.like)
             // disliked is only used for UI state; hidden handled separately
-            setDisliked(r === 'dislike')
+            setDisliked(st.dislike)
           }
         } else {
           setBookmarked(storeIs(id))
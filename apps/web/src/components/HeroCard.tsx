@@ -1,7 +1,8 @@
 import React, { useEffect, useRef, useState } from 'react'
 import { useAuth } from '../context/AuthContext'
-import { isBookmarked as storeIs, toggleBookmark as storeToggle, serverHas, serverSet } from '../lib/bookmarks'
-import { serverGetReaction, serverToggleLike, serverToggleDislike } from '../lib/reactions'
+import { isBookmarked as storeIs, toggleBookmark as storeToggle, serverSet } from '../lib/bookmarks'
+import { serverToggleLike, serverToggleDislike } from '../lib/reactions'
+import { serverArticleState } from '../lib/articleState'
 import { track } from '../lib/analytics'
 
 const TRUST_LABEL: Record<1|2|3|4|5,string> = {1:'매우 낮음',2:'낮음',3:'보통',4:'높음',5:'매우 높음'}
@@ -25,10 +26,8 @@ export default function HeroCard({ id, image, title, description, sources, onCli
     ;(async()=>{
       if (id){
         if (token){
-          const has = await serverHas(id, token)
-          if(alive) setBookmarked(has)
-          const r = await serverGetReaction(id, token)
-          if (alive){ setLiked(r === 'like'); setDisliked(r === 'dislike') }
+          const st = await serverArticleState(id, token)
+          if (alive){ setBookmarked(st.bookmarked); setLiked(st.like); setDisliked(st.dislike) }
         } else {
           setBookmarked(storeIs(id))
         }
@@ -10,3 +10,7 @@ export function authHeaders(token?: string) {
   return token ? { Authorization: `Bearer ${token}` } : {}
 }
 
+// Resized, cached copy of an article's image from the backend proxy (WebP when supported)
+export function thumbUrl(articleId: number, width = 640) {
+  return `${API_BASE}/images/articles/${articleId}?w=${width}`
+}
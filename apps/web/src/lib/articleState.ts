@@ -0,0 +1,39 @@
+import { API_BASE, authHeaders } from './api'
+
+export type ArticleState = { bookmarked: boolean; like: boolean; dislike: boolean }
+
+const EMPTY: ArticleState = { bookmarked: false, like: false, dislike: false }
+
+// Cards ask for their state as they mount; requests made in the same tick are sent
+// together as one POST /me/article-state instead of two GETs per card
+let pending: { token: string; waiters: Map<number, ((s: ArticleState) => void)[]> } | null = null
+
+async function flush(batch: NonNullable<typeof pending>) {
+  const ids = Array.from(batch.waiters.keys())
+  let states: Record<number, ArticleState> = {}
+  try{
+    const res = await fetch(`${API_BASE}/me/article-state`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', ...authHeaders(batch.token) },
+      body: JSON.stringify({ ids }),
+    })
+    if (res.ok){
+      const rows: (ArticleState & { article_id: number })[] = await res.json()
+      for (const r of rows) states[r.article_id] = { bookmarked: r.bookmarked, like: r.like, dislike: r.dislike }
+    }
+  }catch{}
+  batch.waiters.forEach((fns, id) => fns.forEach(fn => fn(states[id] || EMPTY)))
+}
+
+export function serverArticleState(id: number, token: string): Promise<ArticleState> {
+  return new Promise(resolve => {
+    if (!pending || pending.token !== token || pending.waiters.size >= 200){
+      const batch = { token, waiters: new Map<number, ((s: ArticleState) => void)[]>() }
+      pending = batch
+      setTimeout(() => { if (pending === batch) pending = null; flush(batch) }, 0)
+    }
+    const fns = pending.waiters.get(id) || []
+    fns.push(resolve)
+    pending.waiters.set(id, fns)
+  })
+}
@@ -5,7 +5,7 @@ import TrendsPanel from '../components/TrendsPanel'
 import TabNav, { TABS } from '../components/TabNav'
 import ArticleModal from '../components/ArticleModal'
 import { useSearchParams } from 'react-router-dom'
-import { api } from '../lib/api'
+import { api, thumbUrl } from '../lib/api'
 
 type Article = { id:number; title:string; image:string; description:string; sources:number; trustLevel:1|2|3|4|5; category: typeof TABS[number]; publishedAt?: string }
 
@@ -39,7 +39,7 @@ export default function Home(){
         const mapped: Article[] = data.map((it, idx)=>({
           id: it.id,
           title: it.title,
-          image: it.image_url || `https://picsum.photos/seed/api${idx}/640/360`,
+          image: it.image_url ? thumbUrl(it.id) : `https://picsum.photos/seed/api${idx}/640/360`,
           description: it.summary || '',
           sources: 1,
           trustLevel: (Math.floor(Math.random()*5)+1) as 1|2|3|4|5,